@@ -0,0 +1,6 @@
+"""
+Benchmarks de performance de la chaîne de conversion des CV.
+
+À lancer depuis la racine du dépôt, par exemple :
+    python -m benchmarks.bench_import
+"""
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Mesure de la réduction de tokens apportée par la compaction (cv_compaction)
+sur un corpus de CV.
+
+    python -m benchmarks.bench_compaction chemin/vers/cvs
+    python -m benchmarks.bench_compaction "cvs/*.pdf" --comparer-extraction
+
+Avec --comparer-extraction, chaque CV est aussi extrait deux fois par le LLM
+(texte brut puis texte compacté, sans cache) et les champs obtenus sont comparés.
+Le LLM n'étant pas parfaitement déterministe, quelques écarts de formulation
+sont attendus même sans perte d'information.
+"""
+import argparse
+import sys
+
+from cv_batch import collecter_fichiers
+from cv_compaction import compacter_texte
+from cv_process import extract_info_from_cv, extract_text_from_file
+
+
+def comparer_champs(sans_compaction: dict, avec_compaction: dict) -> list:
+    """Liste les champs dont la valeur diffère entre les deux extractions."""
+    return sorted(
+        cle for cle in set(sans_compaction) | set(avec_compaction)
+        if sans_compaction.get(cle) != avec_compaction.get(cle)
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Réduction de tokens de la compaction sur un corpus de CV.")
+    parser.add_argument("entree", help="Dossier contenant les CV ou motif glob")
+    parser.add_argument("--comparer-extraction", action="store_true",
+                        help="Comparer les champs extraits avec et sans compaction (appels API réels)")
+    parser.add_argument("--langue", choices=["fr", "en"], default="fr")
+    args = parser.parse_args(argv)
+
+    fichiers = collecter_fichiers(args.entree, recursif=True)
+    if not fichiers:
+        print(f"Aucun fichier PDF ou Word trouvé pour : {args.entree}", file=sys.stderr)
+        return 1
+
+    total_avant = total_apres = 0
+    champs_differents = 0
+    print(f"{'Fichier':<50} {'avant':>8} {'après':>8} {'gain':>6}")
+    for fichier in fichiers:
+        texte = extract_text_from_file(fichier)
+        resultat = compacter_texte(texte)
+        total_avant += resultat.tokens_avant
+        total_apres += resultat.tokens_apres
+        print(f"{fichier[-50:]:<50} {resultat.tokens_avant:>8} {resultat.tokens_apres:>8} {resultat.reduction:>6.1%}")
+
+        if args.comparer_extraction:
+            brut = extract_info_from_cv(texte, language=args.langue, use_cache=False, compacter=False)
+            compacte = extract_info_from_cv(texte, language=args.langue, use_cache=False, compacter=True)
+            differences = comparer_champs(brut, compacte)
+            champs_differents += len(differences)
+            if differences:
+                print(f"    champs différents : {', '.join(differences)}")
+
+    reduction = 1 - total_apres / total_avant if total_avant else 0.0
+    print("=" * 75)
+    print(f"{len(fichiers)} CV | tokens avant : {total_avant} | après : {total_apres} | réduction : {reduction:.1%}")
+    if args.comparer_extraction:
+        print(f"Champs extraits différents : {champs_differents}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
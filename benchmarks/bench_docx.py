@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'extraction du texte des CV Word : lecture en flux (cv_docx)
+contre python-docx (Document(...).paragraphs, l'ancienne méthode).
+
+Pour chaque taille de CV et chaque mise en page (paragraphes simples ou mise en
+page de designer avec tableaux et zone de texte), le rapport donne le temps
+médian, le pic de mémoire Python (tracemalloc) et le nombre de caractères extraits.
+
+    python -m benchmarks.bench_docx --projets 5 40 200 --repetitions 20
+"""
+import argparse
+import io
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.corpus import generer_docx
+
+
+def texte_python_docx(contenu: bytes) -> str:
+    from docx import Document
+
+    return "\n".join(p.text for p in Document(io.BytesIO(contenu)).paragraphs)
+
+
+def texte_flux(contenu: bytes) -> str:
+    from cv_docx import iter_texte_docx
+
+    return "\n".join(iter_texte_docx(contenu))
+
+
+def mesurer(fonction, contenu: bytes, repetitions: int) -> dict:
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        texte = fonction(contenu)
+        durees.append(time.perf_counter() - debut)
+    tracemalloc.start()
+    fonction(contenu)
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"duree_mediane": statistics.median(durees), "pic_memoire": pic, "caracteres": len(texte)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de l'extraction du texte des fichiers Word.")
+    parser.add_argument("--projets", type=int, nargs="+", default=[5, 40, 200])
+    parser.add_argument("--repetitions", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    # Imports hors mesure
+    texte_python_docx(generer_docx(1))
+    texte_flux(generer_docx(1))
+
+    print(f"{'Mise en page':<12} {'projets':>8} {'méthode':<12} {'médiane':>10} {'pic mém.':>10} {'caractères':>11}")
+    for mise_en_page in ("paragraphes", "tableau"):
+        for nb_projets in args.projets:
+            contenu = generer_docx(nb_projets, mise_en_page=mise_en_page)
+            for nom, fonction in (("python-docx", texte_python_docx), ("flux", texte_flux)):
+                r = mesurer(fonction, contenu, args.repetitions)
+                print(f"{mise_en_page:<12} {nb_projets:>8} {nom:<12} {r['duree_mediane'] * 1000:>8.1f}ms "
+                      f"{r['pic_memoire'] / 1024:>8.0f}Ko {r['caracteres']:>11}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'export ZIP en flux (cv_export) contre le serveur OpenAI local.
+
+Pour chaque taille de lot, l'archive est consommée comme le ferait un
+téléchargement. Le rapport donne :
+    - le délai avant le premier octet, comparé à la durée totale du lot
+      (un export qui attend la fin du lot a un premier octet = durée totale) ;
+    - le pic de mémoire Python (tracemalloc) pendant l'export, qui doit rester
+      stable quand la taille du lot augmente ;
+    - la taille de l'archive, sa validité et le nombre de lignes du manifeste.
+
+    python -m benchmarks.bench_export --tailles 20 100 --concurrence 4 --latence 0.3
+"""
+import argparse
+import csv
+import io
+import json
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+from benchmarks.corpus import generer_corpus
+from benchmarks.fake_openai import ServeurOpenAIFactice
+
+
+def mesurer_export(fichiers, concurrence: int) -> dict:
+    """Consomme iter_zip_lot comme un téléchargement ; seule la taille de l'archive est conservée."""
+    from cv_export import NOM_MANIFESTE, iter_zip_lot
+
+    archive = io.BytesIO()
+    premier_octet = None
+    taille = 0
+    tracemalloc.start()
+    debut = time.perf_counter()
+    for morceau in iter_zip_lot(fichiers, concurrence=concurrence):
+        if morceau and premier_octet is None:
+            premier_octet = time.perf_counter() - debut
+        taille += len(morceau)
+        # L'archive n'est conservée que pour les petits lots, pour vérification
+        if len(fichiers) <= 20:
+            archive.write(morceau)
+    duree = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rapport = {"cv": len(fichiers), "premier_octet_s": premier_octet, "duree_s": duree,
+               "pic_memoire_mo": pic / 1e6, "taille_archive_mo": taille / 1e6}
+    if archive.tell():
+        with zipfile.ZipFile(archive) as zf:
+            rapport["archive_valide"] = zf.testzip() is None
+            manifeste = zf.read(NOM_MANIFESTE).decode("utf-8-sig")
+            rapport["lignes_manifeste"] = len(list(csv.reader(io.StringIO(manifeste), delimiter=";"))) - 1
+    return rapport
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de l'export ZIP en flux.")
+    parser.add_argument("--tailles", type=int, nargs="+", default=[20, 100], help="Tailles des lots exportés")
+    parser.add_argument("--concurrence", type=int, default=4)
+    parser.add_argument("--latence", type=float, default=0.3, help="Latence simulée d'un appel (s)")
+    parser.add_argument("--json", help="Fichier où écrire le rapport au format JSON")
+    args = parser.parse_args(argv)
+
+    from cv_process import configurer_client
+
+    dossier = tempfile.mkdtemp(prefix="bench_export_")
+    resultats = []
+    try:
+        modeles = generer_corpus(dossier, (2, 8), formats=("pdf", "docx"))
+        with ServeurOpenAIFactice(latence=args.latence) as serveur:
+            configurer_client(base_url=serveur.base_url, api_key="factice")
+            for taille in args.tailles:
+                fichiers = [modeles[i % len(modeles)] for i in range(taille)]
+                resultats.append(mesurer_export(fichiers, args.concurrence))
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+
+    print(f"Concurrence : {args.concurrence} | latence simulée : {args.latence}s")
+    print(f"\n{'CV':>5} {'1er octet':>10} {'durée':>9} {'pic mémoire':>12} {'archive':>10}")
+    for r in resultats:
+        print(f"{r['cv']:>5} {r['premier_octet_s']:>9.2f}s {r['duree_s']:>8.2f}s "
+              f"{r['pic_memoire_mo']:>9.1f} Mo {r['taille_archive_mo']:>7.1f} Mo")
+        if "archive_valide" in r:
+            print(f"      archive valide : {r['archive_valide']} | manifeste : {r['lignes_manifeste']} lignes")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"parametres": vars(args), "lots": resultats}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
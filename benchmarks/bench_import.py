@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Mesure du temps d'import à froid de cv_process.
+
+Compare l'import paresseux actuel à un import « eager » qui charge les mêmes
+dépendances lourdes que l'ancien module (streamlit, openai, PyMuPDF,
+python-docx, docx2txt). Chaque mesure est faite dans un nouveau processus.
+
+    python -m benchmarks.bench_import --repetitions 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEPENDANCES_LOURDES = ["streamlit", "openai", "fitz", "docx", "docx2txt"]
+
+SCENARIOS = {
+    "cv_process (paresseux)": "import cv_process",
+    "cv_process + dépendances (ancien import)": "; ".join(
+        [f"import {module}" for module in DEPENDANCES_LOURDES] + ["import cv_process"]
+    ),
+    "cv_process + generate_trigramme": "import cv_process; cv_process.generate_trigramme('Cédric', 'Gobert')",
+}
+
+CODE_MESURE = """
+import sys, time
+debut = time.perf_counter()
+{instruction}
+duree = time.perf_counter() - debut
+charges = [m for m in {lourdes!r} if m in sys.modules]
+print(duree, ",".join(charges))
+"""
+
+
+def mesurer(instruction: str, repetitions: int):
+    """Lance l'instruction dans des processus neufs et retourne (durées, modules lourds chargés)."""
+    durees = []
+    charges = ""
+    code = CODE_MESURE.format(instruction=instruction, lourdes=DEPENDANCES_LOURDES)
+    for _ in range(repetitions):
+        sortie = subprocess.run(
+            [sys.executable, "-c", code], cwd=RACINE, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        durees.append(float(sortie[0]))
+        charges = sortie[1] if len(sortie) > 1 else "-"
+    return durees, charges
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Temps d'import à froid de cv_process.")
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    # Préchauffage du cache disque / bytecode
+    mesurer(SCENARIOS["cv_process + dépendances (ancien import)"], 1)
+
+    resultats = {}
+    print(f"{'Scénario':<45} {'médiane':>10} {'min':>10}  modules lourds chargés")
+    for nom, instruction in SCENARIOS.items():
+        durees, charges = mesurer(instruction, args.repetitions)
+        resultats[nom] = statistics.median(durees)
+        print(f"{nom:<45} {resultats[nom] * 1000:>8.0f}ms {min(durees) * 1000:>8.0f}ms  {charges}")
+
+    paresseux = resultats["cv_process (paresseux)"]
+    eager = resultats["cv_process + dépendances (ancien import)"]
+    print(f"\nGain au démarrage : {(eager - paresseux) * 1000:.0f}ms ({eager / paresseux:.1f}x plus rapide)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
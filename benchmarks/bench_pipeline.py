@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark de bout en bout de la chaîne de conversion, sans appel réel à l'API.
+
+Un corpus de CV synthétiques (PDF et Word) est généré, puis converti par
+cv_batch.convertir_lot contre un serveur OpenAI local (benchmarks.fake_openai)
+dont la latence est configurable. Le rapport donne le débit et les latences
+p50/p95 de chaque étape (extraction du texte, extraction LLM, rendu docx)
+et de la conversion complète.
+
+    python -m benchmarks.bench_pipeline --nombre 40 --concurrence 8 --latence 1.5
+    python -m benchmarks.bench_pipeline --json resultats_bench.json
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.corpus import generer_corpus
+from benchmarks.fake_openai import ServeurOpenAIFactice
+
+
+def percentile(valeurs: List[float], p: float) -> float:
+    """Percentile par la méthode du rang le plus proche (p entre 0 et 100)."""
+    if not valeurs:
+        return 0.0
+    ordonnees = sorted(valeurs)
+    rang = max(1, math.ceil(p / 100 * len(ordonnees)))
+    return ordonnees[rang - 1]
+
+
+def statistiques(valeurs: List[float]) -> Dict[str, float]:
+    return {
+        "n": len(valeurs),
+        "moyenne": statistics.fmean(valeurs) if valeurs else 0.0,
+        "p50": percentile(valeurs, 50),
+        "p95": percentile(valeurs, 95),
+        "max": max(valeurs) if valeurs else 0.0,
+    }
+
+
+def lire_journal(chemin: str) -> List[dict]:
+    with open(chemin, "r", encoding="utf-8") as f:
+        return [json.loads(ligne) for ligne in f if ligne.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de la chaîne de conversion contre un serveur OpenAI local.")
+    parser.add_argument("--nombre", type=int, default=24, help="Nombre de CV convertis")
+    parser.add_argument("--projets", type=int, nargs="+", default=[2, 10, 40], help="Tailles des CV (nombre de projets)")
+    parser.add_argument("--concurrence", type=int, default=8)
+    parser.add_argument("--langue", choices=["fr", "en", "fr+en"], default="fr",
+                        help="Langue de génération (fr+en : extraction unique et deux documents)")
+    parser.add_argument("--latence", type=float, default=1.0, help="Latence simulée du LLM (s)")
+    parser.add_argument("--gigue", type=float, default=0.2, help="Variation aléatoire de la latence (s)")
+    parser.add_argument("--taux-erreur", type=float, default=0.0, help="Probabilité d'erreur 500 du serveur")
+    parser.add_argument("--json", help="Fichier où écrire le rapport au format JSON")
+    args = parser.parse_args(argv)
+
+    # Le cache ferait disparaître les appels LLM dès la deuxième occurrence d'un CV
+    os.environ["CV_CACHE_DESACTIVE"] = "1"
+    dossier = tempfile.mkdtemp(prefix="bench_cv_")
+    journal = os.path.join(dossier, "metriques.jsonl")
+    os.environ["CV_METRICS_JOURNAL"] = journal
+
+    # Imports après la configuration de l'environnement
+    from cv_batch import convertir_lot
+    from cv_process import configurer_client
+
+    try:
+        par_taille = max(1, math.ceil(args.nombre / (2 * len(args.projets))))
+        fichiers = generer_corpus(os.path.join(dossier, "corpus"), args.projets, par_taille=par_taille)[:args.nombre]
+
+        with ServeurOpenAIFactice(latence=args.latence, gigue=args.gigue, taux_erreur=args.taux_erreur) as serveur:
+            configurer_client(base_url=serveur.base_url, api_key="factice")
+            debut = time.perf_counter()
+            resultats = convertir_lot(fichiers, os.path.join(dossier, "sortie"), language=args.langue,
+                                      concurrence=args.concurrence)
+            duree = time.perf_counter() - debut
+
+        mesures = lire_journal(journal)
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+
+    etapes = sorted({nom for m in mesures for nom in m["etapes"]})
+    rapport = {
+        "parametres": vars(args),
+        "duree_s": duree,
+        "reussis": sum(r.statut == "ok" for r in resultats),
+        "echecs": sum(r.statut != "ok" for r in resultats),
+        "cv_par_minute": len(resultats) / duree * 60 if duree else 0.0,
+        "etapes": {nom: statistiques([m["etapes"][nom] for m in mesures if nom in m["etapes"]]) for nom in etapes},
+        "conversion": statistiques([m["duree_totale"] for m in mesures]),
+        "tokens_prompt": sum(m["tokens_prompt"] for m in mesures),
+        "tokens_completion": sum(m["tokens_completion"] for m in mesures),
+    }
+
+    print(f"{len(resultats)} CV en {duree:.2f}s - débit : {rapport['cv_par_minute']:.1f} CV/min "
+          f"(concurrence {args.concurrence}, latence LLM simulée {args.latence}s)")
+    print(f"Réussis : {rapport['reussis']} | Échecs : {rapport['echecs']}")
+    print(f"\n{'Étape':<20} {'n':>5} {'moyenne':>10} {'p50':>10} {'p95':>10} {'max':>10}")
+    for nom, stats in list(rapport["etapes"].items()) + [("conversion", rapport["conversion"])]:
+        print(f"{nom:<20} {stats['n']:>5} " + " ".join(
+            f"{stats[cle] * 1000:>8.0f}ms" for cle in ("moyenne", "p50", "p95", "max")
+        ))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+    return 0 if rapport["echecs"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
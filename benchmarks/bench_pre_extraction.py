@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la pré-extraction locale (cv_pre_extraction), contre le serveur OpenAI local.
+
+1. Sur le corpus synthétique : champs remplis localement, exactitude par rapport
+   au contenu connu des CV générés et durée de la passe de règles.
+2. Le même corpus est extrait sans puis avec pré-extraction. Le rapport donne
+   les tokens de sortie par CV et la latence d'extraction p50/p95. Le serveur
+   simule une latence proportionnelle aux tokens générés (--latence-par-token),
+   qui domine la latence réelle d'une extraction structurée.
+
+    python -m benchmarks.bench_pre_extraction --nombre 20 --latence 0.5 --latence-par-token 0.01
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_pipeline import statistiques
+from benchmarks.corpus import generer_corpus
+from benchmarks.fake_openai import ServeurOpenAIFactice
+
+# Valeurs attendues pour les CV du corpus (benchmarks.corpus.lignes_cv). L'âge
+# (« ... - 42 ans », sans « Âge : ») est volontairement laissé au LLM.
+ATTENDU = {
+    "Diplômes": [
+        {"ANNEE_DIPLOME": "2004", "INTITULE_DIPLOME": "Diplôme d'ingénieur, École Centrale"},
+        {"ANNEE_DIPLOME": "2001", "INTITULE_DIPLOME": "DUT Génie civil"},
+    ],
+    "Langues": [{"LANGUE": "Anglais", "NIVEAU": "Courant"}, {"LANGUE": "Espagnol", "NIVEAU": "Intermédiaire"}],
+    "Formations_complémentaires": [
+        {"ANNEE_FORMATION": "2015", "INTITULE_FORMATION": "Habilitation électrique B1V"},
+        {"ANNEE_FORMATION": "2012", "INTITULE_FORMATION": "Sauveteur secouriste du travail"},
+    ],
+}
+TELEPHONE_ATTENDU = "06.12.34.56.78"
+
+
+def evaluer_regles(textes, repetitions: int = 5) -> dict:
+    """
+    Champs remplis, exactitude et durée de la pré-extraction sur le corpus. Comme
+    dans extract_info_from_cv, les règles s'appliquent au texte compacté (sans
+    en-têtes ni pieds de page répétés).
+    """
+    from cv_compaction import compacter_texte
+    from cv_pre_extraction import extraire_telephone, pre_extraire
+
+    remplis = {champ: 0 for champ in ATTENDU}
+    exacts = {champ: 0 for champ in ATTENDU}
+    durees = []
+    for texte in (compacter_texte(texte).texte for texte in textes):
+        debut = time.perf_counter()
+        for _ in range(repetitions):
+            pre = pre_extraire(texte)
+        durees.append((time.perf_counter() - debut) / repetitions)
+        for champ, valeur in pre.champs.items():
+            if champ not in ATTENDU:
+                continue
+            remplis[champ] += 1
+            exacts[champ] += valeur == ATTENDU[champ]
+    return {
+        "remplis": remplis,
+        "exacts": exacts,
+        "telephones_exacts": sum(extraire_telephone(texte) == TELEPHONE_ATTENDU for texte in textes),
+        "duree": statistiques(durees),
+    }
+
+
+def _extraire_corpus(textes, pre_extraction: bool, concurrence: int):
+    """Extrait chaque texte et retourne les mesures de conversion."""
+    from cv_metrics import mesurer_conversion
+    from cv_process import extract_info_from_cv
+
+    def extraire(i_texte):
+        i, texte = i_texte
+        with mesurer_conversion(source=f"cv_{i}") as mesure:
+            extract_info_from_cv(texte, use_cache=False, pre_extraction=pre_extraction)
+        return mesure
+
+    with ThreadPoolExecutor(max_workers=concurrence) as executor:
+        return list(executor.map(extraire, enumerate(textes)))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de la pré-extraction locale.")
+    parser.add_argument("--nombre", type=int, default=20, help="Nombre de CV extraits")
+    parser.add_argument("--projets", type=int, nargs="+", default=[2, 8, 20], help="Tailles des CV (nombre de projets)")
+    parser.add_argument("--concurrence", type=int, default=8)
+    parser.add_argument("--latence", type=float, default=0.5, help="Latence fixe simulée d'un appel (s)")
+    parser.add_argument("--latence-par-token", type=float, default=0.01,
+                        help="Latence simulée par token de sortie (s)")
+    parser.add_argument("--json", help="Fichier où écrire le rapport au format JSON")
+    args = parser.parse_args(argv)
+
+    from cv_process import configurer_client, extract_text_from_file
+
+    dossier = tempfile.mkdtemp(prefix="bench_pre_extraction_")
+    try:
+        fichiers = generer_corpus(dossier, args.projets, formats=("pdf", "docx"),
+                                  par_taille=max(1, -(-args.nombre // (2 * len(args.projets)))))[:args.nombre]
+        textes = [extract_text_from_file(f) for f in fichiers]
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+
+    regles = evaluer_regles(textes)
+
+    serveur = ServeurOpenAIFactice(latence=args.latence, latence_par_token=args.latence_par_token)
+    resultats = {}
+    with serveur:
+        configurer_client(base_url=serveur.base_url, api_key="factice")
+        for mode, pre_extraction in (("llm_seul", False), ("pre_extraction", True)):
+            mesures = _extraire_corpus(textes, pre_extraction, args.concurrence)
+            resultats[mode] = {
+                "extraction": statistiques([m.etapes["extraction_llm"] for m in mesures]),
+                "tokens_completion": statistiques([m.tokens_completion for m in mesures]),
+                "pre_extraction": statistiques([m.etapes.get("pre_extraction", 0.0) for m in mesures]),
+            }
+
+    avant, apres = (resultats[mode]["tokens_completion"]["moyenne"] for mode in ("llm_seul", "pre_extraction"))
+    rapport = {
+        "parametres": vars(args),
+        "regles": regles,
+        "reduction_tokens_sortie": 1 - apres / avant if avant else 0.0,
+        "latence_economisee_moyenne_s": (resultats["llm_seul"]["extraction"]["moyenne"]
+                                         - resultats["pre_extraction"]["extraction"]["moyenne"]),
+        "modes": resultats,
+    }
+
+    print(f"{len(textes)} CV | latence simulée : {args.latence}s + {args.latence_par_token * 1000:.0f}ms/token")
+    print(f"Pré-extraction : {regles['duree']['p50'] * 1000:.2f}ms par CV (p50)")
+    for champ in ATTENDU:
+        print(f"  {champ:<28} rempli {regles['remplis'][champ]:>3}/{len(textes)}, "
+              f"exact {regles['exacts'][champ]:>3}/{regles['remplis'][champ]}")
+    print(f"  {'TELEPHONE (+33)':<28} exact {regles['telephones_exacts']:>3}/{len(textes)}")
+    print(f"\n{'Mode':<16} {'tokens sortie':>14} {'moyenne':>10} {'p50':>10} {'p95':>10}")
+    for mode, r in resultats.items():
+        stats = r["extraction"]
+        print(f"{mode:<16} {r['tokens_completion']['moyenne']:>14.0f} " + " ".join(
+            f"{stats[cle] * 1000:>8.0f}ms" for cle in ("moyenne", "p50", "p95")
+        ))
+    print(f"\nTokens de sortie : -{rapport['reduction_tokens_sortie']:.1%} | "
+          f"latence économisée par CV : {rapport['latence_economisee_moyenne_s'] * 1000:.0f}ms en moyenne")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
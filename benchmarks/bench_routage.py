@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark du routage par niveaux (modèle rapide d'abord, escalade vers le
+grand modèle sur échec des contrôles), contre le serveur OpenAI local.
+
+Le même corpus est extrait deux fois, sans puis avec routage. Le rapport donne
+le taux d'escalade (par section), la latence d'extraction p50/p95 de chaque mode
+et la latence économisée. Les latences des modèles et la part de sorties
+défectueuses du modèle rapide se règlent en ligne de commande pour reproduire
+le trafic réel.
+
+    python -m benchmarks.bench_routage --nombre 30 --latence-grand 3 --latence-rapide 0.8 --defauts 0.15
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_pipeline import statistiques
+from benchmarks.corpus import generer_corpus
+from benchmarks.fake_openai import ServeurOpenAIFactice
+
+
+def _extraire_corpus(textes, routage: bool, concurrence: int):
+    """Extrait chaque texte et retourne les mesures de conversion."""
+    from cv_metrics import mesurer_conversion
+    from cv_process import extract_info_from_cv
+
+    def extraire(i_texte):
+        i, texte = i_texte
+        with mesurer_conversion(source=f"cv_{i}") as mesure:
+            extract_info_from_cv(texte, use_cache=False, routage=routage)
+        return mesure
+
+    with ThreadPoolExecutor(max_workers=concurrence) as executor:
+        return list(executor.map(extraire, enumerate(textes)))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark du routage par niveaux de modèles.")
+    parser.add_argument("--nombre", type=int, default=20, help="Nombre de CV extraits")
+    parser.add_argument("--projets", type=int, nargs="+", default=[2, 8, 20], help="Tailles des CV (nombre de projets)")
+    parser.add_argument("--concurrence", type=int, default=8)
+    parser.add_argument("--latence-grand", type=float, default=2.0, help="Latence simulée du grand modèle (s)")
+    parser.add_argument("--latence-rapide", type=float, default=0.6, help="Latence simulée du modèle rapide (s)")
+    parser.add_argument("--defauts", type=float, default=0.2,
+                        help="Part des sorties du modèle rapide qui échouent aux contrôles")
+    parser.add_argument("--json", help="Fichier où écrire le rapport au format JSON")
+    args = parser.parse_args(argv)
+
+    from cv_process import MODELE_LLM, MODELE_RAPIDE, configurer_client, extract_text_from_file
+
+    dossier = tempfile.mkdtemp(prefix="bench_routage_")
+    try:
+        fichiers = generer_corpus(dossier, args.projets, formats=("pdf",),
+                                  par_taille=max(1, -(-args.nombre // len(args.projets))))[:args.nombre]
+        textes = [extract_text_from_file(f) for f in fichiers]
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+
+    serveur = ServeurOpenAIFactice(
+        latences_modeles={MODELE_LLM: args.latence_grand, MODELE_RAPIDE: args.latence_rapide},
+        defauts_modeles={MODELE_RAPIDE: args.defauts},
+    )
+    resultats = {}
+    with serveur:
+        configurer_client(base_url=serveur.base_url, api_key="factice")
+        for mode, routage in (("direct", False), ("routage", True)):
+            debut = time.perf_counter()
+            mesures = _extraire_corpus(textes, routage, args.concurrence)
+            resultats[mode] = {
+                "duree_s": time.perf_counter() - debut,
+                "extraction": statistiques([m.etapes["extraction_llm"] for m in mesures]),
+                "appels_llm": sum(m.appels_llm for m in mesures),
+                "escalades": Counter(m.escalade for m in mesures if m.escalade),
+            }
+
+    escalades = resultats["routage"]["escalades"]
+    total = sum(escalades.values())
+    rapport = {
+        "parametres": vars(args),
+        "modeles": {"rapide": MODELE_RAPIDE, "grand": MODELE_LLM},
+        "taux_escalade": (total - escalades.get("aucune", 0)) / total if total else 0.0,
+        "escalades": dict(escalades),
+        "latence_economisee_moyenne_s": (resultats["direct"]["extraction"]["moyenne"]
+                                         - resultats["routage"]["extraction"]["moyenne"]),
+        "modes": {mode: {**r, "escalades": dict(r["escalades"])} for mode, r in resultats.items()},
+    }
+
+    print(f"{len(textes)} CV | rapide : {MODELE_RAPIDE} ({args.latence_rapide}s) | "
+          f"grand : {MODELE_LLM} ({args.latence_grand}s) | défauts du rapide : {args.defauts:.0%}")
+    print(f"Taux d'escalade : {rapport['taux_escalade']:.1%} {dict(escalades)}")
+    print(f"\n{'Mode':<10} {'appels':>7} {'moyenne':>10} {'p50':>10} {'p95':>10}")
+    for mode, r in resultats.items():
+        stats = r["extraction"]
+        print(f"{mode:<10} {r['appels_llm']:>7} " + " ".join(
+            f"{stats[cle] * 1000:>8.0f}ms" for cle in ("moyenne", "p50", "p95")
+        ))
+    print(f"\nLatence économisée par CV : {rapport['latence_economisee_moyenne_s'] * 1000:.0f}ms en moyenne")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la couche de transport (cv_transport) contre le serveur OpenAI
+local, qui injecte des erreurs et des réponses bloquées (queue de latence).
+
+Le même lot d'extractions est exécuté dans trois modes :
+    sdk : client OpenAI par défaut (nouvelles tentatives du SDK, délai de 600s),
+          sans échéance ni couverture, comme avant la couche de transport ;
+    transport : échéances, délai par tentative et nouvelles tentatives à gigue ;
+    couverture : transport + requêtes couvertes au p95 des latences observées.
+
+Le rapport donne, par mode, les latences p50/p95/p99/max d'une extraction, les
+échecs, le nombre de requêtes reçues par le serveur (surcoût de la couverture)
+et le nombre de connexions TCP ouvertes (réutilisation du pool).
+
+    python -m benchmarks.bench_transport --nombre 200 --lenteur 0.05 --latence-lente 10 --erreurs 0.05
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_pipeline import percentile, statistiques
+from benchmarks.corpus import lignes_cv
+from benchmarks.fake_openai import ServeurOpenAIFactice
+
+
+def _extraire_lot(texte: str, nombre: int, concurrence: int):
+    """Extrait `nombre` fois le texte ; retourne les durées et les mesures (ou erreurs)."""
+    from cv_metrics import mesurer_conversion
+    from cv_process import extract_info_from_cv
+
+    def extraire(_):
+        debut = time.perf_counter()
+        with mesurer_conversion() as mesure:
+            try:
+                extract_info_from_cv(texte, use_cache=False)
+            except Exception as e:
+                mesure.marquer_erreur(e)
+        return time.perf_counter() - debut, mesure
+
+    with ThreadPoolExecutor(max_workers=concurrence) as executor:
+        return list(executor.map(extraire, range(nombre)))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de la couche de transport.")
+    parser.add_argument("--nombre", type=int, default=200, help="Nombre d'extractions par mode")
+    parser.add_argument("--concurrence", type=int, default=8)
+    parser.add_argument("--latence", type=float, default=0.3, help="Latence normale d'une réponse (s)")
+    parser.add_argument("--gigue", type=float, default=0.1)
+    parser.add_argument("--lenteur", type=float, default=0.05, help="Part des réponses bloquées")
+    parser.add_argument("--latence-lente", type=float, default=10.0, help="Durée d'une réponse bloquée (s)")
+    parser.add_argument("--erreurs", type=float, default=0.05, help="Part des réponses en erreur 500")
+    parser.add_argument("--delai-tentative", type=float, default=3.0,
+                        help="Durée maximale d'une tentative en mode transport (s)")
+    parser.add_argument("--json", help="Fichier où écrire le rapport au format JSON")
+    args = parser.parse_args(argv)
+
+    from openai import OpenAI
+
+    from cv_process import configurer_client, configurer_transport
+    from cv_transport import ConfigTransport
+
+    texte = "\n".join(lignes_cv(3))
+    modes = {
+        "sdk": ConfigTransport(max_tentatives=1, delai_appel=600, delai_tentative=600),
+        "transport": ConfigTransport(delai_appel=60, delai_tentative=args.delai_tentative, delai_base=0.2),
+        "couverture": ConfigTransport(delai_appel=60, delai_tentative=args.delai_tentative, delai_base=0.2,
+                                      couverture=True, delai_couverture_min=0.2),
+    }
+    resultats = {}
+    for mode, config in modes.items():
+        serveur = ServeurOpenAIFactice(latence=args.latence, gigue=args.gigue, taux_erreur=args.erreurs,
+                                       taux_lenteur=args.lenteur, latence_lente=args.latence_lente)
+        with serveur:
+            configurer_transport(config)
+            if mode == "sdk":
+                configurer_client(OpenAI(base_url=serveur.base_url, api_key="factice"))
+            else:
+                configurer_client(base_url=serveur.base_url, api_key="factice")
+            debut = time.perf_counter()
+            lot = _extraire_lot(texte, args.nombre, args.concurrence)
+            duree = time.perf_counter() - debut
+            durees = [d for d, _ in lot]
+            mesures = [m for _, m in lot]
+            resultats[mode] = {
+                "duree_s": duree,
+                "latence": {**statistiques(durees), "p99": percentile(durees, 99)},
+                "echecs": sum(m.statut == "erreur" for m in mesures),
+                "requetes_serveur": serveur.requetes,
+                "connexions": serveur.connexions,
+                "couvertures": sum(m.transport.get("couverture", 0) for m in mesures),
+                "couvertures_gagnantes": sum(m.transport.get("couverture_gagnante", 0) for m in mesures),
+                "tentatives_supplementaires": sum(m.tentatives_supplementaires for m in mesures),
+            }
+
+    print(f"{args.nombre} extractions par mode | latence {args.latence}s ± {args.gigue}s | "
+          f"bloquées : {args.lenteur:.0%} ({args.latence_lente}s) | erreurs : {args.erreurs:.0%}")
+    print(f"\n{'Mode':<11} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'échecs':>7} {'requêtes':>9} "
+          f"{'connexions':>11} {'couvertures':>12}")
+    for mode, r in resultats.items():
+        lat = r["latence"]
+        print(f"{mode:<11} " + " ".join(f"{lat[cle]:>7.2f}s" for cle in ("p50", "p95", "p99", "max"))
+              + f" {r['echecs']:>7} {r['requetes_serveur']:>9} {r['connexions']:>11} "
+                f"{r['couvertures']:>5} ({r['couvertures_gagnantes']} gagnées)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"parametres": vars(args), "modes": resultats}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""
+Générateur de CV synthétiques (PDF et Word) de tailles variables.
+
+Les CV reprennent la structure des CV reçus en réponse aux appels d'offres :
+en-tête et pied de page répétés sur chaque page, coordonnées, compétences,
+missions datées avec réalisations, diplômes, langues et formations.
+
+    python -m benchmarks.corpus --sortie corpus_bench --projets 2 10 40
+"""
+import argparse
+import io
+import os
+import random
+import sys
+from typing import List
+
+CLIENTS = ["TotalEnergies", "Vinci Construction", "Bouygues Bâtiment", "EDF", "Air Liquide",
+           "Eiffage", "Orano", "SNCF Réseau", "Sanofi", "Saint-Gobain"]
+POSTES = ["Chef de projet", "Ingénieur travaux", "Responsable HSE", "Planificateur",
+          "Ingénieur méthodes", "Directeur de projet"]
+REALISATIONS = [
+    "Pilotage des sous-traitants et suivi de l'avancement",
+    "Élaboration du planning directeur sous MS Project",
+    "Animation des réunions de chantier hebdomadaires",
+    "Suivi budgétaire et reporting mensuel au client",
+    "Mise en place du plan de prévention HSE",
+    "Rédaction des procédures d'exécution",
+    "Coordination des études d'exécution avec la maîtrise d'œuvre",
+    "Réception des travaux et levée des réserves",
+]
+
+
+def lignes_cv(nb_projets: int, graine: int = 0) -> List[str]:
+    """
+    Produit le texte d'un CV synthétique, ligne par ligne.
+
+    Args:
+        nb_projets: Nombre de missions décrites
+        graine: Graine aléatoire (même graine = même CV)
+    """
+    aleatoire = random.Random(graine)
+    lignes = [
+        "Camille MARTIN",
+        "Ingénieur travaux senior - 42 ans",
+        "camille.martin@example.com | +33 6 12 34 56 78",
+        "",
+        "DOMAINES D'EXPERTISE",
+        "• Étude de constructibilité",
+        "• Management de projet",
+        "• Leadership",
+        "",
+        "SECTEURS",
+        "• Bâtiment",
+        "• Industrie",
+        "• Oil & Gas",
+        "",
+        "OUTILS",
+        "• Pack Office, MS Project, Navisworks",
+        "",
+        "EXPÉRIENCES PROFESSIONNELLES",
+    ]
+    annee = 2024
+    for i in range(nb_projets):
+        duree = aleatoire.randint(1, 3)
+        lignes += [
+            "",
+            f"{aleatoire.choice(CLIENTS)}    {aleatoire.randint(1, 12):02d}/{annee - duree} - "
+            f"{aleatoire.randint(1, 12):02d}/{annee}",
+            aleatoire.choice(POSTES),
+            f"Projet {i + 1} : construction d'une unité de production ({aleatoire.randint(5, 300)} M€)",
+            f"Effectif : {aleatoire.randint(10, 400)} personnes",
+            "Réalisations :",
+        ]
+        lignes += [f"• {r}" for r in aleatoire.sample(REALISATIONS, aleatoire.randint(2, 6))]
+        annee -= duree
+    lignes += [
+        "",
+        "DIPLÔMES",
+        "2004    Diplôme d'ingénieur, École Centrale",
+        "2001    DUT Génie civil",
+        "",
+        "LANGUES",
+        "Anglais    Courant",
+        "Espagnol    Intermédiaire",
+        "",
+        "FORMATIONS COMPLÉMENTAIRES",
+        "2015    Habilitation électrique B1V",
+        "2012    Sauveteur secouriste du travail",
+    ]
+    return lignes
+
+
+def generer_pdf(nb_projets: int, graine: int = 0, lignes_par_page: int = 45) -> bytes:
+    """Génère un CV PDF, avec en-tête et pied de page sur chaque page."""
+    import fitz  # PyMuPDF
+
+    lignes = lignes_cv(nb_projets, graine)
+    doc = fitz.open()
+    pages = [lignes[i:i + lignes_par_page] for i in range(0, len(lignes), lignes_par_page)]
+    for numero, contenu in enumerate(pages, start=1):
+        page = doc.new_page()
+        page.insert_text((50, 30), "Camille MARTIN - Curriculum Vitae", fontsize=8)
+        page.insert_text((50, 60), "\n".join(contenu), fontsize=9)
+        page.insert_text((50, 820), f"Page {numero} / {len(pages)}", fontsize=8)
+    contenu = doc.tobytes()
+    doc.close()
+    return contenu
+
+
+ZONE_TEXTE_XML = (
+    '<w:r xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    ' xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+    ' xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"'
+    ' xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+    ' xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape"'
+    ' xmlns:v="urn:schemas-microsoft-com:vml">'
+    '<mc:AlternateContent><mc:Choice Requires="wps"><w:drawing>'
+    '<wp:inline distT="0" distB="0" distL="0" distR="0"><wp:extent cx="5400000" cy="900000"/>'
+    '<wp:docPr id="1" name="Zone de texte 1"/><a:graphic>'
+    '<a:graphicData uri="http://schemas.microsoft.com/office/word/2010/wordprocessingShape">'
+    '<wps:wsp><wps:cNvSpPr txBox="1"/><wps:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="5400000" cy="900000"/>'
+    '</a:xfrm><a:prstGeom prst="rect"><a:avLst/></a:prstGeom></wps:spPr>'
+    '<wps:txbx><w:txbxContent>{paragraphes}</w:txbxContent></wps:txbx><wps:bodyPr/></wps:wsp>'
+    '</a:graphicData></a:graphic></wp:inline></w:drawing></mc:Choice>'
+    '<mc:Fallback><w:pict><v:shape style="width:425pt;height:71pt"><v:textbox>'
+    '<w:txbxContent>{paragraphes}</w:txbxContent></v:textbox></v:shape></w:pict></mc:Fallback>'
+    '</mc:AlternateContent></w:r>'
+)
+
+
+def _ajouter_zone_texte(doc, lignes: List[str]) -> None:
+    """Ajoute une zone de texte (avec sa variante VML de compatibilité) contenant lignes."""
+    from xml.sax.saxutils import escape
+    from docx.oxml import parse_xml
+
+    paragraphes = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(l)}</w:t></w:r></w:p>" for l in lignes)
+    doc.add_paragraph()._p.append(parse_xml(ZONE_TEXTE_XML.format(paragraphes=paragraphes)))
+
+
+def generer_docx(nb_projets: int, graine: int = 0, mise_en_page: str = "paragraphes") -> bytes:
+    """
+    Génère un CV Word.
+
+    Args:
+        mise_en_page: "paragraphes" (une ligne par paragraphe) ou "tableau" (mise en
+            page de designer : identité dans une zone de texte, compétences et
+            missions dans un tableau à deux colonnes, diplômes et langues en tableaux)
+    """
+    from docx import Document
+
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].text = "Camille MARTIN - Curriculum Vitae"
+    lignes = lignes_cv(nb_projets, graine)
+    if mise_en_page == "paragraphes":
+        for ligne in lignes:
+            doc.add_paragraph(ligne)
+    else:
+        debut_missions = lignes.index("EXPÉRIENCES PROFESSIONNELLES")
+        debut_diplomes = lignes.index("DIPLÔMES")
+        _ajouter_zone_texte(doc, lignes[:3])
+
+        colonnes = doc.add_table(rows=1, cols=2).rows[0].cells
+        for cellule, contenu in zip(colonnes, (lignes[4:debut_missions], lignes[debut_missions:debut_diplomes])):
+            cellule.paragraphs[0].text = contenu[0]
+            for ligne in contenu[1:]:
+                cellule.add_paragraph(ligne)
+
+        for ligne in lignes[debut_diplomes:]:
+            if "    " not in ligne:
+                doc.add_paragraph(ligne)
+                continue
+            # Une ligne "année    intitulé" devient une ligne de tableau à deux cellules
+            if not doc.element.body[-2].tag.endswith("}tbl"):
+                doc.add_table(rows=0, cols=2)
+            cellules = doc.tables[-1].add_row().cells
+            for cellule, valeur in zip(cellules, ligne.split("    ", 1)):
+                cellule.text = valeur
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def generer_corpus(dossier: str, tailles=(2, 10, 40), formats=("pdf", "docx"), par_taille: int = 1) -> List[str]:
+    """
+    Écrit un corpus de CV synthétiques dans un dossier.
+
+    Args:
+        dossier: Dossier de destination
+        tailles: Nombres de projets des CV générés
+        formats: Formats générés ("pdf", "docx")
+        par_taille: Nombre de CV par couple (taille, format)
+
+    Returns:
+        Chemins des fichiers générés
+    """
+    os.makedirs(dossier, exist_ok=True)
+    generateurs = {"pdf": generer_pdf, "docx": generer_docx}
+    chemins = []
+    for nb_projets in tailles:
+        for format_ in formats:
+            for i in range(par_taille):
+                chemin = os.path.join(dossier, f"cv_{nb_projets:03d}_projets_{i}.{format_}")
+                with open(chemin, "wb") as f:
+                    f.write(generateurs[format_](nb_projets, graine=nb_projets * 1000 + i))
+                chemins.append(chemin)
+    return chemins
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Génère un corpus de CV synthétiques.")
+    parser.add_argument("--sortie", default="corpus_bench")
+    parser.add_argument("--projets", type=int, nargs="+", default=[2, 10, 40])
+    parser.add_argument("--formats", nargs="+", choices=["pdf", "docx"], default=["pdf", "docx"])
+    parser.add_argument("--par-taille", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    chemins = generer_corpus(args.sortie, args.projets, args.formats, args.par_taille)
+    print(f"{len(chemins)} CV générés dans {args.sortie}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
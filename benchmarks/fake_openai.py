@@ -0,0 +1,346 @@
+"""
+Serveur local imitant l'API OpenAI (chat completions, et fichiers + batches
+pour le mode de conversion en masse), pour mesurer les performances sans
+appel réel ni coût.
+
+La réponse est générée à partir du schéma JSON envoyé dans response_format :
+elle est donc valide pour CVInfo comme pour les schémas réduits (profil,
+projets d'un morceau...). La latence et le taux d'erreur sont configurables.
+
+    with ServeurOpenAIFactice(latence=0.8) as serveur:
+        configurer_client(base_url=serveur.base_url, api_key="factice")
+        ...
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+def _valeur_texte(cle: str, indice: int) -> str:
+    """Valeur plausible pour un champ texte, d'après le nom du champ."""
+    cle = cle.upper()
+    if "DATE" in cle:
+        return f"{(indice % 12) + 1:02d}/{2010 + indice % 14}"
+    if "ANNEE" in cle:
+        return str(2000 + indice % 24)
+    if cle == "AGE":
+        return "42"
+    if cle == "PRENOM":
+        return "Camille"
+    if cle == "NOM":
+        return "Martin"
+    if cle == "NIVEAU":
+        return "Courant"
+    if cle == "LANGUE":
+        return ["Anglais", "Espagnol", "Allemand"][indice % 3]
+    return f"{cle.replace('_', ' ').capitalize()} {indice + 1}"
+
+
+def generer_instance(schema: dict, defs: Optional[dict] = None, cle: str = "", indice: int = 0,
+                     taille_listes: int = 3):
+    """
+    Génère une valeur conforme à un schéma JSON (sous-ensemble utilisé par les
+    sorties structurées OpenAI : object, array, string, number, anyOf, $ref).
+
+    Args:
+        schema: Schéma JSON
+        defs: Définitions ($defs) du schéma racine
+        cle: Nom du champ en cours de génération
+        indice: Position dans la liste parente
+        taille_listes: Nombre d'éléments générés pour chaque liste
+    """
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return generer_instance(defs[schema["$ref"].split("/")[-1]], defs, cle, indice, taille_listes)
+    if "anyOf" in schema:
+        non_nuls = [s for s in schema["anyOf"] if s.get("type") != "null"]
+        return generer_instance(non_nuls[0], defs, cle, indice, taille_listes) if non_nuls else None
+
+    type_ = schema.get("type")
+    if isinstance(type_, list):
+        type_ = next((t for t in type_ if t != "null"), "null")
+    if type_ == "object":
+        return {
+            nom: generer_instance(sous_schema, defs, nom, indice, taille_listes)
+            for nom, sous_schema in schema.get("properties", {}).items()
+        }
+    if type_ == "array":
+        return [generer_instance(schema.get("items", {}), defs, cle, i, taille_listes) for i in range(taille_listes)]
+    if type_ == "integer":
+        return indice
+    if type_ == "number":
+        return float(indice)
+    if type_ == "boolean":
+        return True
+    if type_ == "null":
+        return None
+    return _valeur_texte(cle, indice)
+
+
+def _estimer_tokens(texte: str) -> int:
+    return max(1, len(texte) // 4)
+
+
+class _Gestionnaire(BaseHTTPRequestHandler):
+    serveur_factice: "ServeurOpenAIFactice"
+    # Connexions keep-alive, comme l'API réelle : le pool du client est réutilisé
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.serveur_factice._lock:
+            self.serveur_factice.connexions += 1
+
+    def log_message(self, format, *args):
+        # Pas de journal HTTP sur la sortie standard pendant les benchmarks
+        pass
+
+    def _repondre(self, statut: int, corps: dict, en_tetes: Optional[dict] = None):
+        contenu = json.dumps(corps, ensure_ascii=False).encode("utf-8")
+        self.send_response(statut)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(contenu)))
+        for nom, valeur in (en_tetes or {}).items():
+            self.send_header(nom, valeur)
+        self.end_headers()
+        try:
+            self.wfile.write(contenu)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client parti entre-temps (délai dépassé, requête couverte perdante)
+            self.close_connection = True
+
+    def _lire_json(self) -> dict:
+        longueur = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(longueur) or b"{}")
+
+    def _repondre_octets(self, contenu: bytes):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(contenu)))
+        self.end_headers()
+        self.wfile.write(contenu)
+
+    def _lire_fichier_multipart(self) -> bytes:
+        """Extrait le contenu du champ "file" d'un envoi multipart/form-data."""
+        from email.parser import BytesParser
+        from email.policy import HTTP
+
+        longueur = int(self.headers.get("Content-Length") or 0)
+        entete = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode()
+        message = BytesParser(policy=HTTP).parsebytes(entete + self.rfile.read(longueur))
+        for partie in message.iter_parts():
+            if partie.get_param("name", header="content-disposition") == "file":
+                return partie.get_payload(decode=True)
+        return b""
+
+    def do_GET(self):
+        serveur = self.serveur_factice
+        chemin = self.path.rstrip("/")
+        correspondance = re.search(r"/batches/([^/]+)$", chemin)
+        if correspondance and correspondance.group(1) in serveur.batches:
+            self._repondre(200, serveur.batches[correspondance.group(1)])
+            return
+        correspondance = re.search(r"/files/([^/]+)/content$", chemin)
+        if correspondance and correspondance.group(1) in serveur.fichiers:
+            self._repondre_octets(serveur.fichiers[correspondance.group(1)])
+            return
+        self._repondre(404, {"error": {"message": f"Route inconnue : {self.path}"}})
+
+    def do_POST(self):
+        serveur = self.serveur_factice
+        chemin = self.path.rstrip("/")
+        if chemin.endswith("/files"):
+            self._repondre(200, serveur.enregistrer_fichier(self._lire_fichier_multipart()))
+            return
+        if chemin.endswith("/batches"):
+            self._repondre(200, serveur.creer_batch(self._lire_json()))
+            return
+        if chemin.endswith("/chat/completions"):
+            requete = self._lire_json()
+            serveur.attendre(requete.get("model"))
+            erreur = serveur.tirer_erreur()
+            if erreur:
+                self._repondre(erreur, {"error": {"message": "Erreur injectée", "type": "server_error", "code": None}},
+                               {"retry-after": "0"} if erreur == 429 else None)
+                return
+            self._repondre(200, serveur.completion(requete))
+            return
+        self._repondre(404, {"error": {"message": f"Route inconnue : {self.path}"}})
+
+
+class ServeurOpenAIFactice:
+    """
+    Serveur HTTP local compatible avec client.chat.completions.parse, client.files
+    et client.batches (traitement simulé des batches en arrière-plan).
+
+    Args:
+        latence: Latence moyenne d'une réponse, en secondes
+        gigue: Écart maximal (en secondes) ajouté ou retiré aléatoirement à la latence
+        taux_erreur: Probabilité de répondre par une erreur HTTP
+        statut_erreur: Code HTTP des erreurs injectées (500, 429...)
+        taille_listes: Nombre d'éléments générés dans chaque liste du schéma
+        port: Port d'écoute (0 = port libre choisi par le système)
+        latences_modeles: Latence propre à certains modèles ({"gpt-5-mini": 0.4})
+        defauts_modeles: Probabilité, par modèle, de renvoyer des réalisations vides
+            (sortie qui échoue aux contrôles du routage par niveaux)
+        latence_par_token: Latence ajoutée par token de sortie, en secondes (la
+            génération domine la latence réelle d'une extraction)
+        taux_lenteur: Probabilité qu'une réponse soit bloquée (queue de latence)
+        latence_lente: Latence d'une réponse bloquée, en secondes
+    """
+
+    def __init__(self, latence: float = 0.0, gigue: float = 0.0, taux_erreur: float = 0.0,
+                 statut_erreur: int = 500, taille_listes: int = 3, port: int = 0,
+                 latences_modeles: Optional[dict] = None, defauts_modeles: Optional[dict] = None,
+                 latence_par_token: float = 0.0, taux_lenteur: float = 0.0, latence_lente: float = 0.0):
+        self.latence = latence
+        self.taux_lenteur = taux_lenteur
+        self.latence_lente = latence_lente
+        self.latence_par_token = latence_par_token
+        self.latences_modeles = latences_modeles or {}
+        self.defauts_modeles = defauts_modeles or {}
+        self.gigue = gigue
+        self.taux_erreur = taux_erreur
+        self.statut_erreur = statut_erreur
+        self.taille_listes = taille_listes
+        self.requetes = 0
+        self.connexions = 0
+        self.fichiers = {}
+        self.batches = {}
+        self._lock = threading.Lock()
+        gestionnaire = type("Gestionnaire", (_Gestionnaire,), {"serveur_factice": self})
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), gestionnaire)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        hote, port = self._httpd.server_address[:2]
+        return f"http://{hote}:{port}/v1"
+
+    def attendre(self, modele: Optional[str] = None) -> None:
+        """Simule la latence du modèle."""
+        with self._lock:
+            self.requetes += 1
+        delai = self.latences_modeles.get(modele, self.latence) + random.uniform(-self.gigue, self.gigue)
+        if self.taux_lenteur and random.random() < self.taux_lenteur:
+            delai = self.latence_lente
+        if delai > 0:
+            time.sleep(delai)
+
+    def tirer_erreur(self) -> Optional[int]:
+        """Retourne un code d'erreur HTTP à injecter, ou None."""
+        if self.taux_erreur and random.random() < self.taux_erreur:
+            return self.statut_erreur
+        return None
+
+    def completion(self, requete: dict) -> dict:
+        """Construit une réponse de chat completion conforme au schéma demandé."""
+        format_reponse = requete.get("response_format") or {}
+        schema = (format_reponse.get("json_schema") or {}).get("schema")
+        if schema is not None:
+            instance = generer_instance(schema, taille_listes=self.taille_listes)
+            if random.random() < self.defauts_modeles.get(requete.get("model"), 0.0):
+                for projet in instance.get("Projets_effectués", []):
+                    projet["REALISATION"] = []
+            contenu = json.dumps(instance, ensure_ascii=False)
+        else:
+            contenu = "OK"
+        prompt = " ".join(str(m.get("content", "")) for m in requete.get("messages", []))
+        tokens_prompt = _estimer_tokens(prompt)
+        tokens_completion = _estimer_tokens(contenu)
+        if self.latence_par_token:
+            time.sleep(tokens_completion * self.latence_par_token)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": requete.get("model", "gpt-5"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": contenu, "refusal": None},
+            }],
+            "usage": {
+                "prompt_tokens": tokens_prompt,
+                "completion_tokens": tokens_completion,
+                "total_tokens": tokens_prompt + tokens_completion,
+            },
+        }
+
+    def enregistrer_fichier(self, contenu: bytes, purpose: str = "batch") -> dict:
+        """Conserve un fichier envoyé et retourne l'objet File correspondant."""
+        fichier_id = f"file-{uuid.uuid4().hex}"
+        self.fichiers[fichier_id] = contenu
+        return {"id": fichier_id, "object": "file", "bytes": len(contenu), "created_at": int(time.time()),
+                "filename": f"{fichier_id}.jsonl", "purpose": purpose, "status": "processed"}
+
+    def creer_batch(self, parametres: dict) -> dict:
+        """
+        Crée un batch et le traite dans un thread : chaque requête du fichier
+        d'entrée subit la latence et le taux d'erreur configurés, séquentiellement.
+        """
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        lignes = [json.loads(l) for l in self.fichiers[parametres["input_file_id"]].splitlines() if l.strip()]
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": parametres.get("endpoint", "/v1/chat/completions"),
+            "input_file_id": parametres["input_file_id"],
+            "completion_window": parametres.get("completion_window", "24h"),
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "metadata": parametres.get("metadata"),
+            "request_counts": {"total": len(lignes), "completed": 0, "failed": 0},
+        }
+        self.batches[batch_id] = batch
+        threading.Thread(target=self._traiter_batch, args=(batch, lignes), daemon=True).start()
+        return batch
+
+    def _traiter_batch(self, batch: dict, lignes: list) -> None:
+        sorties, erreurs = [], []
+        for requete in lignes:
+            self.attendre(requete["body"].get("model"))
+            erreur = self.tirer_erreur()
+            resultat = {"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": requete["custom_id"]}
+            if erreur:
+                resultat.update(response=None, error={"code": str(erreur), "message": "Erreur injectée"})
+                erreurs.append(resultat)
+                batch["request_counts"]["failed"] += 1
+            else:
+                resultat.update(response={"status_code": 200, "request_id": uuid.uuid4().hex,
+                                          "body": self.completion(requete["body"])}, error=None)
+                sorties.append(resultat)
+                batch["request_counts"]["completed"] += 1
+
+        def jsonl(resultats):
+            return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in resultats).encode("utf-8")
+
+        # Comme l'API : pas de fichier de sortie si toutes les requêtes ont échoué
+        if sorties:
+            batch["output_file_id"] = self.enregistrer_fichier(jsonl(sorties), "batch_output")["id"]
+        if erreurs:
+            batch["error_file_id"] = self.enregistrer_fichier(jsonl(erreurs), "batch_output")["id"]
+        batch["status"] = "completed"
+
+    def demarrer(self) -> "ServeurOpenAIFactice":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def arreter(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "ServeurOpenAIFactice":
+        return self.demarrer()
+
+    def __exit__(self, *exc) -> None:
+        self.arreter()
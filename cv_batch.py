@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Conversion par lot de CV en ligne de commande.
+
+Enchaîne extract_text_from_file -> extract_info_from_cv -> fill_word_template_with_lists
+sur tous les fichiers d'un dossier ou d'un motif glob, avec un niveau de concurrence
+borné, une reprise avec backoff sur les erreurs 429/5xx et une isolation des erreurs
+par fichier.
+
+Exemple :
+    python cv_batch.py "appel_offre/*.pdf" --langue en --sortie resultats --concurrence 8
+    python cv_batch.py "appel_offre/*.pdf" --zip dossiers.zip
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Optional
+
+from cv_metrics import mesure_courante, mesurer_conversion, registre, snapshot_prometheus
+from cv_process import (
+    MODELE_LLM,
+    extract_text_from_file,
+    extract_info_bilingue,
+    extract_info_from_cv,
+    fill_word_template_with_lists,
+    generer_documents,
+    get_template_path,
+)
+from cv_transport import tentatives_max
+
+
+EXTENSIONS_SUPPORTEES = (".pdf", ".docx")
+
+# Langue de génération produisant les deux documents à partir d'une seule extraction
+LANGUE_BILINGUE = "fr+en"
+
+
+@dataclass
+class ResultatConversion:
+    """Résultat de la conversion d'un fichier CV."""
+    source: str
+    sortie: Optional[str] = None
+    sortie_en: Optional[str] = None
+    statut: str = "en_attente"
+    erreur: str = ""
+    tentatives: int = 0
+    duree: float = 0.0
+    tri: str = ""
+    etapes: Dict[str, float] = field(default_factory=dict)
+    # Documents rendus en mémoire ({langue: contenu}), sans chemin de sortie
+    documents: Dict[str, bytes] = field(default_factory=dict, repr=False)
+
+
+def collecter_fichiers(entree: str, recursif: bool = False) -> List[str]:
+    """
+    Liste les CV à traiter à partir d'un dossier ou d'un motif glob.
+
+    Args:
+        entree: Chemin d'un dossier ou motif glob (ex: "cvs/*.pdf")
+        recursif: Parcourir les sous-dossiers lorsque l'entrée est un dossier
+
+    Returns:
+        Liste triée des fichiers PDF/Word trouvés
+    """
+    if os.path.isdir(entree):
+        motif = os.path.join(entree, "**", "*") if recursif else os.path.join(entree, "*")
+    else:
+        motif = entree
+
+    fichiers = [
+        chemin for chemin in glob.glob(motif, recursive=True)
+        if os.path.isfile(chemin) and chemin.lower().endswith(EXTENSIONS_SUPPORTEES)
+        # Ignorer les fichiers verrous Word (~$CV.docx)
+        and not os.path.basename(chemin).startswith("~$")
+    ]
+    return sorted(fichiers)
+
+
+def chemins_sortie(fichiers: List[str], dossier_sortie: str) -> List[str]:
+    """
+    Calcule un nom de fichier de sortie unique par CV (CV.pdf et CV.docx ne doivent
+    pas s'écraser mutuellement).
+    """
+    deja_pris = set()
+    chemins = []
+    for fichier in fichiers:
+        base = os.path.splitext(os.path.basename(fichier))[0]
+        nom = f"{base}_parlym.docx"
+        indice = 2
+        while nom.lower() in deja_pris:
+            nom = f"{base}_{indice}_parlym.docx"
+            indice += 1
+        deja_pris.add(nom.lower())
+        chemins.append(os.path.join(dossier_sortie, nom))
+    return chemins
+
+
+def chemin_sortie_en(chemin_sortie: str) -> str:
+    """Chemin du document anglais d'une conversion bilingue."""
+    return os.path.splitext(chemin_sortie)[0] + "_en.docx"
+
+
+def extraire_avec_backoff(cv_text: str, language: str, max_tentatives: int = 5):
+    """
+    Appelle extract_info_from_cv (extract_info_bilingue pour LANGUE_BILINGUE).
+    Les erreurs 429/5xx sont réessayées par la couche de transport (cv_transport),
+    avec Retry-After ou un backoff exponentiel à gigue, dans la limite de
+    max_tentatives requêtes HTTP par appel LLM : il n'y a pas de seconde couche de
+    nouvelles tentatives autour de l'extraction.
+
+    Returns:
+        Tuple (informations extraites, nombre de requêtes : 1 + nouvelles tentatives)
+    """
+    mesure = mesure_courante()
+    avant = mesure.tentatives_supplementaires if mesure is not None else 0
+    with tentatives_max(max_tentatives):
+        if language == LANGUE_BILINGUE:
+            info = extract_info_bilingue(cv_text)
+        else:
+            info = extract_info_from_cv(cv_text, language=language)
+    return info, 1 + (mesure.tentatives_supplementaires - avant if mesure is not None else 0)
+
+
+def convertir_fichier(chemin: str, chemin_sortie: Optional[str], language: str = "fr",
+                      max_tentatives: int = 5) -> ResultatConversion:
+    """
+    Convertit un CV en dossier de compétences. Les erreurs sont capturées dans le
+    résultat pour ne pas interrompre le reste du lot.
+
+    Args:
+        chemin_sortie: Chemin du document généré ; None pour rendre les documents
+            en mémoire (ResultatConversion.documents, voir cv_export)
+    """
+    resultat = ResultatConversion(source=chemin)
+    debut = time.perf_counter()
+    with mesurer_conversion(source=chemin) as mesure:
+        try:
+            cv_content = extract_text_from_file(chemin)
+            if not cv_content:
+                raise ValueError("Impossible d'extraire le texte du fichier")
+
+            extracted_info, resultat.tentatives = extraire_avec_backoff(
+                cv_content, language, max_tentatives=max_tentatives
+            )
+            if language == LANGUE_BILINGUE:
+                resultat.tri = extracted_info["fr"].get("TRI", "")
+                # Une seule extraction, les deux modèles rendus en parallèle
+                if chemin_sortie is None:
+                    resultat.documents = generer_documents(extracted_info)
+                else:
+                    resultat.sortie_en = chemin_sortie_en(chemin_sortie)
+                    generer_documents(extracted_info, {"fr": chemin_sortie, "en": resultat.sortie_en})
+            else:
+                resultat.tri = extracted_info.get("TRI", "")
+                document = fill_word_template_with_lists(get_template_path(language), chemin_sortie,
+                                                         extracted_info, language=language)
+                if chemin_sortie is None:
+                    resultat.documents = {language: document}
+            resultat.sortie = chemin_sortie
+            resultat.statut = "ok"
+        except Exception as e:
+            mesure.marquer_erreur(e)
+            resultat.statut = "erreur"
+            resultat.erreur = f"{type(e).__name__}: {e}"
+        finally:
+            resultat.duree = time.perf_counter() - debut
+            resultat.etapes = dict(mesure.etapes)
+    return resultat
+
+
+def convertir_lot(fichiers: List[str], dossier_sortie: str, language: str = "fr",
+                  concurrence: int = 4, max_tentatives: int = 5,
+                  progression=None) -> List[ResultatConversion]:
+    """
+    Convertit une liste de CV en parallèle (pool de threads borné).
+
+    Args:
+        fichiers: Fichiers CV à convertir
+        dossier_sortie: Dossier de destination des .docx générés
+        language: Langue de génération ("fr", "en" ou LANGUE_BILINGUE)
+        concurrence: Nombre maximal de conversions simultanées
+        max_tentatives: Nombre maximal de requêtes HTTP par appel LLM (nouvelles tentatives comprises)
+        progression: Callback optionnel appelé avec chaque ResultatConversion terminé
+
+    Returns:
+        Résultats dans l'ordre des fichiers d'entrée
+    """
+    os.makedirs(dossier_sortie, exist_ok=True)
+    sorties = chemins_sortie(fichiers, dossier_sortie)
+    resultats: List[Optional[ResultatConversion]] = [None] * len(fichiers)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrence)) as executor:
+        futures = {
+            executor.submit(convertir_fichier, fichier, sortie, language, max_tentatives): i
+            for i, (fichier, sortie) in enumerate(zip(fichiers, sorties))
+        }
+        for future in as_completed(futures):
+            resultat = future.result()
+            resultats[futures[future]] = resultat
+            if progression:
+                progression(resultat)
+
+    return resultats
+
+
+def resumer(resultats: List[ResultatConversion], duree_totale: float) -> dict:
+    """Construit le rapport de synthèse d'un lot."""
+    reussis = [r for r in resultats if r.statut == "ok"]
+    echecs = [r for r in resultats if r.statut != "ok"]
+    return {
+        "total": len(resultats),
+        "reussis": len(reussis),
+        "echecs": len(echecs),
+        "duree_totale_s": round(duree_totale, 2),
+        "cv_par_minute": round(len(resultats) / duree_totale * 60, 2) if duree_totale else 0.0,
+        "duree_moyenne_s": round(sum(r.duree for r in resultats) / len(resultats), 2) if resultats else 0.0,
+        "tentatives_supplementaires": sum(max(0, r.tentatives - 1) for r in resultats),
+        "resultats": [{cle: valeur for cle, valeur in asdict(r).items() if cle != "documents"} for r in resultats],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Conversion par lot de CV en dossiers de compétences.")
+    parser.add_argument("entree", help="Dossier contenant les CV ou motif glob (ex: 'cvs/*.pdf')")
+    parser.add_argument("--sortie", default="resultats", help="Dossier de sortie des fichiers générés")
+    parser.add_argument("--langue", choices=["fr", "en", LANGUE_BILINGUE], default="fr",
+                        help=f"Langue de génération ({LANGUE_BILINGUE} : un document par langue)")
+    parser.add_argument("--concurrence", type=int, default=4, help="Nombre de conversions simultanées")
+    parser.add_argument("--max-tentatives", type=int, default=5,
+                        help="Requêtes HTTP maximales par appel LLM, nouvelles tentatives 429/5xx comprises")
+    parser.add_argument("--recursif", action="store_true", help="Parcourir les sous-dossiers")
+    parser.add_argument("--rapport", help="Chemin d'un fichier JSON où écrire le rapport détaillé")
+    parser.add_argument("--routage", action="store_true",
+                        help="Extraire avec le modèle rapide d'abord, le grand modèle seulement sur échec des contrôles")
+    parser.add_argument("--metriques", action="store_true",
+                        help="Afficher les métriques agrégées (format Prometheus) en fin de lot")
+    parser.add_argument("--zip", metavar="ARCHIVE",
+                        help="Écrire les documents et un manifeste dans une archive ZIP, au fil des conversions "
+                             "('-' pour la sortie standard) au lieu du dossier de sortie")
+    args = parser.parse_args(argv)
+
+    if args.routage:
+        os.environ["CV_ROUTAGE_MODELES"] = "1"
+
+    fichiers = collecter_fichiers(args.entree, recursif=args.recursif)
+    if not fichiers:
+        print(f"Aucun fichier PDF ou Word trouvé pour : {args.entree}", file=sys.stderr)
+        return 1
+
+    # L'archive écrite sur la sortie standard ne doit pas être mêlée aux messages
+    console = sys.stderr if args.zip == "-" else sys.stdout
+    print(f"🔍 {len(fichiers)} CV à traiter (concurrence : {args.concurrence})", file=console)
+
+    def afficher(resultat: ResultatConversion):
+        if resultat.statut == "ok":
+            sorties = ", ".join(filter(None, (resultat.sortie, resultat.sortie_en)))
+            print(f"✅ {resultat.source} -> {sorties} ({resultat.duree:.1f}s)", file=console)
+        else:
+            print(f"❌ {resultat.source} : {resultat.erreur}", file=console)
+
+    debut = time.perf_counter()
+    if args.zip:
+        from cv_export import ecrire_zip_lot
+
+        resultats = ecrire_zip_lot(fichiers, sys.stdout.buffer if args.zip == "-" else args.zip,
+                                   language=args.langue, concurrence=args.concurrence,
+                                   max_tentatives=args.max_tentatives, progression=afficher)
+    else:
+        resultats = convertir_lot(fichiers, args.sortie, language=args.langue,
+                                  concurrence=args.concurrence, max_tentatives=args.max_tentatives,
+                                  progression=afficher)
+    rapport = resumer(resultats, time.perf_counter() - debut)
+
+    print("=" * 50, file=console)
+    print(f"Total : {rapport['total']} | Réussis : {rapport['reussis']} | Échecs : {rapport['echecs']}", file=console)
+    print(f"Durée : {rapport['duree_totale_s']}s | Débit : {rapport['cv_par_minute']} CV/min", file=console)
+    if args.routage:
+        print(f"Taux d'escalade : {registre.taux_escalade():.1%} | Latence LLM économisée (estimation) : "
+              f"{registre.latence_economisee(MODELE_LLM):.1f}s", file=console)
+
+    if args.metriques:
+        print(snapshot_prometheus(), file=console)
+
+    if args.rapport:
+        with open(args.rapport, "w", encoding="utf-8") as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+
+    return 0 if rapport["echecs"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
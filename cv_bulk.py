@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Conversion en masse de CV via l'API Batch d'OpenAI (traitements de nuit).
+
+Étapes, toutes reprises automatiquement après un redémarrage grâce au fichier
+d'état etat.json du dossier de travail :
+    1. preparer : une requête JSONL par CV (même prompt système et même schéma
+       de réponse CVInfo que extract_info_from_cv) ;
+    2. soumettre : envoi du fichier et création du batch ;
+    3. attendre : interrogation périodique du statut du batch ;
+    4. rendre : lecture en flux du fichier de résultats, validation en CVInfo et
+       rendu des documents dans un pool de processus.
+
+Exemple :
+    python cv_bulk.py "consultants/**/*.pdf" --travail bulk_2026 --sortie dossiers --langue fr
+
+Pour tester contre le serveur local (benchmarks.fake_openai), définir
+OPENAI_BASE_URL avec l'adresse du serveur.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+from cv_batch import chemins_sortie, collecter_fichiers
+from cv_process import (
+    CVInfo,
+    MODELE_LLM,
+    SYSTEM_PROMPTS,
+    completer_info,
+    extract_text_from_file,
+    fill_word_template_with_lists,
+    get_cache_extraction,
+    get_client,
+    get_template_path,
+    preparer_texte_llm,
+)
+
+STATUTS_TERMINAUX = {"completed", "failed", "expired", "cancelled"}
+
+FICHIER_ETAT = "etat.json"
+FICHIER_REQUETES = "requetes.jsonl"
+FICHIER_TEXTES = "textes.jsonl"
+
+
+def format_reponse_json(modele) -> dict:
+    """
+    Paramètre response_format d'une requête Batch, identique à celui que
+    chat.completions.parse envoie pour le même modèle Pydantic (schéma strict).
+    Construit avec openai.pydantic_function_tool, API publique du SDK.
+    """
+    import openai
+
+    fonction = openai.pydantic_function_tool(modele)["function"]
+    return {
+        "type": "json_schema",
+        "json_schema": {"schema": fonction["parameters"], "name": fonction["name"], "strict": True},
+    }
+
+
+@dataclass
+class EtatBulk:
+    """État persistant d'une conversion en masse."""
+    langue: str = "fr"
+    modele: str = MODELE_LLM
+    requetes: Dict[str, dict] = field(default_factory=dict)
+    erreurs_preparation: Dict[str, str] = field(default_factory=dict)
+    fichier_entree_id: Optional[str] = None
+    batch_id: Optional[str] = None
+    statut_batch: Optional[str] = None
+    fichier_sortie_id: Optional[str] = None
+    fichier_erreur_id: Optional[str] = None
+    rendus: List[str] = field(default_factory=list)
+    echecs: Dict[str, str] = field(default_factory=dict)
+
+
+class ConversionBulk:
+    """
+    Conversion en masse d'un ensemble de CV, pilotée par un dossier de travail.
+
+    Args:
+        dossier_travail: Dossier où sont conservés l'état, les requêtes et les textes
+        dossier_sortie: Dossier des documents générés
+        language: Langue de génération ("fr" ou "en")
+    """
+
+    def __init__(self, dossier_travail: str, dossier_sortie: str, language: str = "fr"):
+        self.dossier_travail = dossier_travail
+        self.dossier_sortie = dossier_sortie
+        os.makedirs(dossier_travail, exist_ok=True)
+        self.etat = self._charger_etat() or EtatBulk(langue=language)
+
+    def _chemin(self, nom: str) -> str:
+        return os.path.join(self.dossier_travail, nom)
+
+    def _charger_etat(self) -> Optional[EtatBulk]:
+        try:
+            with open(self._chemin(FICHIER_ETAT), "r", encoding="utf-8") as f:
+                return EtatBulk(**json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def sauvegarder(self) -> None:
+        """Écrit l'état de manière atomique."""
+        chemin_tmp = self._chemin(FICHIER_ETAT + ".tmp")
+        with open(chemin_tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(self.etat), f, ensure_ascii=False, indent=2)
+        os.replace(chemin_tmp, self._chemin(FICHIER_ETAT))
+
+    def preparer(self, fichiers: List[str]) -> int:
+        """
+        Écrit une requête Batch par CV. Ne fait rien si la préparation a déjà eu lieu.
+
+        Returns:
+            Nombre de requêtes écrites
+        """
+        if self.etat.requetes:
+            return len(self.etat.requetes)
+
+        response_format = format_reponse_json(CVInfo)
+        system_prompt = SYSTEM_PROMPTS.get(self.etat.langue, SYSTEM_PROMPTS["fr"])
+        sorties = chemins_sortie(fichiers, self.dossier_sortie)
+
+        with open(self._chemin(FICHIER_REQUETES), "w", encoding="utf-8") as requetes, \
+                open(self._chemin(FICHIER_TEXTES), "w", encoding="utf-8") as textes:
+            for i, (fichier, sortie) in enumerate(zip(fichiers, sorties)):
+                custom_id = f"cv-{i:06d}"
+                try:
+                    cv_text = extract_text_from_file(fichier)
+                    if not cv_text:
+                        raise ValueError("Impossible d'extraire le texte du fichier")
+                except Exception as e:
+                    self.etat.erreurs_preparation[fichier] = f"{type(e).__name__}: {e}"
+                    continue
+
+                requete = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": self.etat.modele,
+                        "messages": [
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": preparer_texte_llm(cv_text)},
+                        ],
+                        "response_format": response_format,
+                    },
+                }
+                requetes.write(json.dumps(requete, ensure_ascii=False) + "\n")
+                textes.write(json.dumps({"custom_id": custom_id, "texte": cv_text}, ensure_ascii=False) + "\n")
+                self.etat.requetes[custom_id] = {"source": fichier, "sortie": sortie}
+
+        self.sauvegarder()
+        return len(self.etat.requetes)
+
+    def soumettre(self) -> str:
+        """
+        Envoie le fichier de requêtes et crée le batch. Chaque identifiant est
+        sauvegardé dès sa création : un redémarrage ne renvoie rien deux fois.
+
+        Returns:
+            Identifiant du batch
+        """
+        client = get_client()
+        if self.etat.fichier_entree_id is None:
+            with open(self._chemin(FICHIER_REQUETES), "rb") as f:
+                self.etat.fichier_entree_id = client.files.create(file=f, purpose="batch").id
+            self.sauvegarder()
+
+        if self.etat.batch_id is None:
+            batch = client.batches.create(
+                input_file_id=self.etat.fichier_entree_id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h",
+                metadata={"usage": "conversion CV en masse"},
+            )
+            self.etat.batch_id = batch.id
+            self.etat.statut_batch = batch.status
+            # Un batch rejeté à la création est déjà dans un statut terminal : attendre
+            # ne l'interroge plus, ses fichiers doivent être notés dès maintenant
+            self.etat.fichier_sortie_id = batch.output_file_id
+            self.etat.fichier_erreur_id = batch.error_file_id
+            self.sauvegarder()
+        return self.etat.batch_id
+
+    def attendre(self, intervalle: float = 30.0, afficher=print) -> str:
+        """
+        Interroge le batch jusqu'à un statut terminal.
+
+        Returns:
+            Statut final du batch
+        """
+        client = get_client()
+        while self.etat.statut_batch not in STATUTS_TERMINAUX:
+            batch = client.batches.retrieve(self.etat.batch_id)
+            self.etat.statut_batch = batch.status
+            self.etat.fichier_sortie_id = batch.output_file_id
+            self.etat.fichier_erreur_id = batch.error_file_id
+            self.sauvegarder()
+            if batch.status in STATUTS_TERMINAUX:
+                break
+            compteurs = batch.request_counts
+            if afficher and compteurs is not None:
+                afficher(f"⏳ Batch {batch.id} : {batch.status} ({compteurs.completed}/{compteurs.total})")
+            time.sleep(intervalle)
+        return self.etat.statut_batch
+
+    def _lire_textes(self) -> Dict[str, str]:
+        with open(self._chemin(FICHIER_TEXTES), "r", encoding="utf-8") as f:
+            return {ligne["custom_id"]: ligne["texte"] for ligne in map(json.loads, f)}
+
+    def iter_resultats(self):
+        """
+        Lit en flux le fichier de résultats du batch.
+
+        Yields:
+            Tuples (custom_id, informations CVInfo complétées ou None, erreur)
+        """
+        if self.etat.fichier_sortie_id is None:
+            # Toutes les requêtes du batch ont échoué : seul le fichier d'erreurs existe
+            return
+        client = get_client()
+        textes = self._lire_textes()
+        cache = get_cache_extraction()
+
+        with client.files.with_streaming_response.content(self.etat.fichier_sortie_id) as reponse:
+            for ligne in reponse.iter_lines():
+                if not ligne.strip():
+                    continue
+                resultat = json.loads(ligne)
+                custom_id = resultat["custom_id"]
+                try:
+                    if resultat.get("error"):
+                        raise RuntimeError(resultat["error"].get("message", "erreur du batch"))
+                    corps = resultat["response"]["body"]
+                    if resultat["response"]["status_code"] != 200:
+                        raise RuntimeError(corps.get("error", {}).get("message", "erreur du batch"))
+                    info = CVInfo.model_validate_json(corps["choices"][0]["message"]["content"]).model_dump()
+                except Exception as e:
+                    yield custom_id, None, f"{type(e).__name__}: {e}"
+                    continue
+
+                cv_text = textes[custom_id]
+                if cache is not None:
+                    # Les conversions en temps réel ultérieures du même CV profitent du résultat
+                    cle = cache.cle(preparer_texte_llm(cv_text), self.etat.langue, self.etat.modele, CVInfo)
+                    try:
+                        cache.set(cle, info)
+                    except OSError:
+                        pass
+                yield custom_id, completer_info(info, cv_text), ""
+
+    def rendre(self, max_workers: Optional[int] = None, afficher=print) -> None:
+        """
+        Rend les documents au fil de la lecture des résultats, dans un pool de
+        processus (le rendu docx est limité par le CPU). Le nombre de rendus en
+        attente est borné pour que la mémoire reste constante.
+        """
+        os.makedirs(self.dossier_sortie, exist_ok=True)
+        deja_rendus = set(self.etat.rendus)
+        nb_workers = max_workers or os.cpu_count() or 1
+        template_path = get_template_path(self.etat.langue)
+
+        with ProcessPoolExecutor(max_workers=nb_workers) as executor:
+            en_cours = {}
+
+            def collecter(futures):
+                for future in futures:
+                    custom_id = en_cours.pop(future)
+                    try:
+                        future.result()
+                        self.etat.rendus.append(custom_id)
+                        self.etat.echecs.pop(custom_id, None)
+                    except Exception as e:
+                        self.etat.echecs[custom_id] = f"{type(e).__name__}: {e}"
+                        if afficher:
+                            afficher(f"❌ {self.etat.requetes[custom_id]['source']} : {e}")
+
+            for custom_id, info, erreur in self.iter_resultats():
+                if custom_id in deja_rendus:
+                    continue
+                if info is None:
+                    self.etat.echecs[custom_id] = erreur
+                    continue
+                sortie = self.etat.requetes[custom_id]["sortie"]
+                en_cours[executor.submit(_rendre_document, template_path, sortie, info, self.etat.langue)] = custom_id
+                if len(en_cours) >= 2 * nb_workers:
+                    termines, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+                    collecter(termines)
+                    self.sauvegarder()
+
+            collecter(list(en_cours))
+
+        # Requêtes en échec côté batch (fichier d'erreurs)
+        if self.etat.fichier_erreur_id:
+            self.etat.echecs.update(self._lire_erreurs())
+        self.sauvegarder()
+
+    def _lire_erreurs(self) -> Dict[str, str]:
+        erreurs = {}
+        contenu = get_client().files.content(self.etat.fichier_erreur_id)
+        for ligne in contenu.text.splitlines():
+            if ligne.strip():
+                resultat = json.loads(ligne)
+                message = (resultat.get("error") or {}).get("message") or "erreur du batch"
+                erreurs[resultat["custom_id"]] = message
+        return erreurs
+
+
+def _rendre_document(template_path: str, sortie: str, info: dict, language: str) -> str:
+    """Rend un document dans un fichier temporaire puis le renomme (pas de fichier tronqué en cas d'arrêt)."""
+    chemin_tmp = sortie + ".tmp"
+    fill_word_template_with_lists(template_path, chemin_tmp, info, language=language)
+    os.replace(chemin_tmp, sortie)
+    return sortie
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Conversion en masse de CV via l'API Batch d'OpenAI.")
+    parser.add_argument("entree", nargs="?", help="Dossier ou motif glob des CV (inutile lors d'une reprise)")
+    parser.add_argument("--travail", required=True, help="Dossier de travail (état, requêtes, textes)")
+    parser.add_argument("--sortie", default="resultats", help="Dossier des documents générés")
+    parser.add_argument("--langue", choices=["fr", "en"], default="fr")
+    parser.add_argument("--intervalle", type=float, default=60.0, help="Intervalle d'interrogation du batch (s)")
+    parser.add_argument("--workers", type=int, help="Processus de rendu (par défaut le nombre de CPU)")
+    args = parser.parse_args(argv)
+
+    bulk = ConversionBulk(args.travail, args.sortie, language=args.langue)
+
+    if not bulk.etat.requetes:
+        if not args.entree:
+            parser.error("l'entrée est obligatoire pour une nouvelle conversion")
+        fichiers = collecter_fichiers(args.entree, recursif=True)
+        print(f"📝 Préparation de {bulk.preparer(fichiers)} requêtes")
+        for fichier, erreur in bulk.etat.erreurs_preparation.items():
+            print(f"❌ {fichier} : {erreur}")
+
+    print(f"🚀 Batch {bulk.soumettre()}")
+    statut = bulk.attendre(intervalle=args.intervalle)
+    if statut != "completed":
+        print(f"❌ Batch terminé avec le statut : {statut}", file=sys.stderr)
+        return 1
+
+    debut = time.perf_counter()
+    bulk.rendre(max_workers=args.workers)
+    duree = time.perf_counter() - debut
+    print("=" * 50)
+    print(f"Rendus : {len(bulk.etat.rendus)} | Échecs : {len(bulk.etat.echecs)} | "
+          f"Rendu : {duree:.1f}s ({len(bulk.etat.rendus) / duree * 60 if duree else 0:.0f} CV/min)")
+    return 0 if not bulk.etat.echecs else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Cache disque des résultats d'extraction LLM.
+
+Chaque entrée est adressée par le contenu : un hash SHA-256 du texte prétraité,
+de la langue, du nom du modèle et d'une empreinte du schéma Pydantic de réponse.
+Un CV déjà converti ne repasse donc plus par l'API, tant que le schéma CVInfo
+n'a pas changé.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+
+def empreinte_schema(modele) -> str:
+    """
+    Calcule une empreinte stable du schéma JSON d'un modèle Pydantic.
+
+    Args:
+        modele: Classe Pydantic (ex: CVInfo)
+
+    Returns:
+        Hash SHA-256 hexadécimal du schéma
+    """
+    schema = json.dumps(modele.model_json_schema(), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()
+
+
+class CacheExtraction:
+    """
+    Cache clé/valeur JSON sur disque avec éviction par âge et par taille.
+
+    Les entrées sont réparties dans des sous-dossiers (deux premiers caractères
+    de la clé). L'écriture est atomique (fichier temporaire + os.replace), ce qui
+    permet de partager le dossier entre plusieurs processus. L'heure de
+    modification sert d'horodatage d'accès : l'éviction par taille supprime
+    d'abord les entrées les moins récemment utilisées.
+    """
+
+    def __init__(self, repertoire: str, taille_max_octets: int = 200 * 1024 * 1024,
+                 age_max_secondes: Optional[float] = 30 * 24 * 3600):
+        self.repertoire = repertoire
+        self.taille_max_octets = taille_max_octets
+        self.age_max_secondes = age_max_secondes
+        self.hits = 0
+        self.misses = 0
+        self.ecritures = 0
+        self.evictions = 0
+        self._taille_estimee: Optional[int] = None
+        self._empreintes = {}
+        self._lock = threading.Lock()
+        os.makedirs(repertoire, exist_ok=True)
+
+    def cle(self, texte: str, language: str, modele_llm: str, schema) -> str:
+        """
+        Construit la clé d'une extraction.
+
+        Args:
+            texte: Texte prétraité envoyé au LLM
+            language: Langue d'extraction
+            modele_llm: Nom du modèle OpenAI
+            schema: Classe Pydantic de la réponse attendue
+        """
+        empreinte = self._empreintes.get(schema)
+        if empreinte is None:
+            empreinte = self._empreintes[schema] = empreinte_schema(schema)
+        contenu = "\x1f".join([texte, language, modele_llm, empreinte])
+        return hashlib.sha256(contenu.encode("utf-8")).hexdigest()
+
+    def _chemin(self, cle: str) -> str:
+        return os.path.join(self.repertoire, cle[:2], f"{cle}.json")
+
+    def get(self, cle: str) -> Optional[dict]:
+        """
+        Lit une entrée du cache.
+
+        Returns:
+            La valeur stockée, ou None si absente, expirée ou illisible
+        """
+        chemin = self._chemin(cle)
+        try:
+            with open(chemin, "r", encoding="utf-8") as f:
+                entree = json.load(f)
+        except (OSError, ValueError):
+            self._compter("misses")
+            return None
+
+        if self.age_max_secondes is not None and time.time() - entree.get("cree_le", 0) > self.age_max_secondes:
+            self._supprimer(chemin)
+            self._compter("misses")
+            return None
+
+        try:
+            # Marquer l'entrée comme récemment utilisée (éviction LRU)
+            os.utime(chemin)
+        except OSError:
+            pass
+        self._compter("hits")
+        return entree["valeur"]
+
+    def set(self, cle: str, valeur: dict) -> None:
+        """Enregistre une entrée, puis applique l'éviction si la taille maximale est dépassée."""
+        chemin = self._chemin(cle)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        contenu = json.dumps({"cree_le": time.time(), "valeur": valeur}, ensure_ascii=False)
+
+        fd, chemin_tmp = tempfile.mkstemp(dir=os.path.dirname(chemin), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(contenu)
+            os.replace(chemin_tmp, chemin)
+        except OSError:
+            self._supprimer(chemin_tmp)
+            raise
+
+        with self._lock:
+            self.ecritures += 1
+            if self._taille_estimee is not None:
+                self._taille_estimee += len(contenu.encode("utf-8"))
+            depassement = self._taille_estimee is None or self._taille_estimee > self.taille_max_octets
+        if depassement:
+            self.evincer()
+
+    def evincer(self) -> int:
+        """
+        Supprime les entrées expirées, puis les moins récemment utilisées jusqu'à
+        repasser sous la taille maximale.
+
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        maintenant = time.time()
+        entrees = []
+        for sous_dossier in os.scandir(self.repertoire):
+            if not sous_dossier.is_dir():
+                continue
+            for fichier in os.scandir(sous_dossier.path):
+                if not fichier.name.endswith(".json"):
+                    continue
+                try:
+                    stat = fichier.stat()
+                except OSError:
+                    continue
+                entrees.append((stat.st_mtime, stat.st_size, fichier.path))
+
+        supprimees = 0
+        taille_totale = sum(taille for _, taille, _ in entrees)
+        # Les plus anciens accès en premier
+        entrees.sort()
+        for mtime, taille, chemin in entrees:
+            trop_gros = taille_totale > self.taille_max_octets
+            # mtime >= date de création : une entrée non accédée depuis age_max est forcément expirée
+            expiree = self.age_max_secondes is not None and maintenant - mtime > self.age_max_secondes
+            if not (trop_gros or expiree):
+                continue
+            if self._supprimer(chemin):
+                taille_totale -= taille
+                supprimees += 1
+
+        with self._lock:
+            self._taille_estimee = taille_totale
+            self.evictions += supprimees
+        return supprimees
+
+    def vider(self) -> None:
+        """Supprime toutes les entrées du cache."""
+        for sous_dossier in os.scandir(self.repertoire):
+            if sous_dossier.is_dir():
+                for fichier in os.scandir(sous_dossier.path):
+                    self._supprimer(fichier.path)
+        with self._lock:
+            self._taille_estimee = 0
+
+    def statistiques(self) -> dict:
+        """Retourne les compteurs du cache (hits, misses, taux de succès...)."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "taux_hit": round(self.hits / total, 3) if total else 0.0,
+                "ecritures": self.ecritures,
+                "evictions": self.evictions,
+                "taille_octets": self._taille_estimee,
+            }
+
+    def _compter(self, compteur: str) -> None:
+        with self._lock:
+            setattr(self, compteur, getattr(self, compteur) + 1)
+
+    @staticmethod
+    def _supprimer(chemin: str) -> bool:
+        try:
+            os.remove(chemin)
+            return True
+        except OSError:
+            return False
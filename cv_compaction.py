@@ -0,0 +1,223 @@
+"""
+Compaction du texte d'un CV avant envoi au LLM.
+
+preprocess_text ne fait que réduire les espaces et les lignes vides. Cette étape
+retire en plus ce qui coûte des tokens sans apporter d'information :
+en-têtes et pieds de page répétés d'une page à l'autre, numéros de page,
+puces décoratives, blocs de contact dupliqués et caractères invisibles.
+La première occurrence de chaque ligne répétée est conservée, de sorte
+qu'aucune information du CV n'est perdue.
+"""
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List
+
+from cv_decoupage import PLAGE_DATES_RE
+
+# Séparateur de pages inséré par l'extraction PDF
+SEPARATEUR_PAGES = "\f"
+
+# Nombre de lignes en haut et en bas de chaque page considérées comme
+# en-tête / pied de page potentiels
+LIGNES_MARGE = 4
+
+CARACTERES_INVISIBLES_RE = re.compile("[\u200b\u200c\u200d\u2060\ufeff\u00ad]")
+ESPACES_RE = re.compile("[ \t\u00a0\u2007\u202f\u2009]+")
+# Puces usuelles, plus les puces de la police Symbol/Wingdings extraites des PDF Word
+PUCES = "•●▪■◦○◆◇►▸➢➤➔→✓✔✗❖*·–\uf0b7\uf0a7\uf0d8"
+PUCE_SEULE_RE = re.compile(f"^[{re.escape(PUCES)}-]$")
+PUCE_RE = re.compile(f"^[{re.escape(PUCES)}]+\\s*")
+NUMERO_PAGE_RE = re.compile(r"^(page\s*)?(\d{1,3})\s*((/|sur|of|de)\s*\d{1,3})?$", re.IGNORECASE)
+BOILERPLATE_RE = re.compile(r"^(curriculum vit(a)?e|page\s*\d{1,3}\s*(/|sur|of|de)\s*\d{1,3})$", re.IGNORECASE)
+EMAIL_URL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+|https?://\S+|www\.\S+|linkedin\.com/\S+",
+                          re.IGNORECASE)
+TELEPHONE_RE = re.compile(r"(\+|00)?\d[\d \.\-()]{7,}\d")
+# Numéro au format téléphone (« 06 12 34 56 78 », « +33 (0)6 12 34 56 78 ») ou précédé d'un libellé
+FORMAT_TELEPHONE_RE = re.compile(r"(?<!\d)((\+|00)\d{2,3}[ .\-]?(\(0\)[ .\-]?)?|0)[1-9]([ .\-]?\d{2}){4}(?!\d)")
+LIBELLE_TELEPHONE_RE = re.compile(r"\b(t[ée]l([ée]phone)?|phone|mobile|portable|gsm|fax)\b", re.IGNORECASE)
+# Compteur de page en fin de ligne d'en-tête / pied de page : « Page 2 », « 2/5 », « Page 2 sur 5 »
+COMPTEUR_PAGE_FIN_RE = re.compile(r"(page\s*\d{1,3}(\s*(/|sur|of|de)\s*\d{1,3})?|\d{1,3}\s*(/|sur|of|de)\s*\d{1,3})$",
+                                  re.IGNORECASE)
+
+
+@dataclass
+class ResultatCompaction:
+    """Texte compacté et statistiques de la compaction."""
+    texte: str
+    tokens_avant: int
+    tokens_apres: int
+    lignes_supprimees: int
+
+    @property
+    def reduction(self) -> float:
+        """Part des tokens supprimés (entre 0 et 1)."""
+        return 1 - self.tokens_apres / self.tokens_avant if self.tokens_avant else 0.0
+
+
+@lru_cache(maxsize=1)
+def _encodeur_tokens():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # tiktoken absent ou encodage indisponible hors ligne
+        return None
+
+
+def compter_tokens(texte: str) -> int:
+    """
+    Compte les tokens d'un texte avec tiktoken (encodage des modèles gpt-4o/gpt-5)
+    s'il est installé, sinon l'estime à raison d'un token pour 4 caractères.
+    """
+    encodeur = _encodeur_tokens()
+    if encodeur is not None:
+        return len(encodeur.encode(texte, disallowed_special=()))
+    return math.ceil(len(texte) / 4)
+
+
+def _normaliser(ligne: str) -> str:
+    """
+    Forme normalisée d'une ligne pour la détection des répétitions. Seul un
+    compteur de page final est ignoré : les autres chiffres (dates, montants)
+    distinguent des lignes différentes.
+    """
+    return COMPTEUR_PAGE_FIN_RE.sub("#", ligne.casefold())
+
+
+def _est_contact(ligne: str) -> bool:
+    """
+    Indique si une ligne contient un email, un lien ou un numéro de téléphone.
+    Un long nombre (montant, référence) n'est un téléphone que s'il en a le
+    format ou s'il suit un libellé (« Tél », « Mobile »...).
+    """
+    if EMAIL_URL_RE.search(ligne) or FORMAT_TELEPHONE_RE.search(ligne):
+        return True
+    return bool(LIBELLE_TELEPHONE_RE.search(ligne)) and any(
+        len(re.sub(r"\D", "", m.group(0))) >= 9 for m in TELEPHONE_RE.finditer(ligne)
+    )
+
+
+def _est_numero_page(ligne: str, numero_page: int) -> bool:
+    """
+    Reconnaît un numéro de page (« 3 », « Page 3 », « 3 / 5 »). Un nombre seul
+    n'est retenu que s'il correspond au numéro de la page courante.
+    """
+    match = NUMERO_PAGE_RE.match(ligne)
+    if not match:
+        return False
+    return bool(match.group(1) or match.group(3)) or int(match.group(2)) == numero_page
+
+
+def _index_marges(lignes: List[str]) -> set:
+    """Index des LIGNES_MARGE premières et dernières lignes non vides d'une page."""
+    non_vides = [i for i, ligne in enumerate(lignes) if ligne]
+    return set(non_vides[:LIGNES_MARGE] + non_vides[-LIGNES_MARGE:])
+
+
+def _lignes_repetees(pages: List[List[str]], marges: List[set]) -> set:
+    """
+    Identifie les lignes d'en-tête / pied de page : présentes dans les marges
+    d'au moins la moitié des pages (et d'au moins deux pages), et jamais
+    ailleurs dans le document. Un intitulé de section répété dans le corps
+    (ex: « Réalisations : ») n'est donc pas concerné, pas plus qu'une plage de
+    dates de mission qui tombe en haut ou en bas d'une page.
+    """
+    if len(pages) < 2:
+        return set()
+    seuil = max(2, math.ceil(len(pages) / 2))
+    pages_en_marge = {}
+    hors_marge = set()
+    for lignes, index_marges in zip(pages, marges):
+        vues_en_marge = set()
+        for i, ligne in enumerate(lignes):
+            if not ligne or PLAGE_DATES_RE.search(ligne):
+                continue
+            normalisee = _normaliser(ligne)
+            if i in index_marges:
+                vues_en_marge.add(normalisee)
+            else:
+                hors_marge.add(normalisee)
+        for normalisee in vues_en_marge:
+            pages_en_marge[normalisee] = pages_en_marge.get(normalisee, 0) + 1
+    return {
+        ligne for ligne, nombre in pages_en_marge.items()
+        if nombre >= seuil and ligne not in hors_marge
+    }
+
+
+def compacter_texte(texte: str) -> ResultatCompaction:
+    """
+    Compacte le texte d'un CV (déjà passé par preprocess_text).
+
+    Args:
+        texte: Texte du CV, pages séparées par SEPARATEUR_PAGES pour les PDF
+
+    Returns:
+        ResultatCompaction avec le texte compacté et les comptes de tokens
+    """
+    texte_nettoye = CARACTERES_INVISIBLES_RE.sub("", texte)
+    pages = [
+        [ESPACES_RE.sub(" ", ligne).strip() for ligne in page.split("\n")]
+        for page in texte_nettoye.split(SEPARATEUR_PAGES)
+    ]
+    marges = [_index_marges(lignes) for lignes in pages] if len(pages) > 1 else [set()]
+    repetees = _lignes_repetees(pages, marges)
+
+    deja_vues = set()
+    contacts_vus = set()
+    lignes_gardees: List[str] = []
+    supprimees = 0
+    puce_en_attente = False
+
+    for numero_page, (lignes, index_marges) in enumerate(zip(pages, marges), start=1):
+        # Les coordonnées ne sont dédupliquées qu'en haut ou en bas de page,
+        # y compris pour un document d'une seule page
+        marges_contact = index_marges or _index_marges(lignes)
+        for i, ligne in enumerate(lignes):
+            if not ligne:
+                lignes_gardees.append("")
+                continue
+
+            normalisee = _normaliser(ligne)
+            # En-têtes / pieds de page : seule la première occurrence est gardée
+            if normalisee in repetees:
+                if normalisee in deja_vues:
+                    supprimees += 1
+                    continue
+                deja_vues.add(normalisee)
+
+            # Numéros de page : uniquement dans les marges, un nombre seul dans
+            # le corps du CV peut être une information (effectif, budget...)
+            if BOILERPLATE_RE.match(ligne) or (i in index_marges and _est_numero_page(ligne, numero_page)):
+                supprimees += 1
+                continue
+
+            # Coordonnées déjà présentes plus haut dans le CV, répétées en en-tête
+            # ou pied de page
+            if _est_contact(ligne):
+                if i in marges_contact and ligne.casefold() in contacts_vus:
+                    supprimees += 1
+                    continue
+                contacts_vus.add(ligne.casefold())
+
+            # Puce isolée sur sa ligne : elle s'applique à la ligne suivante
+            if PUCE_SEULE_RE.match(ligne):
+                puce_en_attente = True
+                supprimees += 1
+                continue
+
+            ligne = PUCE_RE.sub("- ", ligne)
+            if puce_en_attente and not ligne.startswith("- "):
+                ligne = f"- {ligne}"
+            puce_en_attente = False
+            lignes_gardees.append(ligne)
+
+    texte_compacte = re.sub(r"\n{3,}", "\n\n", "\n".join(lignes_gardees)).strip()
+    return ResultatCompaction(
+        texte=texte_compacte,
+        tokens_avant=compter_tokens(texte),
+        tokens_apres=compter_tokens(texte_compacte),
+        lignes_supprimees=supprimees,
+    )
@@ -0,0 +1,133 @@
+"""
+Découpage des CV longs en morceaux et fusion des projets extraits.
+
+Utilisé par l'extraction par morceaux de cv_process : le texte est découpé en
+sections (une section commence à chaque ligne portant une plage de dates,
+c'est-à-dire en général l'en-tête d'une mission), les sections sont regroupées
+en morceaux de taille bornée, puis les projets extraits de chaque morceau sont
+fusionnés et dédoublonnés.
+"""
+import re
+import unicodedata
+from typing import Dict, List, Tuple
+
+# Plage de dates en début de mission : 01/2020 - 03/2021, 2019 – aujourd'hui, Janv. 2018 à Déc. 2019...
+MOIS = r"(janv|févr|fevr|mars|avr|mai|juin|juil|août|aout|sept|oct|nov|déc|dec|jan|feb|mar|apr|may|jun|jul|aug|sep)[a-zéû]*\.?"
+DATE = rf"((\d{{1,2}}[/.-])?\d{{4}}|{MOIS}\s*\d{{4}})"
+PLAGE_DATES_RE = re.compile(
+    rf"{DATE}\s*(-|–|—|à|au|to|>)\s*({DATE}|aujourd'hui|ce jour|présent|present|now|today|en cours)",
+    re.IGNORECASE,
+)
+
+
+def decouper_en_sections(texte: str) -> List[str]:
+    """
+    Découpe un texte en sections. Une nouvelle section commence à chaque ligne
+    contenant une plage de dates (en-tête de mission probable).
+
+    Args:
+        texte: Texte complet du CV
+
+    Returns:
+        Sections dans l'ordre du texte (leur concaténation redonne le texte)
+    """
+    sections: List[str] = []
+    courante: List[str] = []
+    for ligne in texte.split("\n"):
+        if PLAGE_DATES_RE.search(ligne) and courante:
+            sections.append("\n".join(courante))
+            courante = []
+        courante.append(ligne)
+    if courante:
+        sections.append("\n".join(courante))
+    return sections
+
+
+def decouper_en_morceaux(texte: str, taille_max: int, recouvrement: int = 1) -> List[str]:
+    """
+    Regroupe les sections d'un texte en morceaux d'environ taille_max caractères.
+
+    Args:
+        texte: Texte complet du CV
+        taille_max: Taille cible d'un morceau, en caractères. Une section plus
+            longue que taille_max forme un morceau à elle seule.
+        recouvrement: Nombre maximal de sections du morceau précédent répétées
+            en tête du morceau suivant, pour qu'une mission coupée à la frontière
+            soit vue en entier au moins une fois. Seules les sections qui tiennent
+            dans le morceau suivant avec la nouvelle section sont répétées.
+
+    Returns:
+        Liste des morceaux de texte
+    """
+    sections = decouper_en_sections(texte)
+    morceaux: List[List[str]] = []
+    courant: List[str] = []
+    taille = 0
+    for section in sections:
+        if courant and taille + len(section) > taille_max:
+            morceaux.append(courant)
+            courant = courant[-recouvrement:] if recouvrement else []
+            # Un recouvrement qui ferait déborder le morceau suivant n'est pas
+            # répété : une section longue n'est envoyée qu'une fois
+            while courant and sum(len(s) for s in courant) + len(section) > taille_max:
+                courant = courant[1:]
+            taille = sum(len(s) for s in courant)
+        courant.append(section)
+        taille += len(section)
+    if courant:
+        morceaux.append(courant)
+    return ["\n".join(morceau) for morceau in morceaux]
+
+
+def normaliser(valeur) -> str:
+    """Normalise une valeur pour la comparaison (casse, accents, ponctuation)."""
+    valeur = unicodedata.normalize("NFKD", str(valeur or "")).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", " ", valeur.lower()).strip()
+
+
+def cle_projet(projet: dict) -> Tuple[str, str, str]:
+    """Clé de dédoublonnage d'un projet : client, date de début, date de fin."""
+    return (
+        normaliser(projet.get("CLIENT_NOM")),
+        normaliser(projet.get("DATE_DEBUT")),
+        normaliser(projet.get("DATE_FIN")),
+    )
+
+
+def _fusionner_deux(projet: dict, doublon: dict) -> dict:
+    """Fusionne deux versions d'un même projet, en gardant l'information la plus complète."""
+    fusion = dict(projet)
+    for champ in ("INTITULE_POSTE", "INTITULE_PROJET", "DETAILS_PROJET"):
+        if len(str(doublon.get(champ) or "")) > len(str(fusion.get(champ) or "")):
+            fusion[champ] = doublon[champ]
+
+    realisations = list(fusion.get("REALISATION") or [])
+    deja_vues = {normaliser(r) for r in realisations}
+    for realisation in doublon.get("REALISATION") or []:
+        if normaliser(realisation) not in deja_vues:
+            realisations.append(realisation)
+            deja_vues.add(normaliser(realisation))
+    fusion["REALISATION"] = realisations
+    return fusion
+
+
+def fusionner_projets(listes_projets: List[List[dict]]) -> List[dict]:
+    """
+    Fusionne les projets extraits de plusieurs morceaux en une liste sans doublon,
+    dans l'ordre de première apparition.
+
+    Args:
+        listes_projets: Projets extraits de chaque morceau (dictionnaires Projet)
+
+    Returns:
+        Liste de projets dédoublonnée
+    """
+    projets: Dict[Tuple[str, str, str], dict] = {}
+    for liste in listes_projets:
+        for projet in liste:
+            cle = cle_projet(projet)
+            if cle in projets:
+                projets[cle] = _fusionner_deux(projets[cle], projet)
+            else:
+                projets[cle] = dict(projet)
+    return list(projets.values())
@@ -0,0 +1,179 @@
+"""
+Lecture rapide du texte d'un fichier Word (.docx), sans construire de Document python-docx.
+
+Les parties XML (en-têtes, corps, pieds de page) sont lues en flux depuis
+l'archive avec un analyseur incrémental (lxml.etree.iterparse) : la mémoire
+reste proportionnelle à un paragraphe, pas au document. Contrairement à
+document.paragraphs, le texte des tableaux et des zones de texte est extrait,
+dans l'ordre de lecture :
+    - une ligne de tableau dont chaque cellule tient sur une ligne donne une
+      seule ligne de texte, cellules séparées par une tabulation ;
+    - sinon les cellules sont lues l'une après l'autre (mise en page à colonnes) ;
+    - une zone de texte est lue à l'endroit de son ancre ; la variante VML de
+      compatibilité (mc:Fallback) est ignorée pour ne pas dupliquer le texte.
+
+Exemple :
+    with open("CV.docx", "rb") as f:
+        texte = "\\n".join(iter_texte_docx(f))
+"""
+import io
+import posixpath
+import zipfile
+from typing import Iterator, List
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+RELATIONS = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+
+PARTIE_PRINCIPALE = "word/document.xml"
+
+# Caractères produits par les éléments d'un run (hors w:t)
+CARACTERES = {
+    W + "tab": "\t",
+    W + "ptab": "\t",
+    W + "br": "\n",
+    W + "cr": "\n",
+    W + "noBreakHyphen": "-",
+    W + "softHyphen": "",
+}
+
+
+def _parties_en_tete(archive: zipfile.ZipFile, type_partie: str) -> List[str]:
+    """
+    Liste les parties d'en-tête ou de pied de page (type_partie "/header" ou
+    "/footer") référencées par le document, dans l'ordre des relations.
+    """
+    from lxml import etree
+
+    try:
+        relations = etree.fromstring(archive.read("word/_rels/document.xml.rels"))
+    except KeyError:
+        return []
+    parties = []
+    for relation in relations.iter(RELATIONS):
+        if relation.get("Type", "").endswith(type_partie):
+            cible = posixpath.normpath(posixpath.join("word", relation.get("Target", "")))
+            if cible in archive.namelist():
+                parties.append(cible)
+    return parties
+
+
+class _Lecteur:
+    """État de lecture d'une partie XML : paragraphes, cellules et tableaux ouverts."""
+
+    def __init__(self):
+        self.paragraphes: List[List[str]] = []
+        self.cellules: List[List[str]] = []
+        self.lignes: List[List[List[str]]] = []
+        self.sortie: List[str] = []
+
+    def emettre(self, texte: str) -> None:
+        # Dans une cellule, le texte est conservé jusqu'à la fin de la ligne du tableau
+        if self.cellules:
+            if texte.strip():
+                self.cellules[-1].append(texte)
+        else:
+            self.sortie.append(texte)
+
+    def fin_ligne_tableau(self) -> None:
+        cellules = self.lignes.pop()
+        if all(len(cellule) <= 1 for cellule in cellules):
+            ligne = "\t".join(cellule[0] for cellule in cellules if cellule)
+            if ligne:
+                self.emettre(ligne)
+        else:
+            for cellule in cellules:
+                for texte in cellule:
+                    self.emettre(texte)
+
+
+def iter_paragraphes_xml(flux) -> Iterator[str]:
+    """
+    Lit en flux une partie WordprocessingML et produit le texte de chaque
+    paragraphe (ou ligne de tableau) dans l'ordre de lecture.
+
+    Args:
+        flux: Flux binaire de la partie XML (document, en-tête ou pied de page)
+    """
+    from lxml import etree
+
+    lecteur = _Lecteur()
+    ignorer = 0
+    for evenement, element in etree.iterparse(flux, events=("start", "end")):
+        tag = element.tag
+        if tag == MC_FALLBACK:
+            ignorer += 1 if evenement == "start" else -1
+            if evenement == "end":
+                element.clear()
+            continue
+        if ignorer:
+            continue
+
+        if evenement == "start":
+            if tag == W + "p":
+                lecteur.paragraphes.append([])
+            elif tag == W + "tc":
+                lecteur.cellules.append([])
+            elif tag == W + "tr":
+                lecteur.lignes.append([])
+            continue
+
+        if tag == W + "t":
+            if lecteur.paragraphes:
+                lecteur.paragraphes[-1].append(element.text or "")
+        elif tag in CARACTERES:
+            # w:tab apparaît aussi dans les propriétés de paragraphe (taquets), hors d'un run
+            if lecteur.paragraphes and element.getparent().tag == W + "r":
+                lecteur.paragraphes[-1].append(CARACTERES[tag])
+        elif tag == W + "p":
+            texte = "".join(lecteur.paragraphes.pop())
+            # Les sauts de ligne manuels donnent des lignes distinctes
+            for ligne in texte.split("\n"):
+                lecteur.emettre(ligne)
+        elif tag == W + "tc":
+            lecteur.lignes[-1].append(lecteur.cellules.pop())
+        elif tag == W + "tr":
+            lecteur.fin_ligne_tableau()
+        else:
+            continue
+
+        # Libérer les éléments déjà lus : la mémoire reste bornée
+        element.clear()
+        if not lecteur.paragraphes and not lecteur.cellules:
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        if lecteur.sortie:
+            yield from lecteur.sortie
+            lecteur.sortie.clear()
+
+
+def iter_texte_docx(source, en_tetes: bool = True) -> Iterator[str]:
+    """
+    Produit les lignes de texte d'un fichier Word : en-têtes, corps puis pieds
+    de page. Les en-têtes et pieds de page identiques (première page, pages
+    paires...) ne sont lus qu'une fois.
+
+    Args:
+        source: Chemin, contenu (bytes) ou flux binaire du fichier .docx
+        en_tetes: Inclure les en-têtes et pieds de page
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(bytes(source))
+
+    with zipfile.ZipFile(source) as archive:
+        parties = [PARTIE_PRINCIPALE]
+        if en_tetes:
+            parties = (_parties_en_tete(archive, "/header") + parties
+                       + _parties_en_tete(archive, "/footer"))
+
+        deja_lus = set()
+        for partie in parties:
+            with archive.open(partie) as flux:
+                if partie == PARTIE_PRINCIPALE:
+                    yield from iter_paragraphes_xml(flux)
+                    continue
+                lignes = list(iter_paragraphes_xml(flux))
+            cle = "\n".join(lignes).strip()
+            if cle and cle not in deja_lus:
+                deja_lus.add(cle)
+                yield from lignes
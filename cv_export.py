@@ -0,0 +1,174 @@
+"""
+Export d'un lot de CV convertis dans une seule archive ZIP, produite en flux.
+
+Chaque CV est converti avec les documents rendus en mémoire (voir
+cv_batch.convertir_fichier sans chemin de sortie), puis écrit dans l'archive
+dès qu'il est prêt, dans l'ordre d'achèvement. L'archive est produite par
+morceaux (iter_zip_lot) : un morceau par CV terminé, puis le répertoire central.
+    - le téléchargement (ou l'écriture du fichier) commence avec le premier CV
+      terminé, pas après le dernier ;
+    - au plus `concurrence` conversions sont en cours ou en attente d'écriture :
+      la mémoire reste bornée quelle que soit la taille du lot ;
+    - aucun fichier intermédiaire n'est écrit sur disque.
+
+Un manifeste (manifeste.csv) est ajouté en fin d'archive : fichier source,
+documents, trigramme, statut, erreur et durées par étape de chaque CV.
+
+Exemple :
+    with open("lot.zip", "wb") as f:
+        for morceau in iter_zip_lot(fichiers, language="fr"):
+            f.write(morceau)
+"""
+import csv
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import BinaryIO, Callable, Iterator, List, Optional, Union
+
+from cv_batch import LANGUE_BILINGUE, ResultatConversion, chemin_sortie_en, chemins_sortie, convertir_fichier
+
+NOM_MANIFESTE = "manifeste.csv"
+COLONNES_MANIFESTE = ["source", "documents", "TRI", "statut", "erreur", "tentatives", "duree_s",
+                      "extraction_texte_s", "extraction_llm_s", "rendu_docx_s"]
+
+
+class _FluxZip(io.RawIOBase):
+    """
+    Flux en écriture seule, non positionnable, dans lequel zipfile écrit l'archive.
+    Son contenu est vidé après chaque entrée : seule l'entrée en cours est en mémoire.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._donnees = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, donnees) -> int:
+        self._donnees += donnees
+        return len(donnees)
+
+    def vider(self) -> bytes:
+        contenu = bytes(self._donnees)
+        self._donnees.clear()
+        return contenu
+
+
+def manifeste_csv(resultats: List[ResultatConversion]) -> bytes:
+    """
+    Manifeste du lot au format CSV (séparateur « ; », UTF-8 avec BOM pour Excel).
+
+    Args:
+        resultats: Résultats des conversions ; ResultatConversion.sortie contient
+            les noms des documents dans l'archive
+    """
+    texte = io.StringIO()
+    ecrivain = csv.writer(texte, delimiter=";", lineterminator="\n")
+    ecrivain.writerow(COLONNES_MANIFESTE)
+    for r in resultats:
+        ecrivain.writerow([
+            os.path.basename(r.source),
+            " ".join(filter(None, (r.sortie, r.sortie_en))),
+            r.tri,
+            r.statut,
+            r.erreur,
+            r.tentatives,
+            f"{r.duree:.3f}",
+            *(f"{r.etapes.get(etape, 0.0):.3f}" for etape in ("extraction_texte", "extraction_llm", "rendu_docx")),
+        ])
+    return texte.getvalue().encode("utf-8-sig")
+
+
+def _ecrire_entree(archive: zipfile.ZipFile, nom: str, contenu: bytes, compression: int) -> None:
+    entree = zipfile.ZipInfo(nom, date_time=time.localtime()[:6])
+    entree.compress_type = compression
+    archive.writestr(entree, contenu)
+
+
+def iter_zip_lot(fichiers: List[str], language: str = "fr", concurrence: int = 4, max_tentatives: int = 5,
+                 progression: Optional[Callable[[ResultatConversion], None]] = None) -> Iterator[bytes]:
+    """
+    Convertit un lot de CV et produit, morceau par morceau, une archive ZIP des
+    documents générés et du manifeste.
+
+    Args:
+        fichiers: Fichiers CV à convertir
+        language: Langue de génération ("fr", "en" ou LANGUE_BILINGUE)
+        concurrence: Nombre maximal de conversions en cours (borne aussi la mémoire)
+        max_tentatives: Nombre maximal de requêtes HTTP par appel LLM (nouvelles tentatives comprises)
+        progression: Callback optionnel appelé avec chaque ResultatConversion terminé
+
+    Yields:
+        Morceaux successifs de l'archive (leur concaténation est le fichier ZIP)
+    """
+    noms = chemins_sortie(fichiers, "")
+    flux = _FluxZip()
+    resultats = []
+    a_lancer = iter(enumerate(fichiers))
+    en_cours = {}
+
+    with zipfile.ZipFile(flux, "w") as archive, ThreadPoolExecutor(max_workers=max(1, concurrence)) as executor:
+        def lancer():
+            # Fenêtre glissante : un nouveau CV n'est lancé qu'une fois un document écrit
+            for i, fichier in a_lancer:
+                en_cours[executor.submit(convertir_fichier, fichier, None, language, max_tentatives)] = i
+                if len(en_cours) >= max(1, concurrence):
+                    break
+
+        lancer()
+        while en_cours:
+            termines, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+            for future in termines:
+                resultat = future.result()
+                nom = noms[en_cours.pop(future)]
+                for langue, contenu in resultat.documents.items():
+                    # Un .docx est déjà compressé : stocké tel quel
+                    nom_document = chemin_sortie_en(nom) if language == LANGUE_BILINGUE and langue == "en" else nom
+                    _ecrire_entree(archive, nom_document, contenu, zipfile.ZIP_STORED)
+                    if nom_document == nom:
+                        resultat.sortie = nom
+                    else:
+                        resultat.sortie_en = nom_document
+                resultat.documents = {}
+                resultats.append(resultat)
+                if progression:
+                    progression(resultat)
+                yield flux.vider()
+            lancer()
+
+        _ecrire_entree(archive, NOM_MANIFESTE, manifeste_csv(resultats), zipfile.ZIP_DEFLATED)
+    yield flux.vider()
+
+
+def ecrire_zip_lot(fichiers: List[str], destination: Union[str, BinaryIO], **options) -> List[ResultatConversion]:
+    """
+    Convertit un lot de CV et écrit l'archive ZIP au fil des conversions.
+
+    Args:
+        fichiers: Fichiers CV à convertir
+        destination: Chemin du fichier ZIP, ou flux binaire (ex: sys.stdout.buffer)
+        **options: Options de iter_zip_lot (language, concurrence, max_tentatives, progression)
+
+    Returns:
+        Résultats des conversions, dans l'ordre d'achèvement
+    """
+    resultats = []
+    progression = options.pop("progression", None)
+
+    def suivre(resultat: ResultatConversion):
+        resultats.append(resultat)
+        if progression:
+            progression(resultat)
+
+    flux = open(destination, "wb") if isinstance(destination, (str, os.PathLike)) else destination
+    try:
+        for morceau in iter_zip_lot(fichiers, progression=suivre, **options):
+            flux.write(morceau)
+            flux.flush()
+    finally:
+        if flux is not destination:
+            flux.close()
+    return resultats
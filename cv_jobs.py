@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+File de traitements persistante (SQLite) et processus de conversion.
+
+L'interface Streamlit ne convertit plus les CV elle-même : elle dépose un job
+(fichier, langue) dans la file puis interroge son statut. Des processus
+workers réservent les jobs un par un et exécutent la chaîne de cv_process.
+Un rechargement de page ne perd rien (un job se retrouve par son identifiant
+ou par l'empreinte du fichier et la langue), plusieurs utilisateurs partagent
+les mêmes workers, et le nombre de workers se règle sur la limite de débit de l'API.
+Pendant un traitement, le worker signale régulièrement qu'il est en vie ; il
+publie aussi ses métriques (format Prometheus) dans la base après chaque job.
+Les workers purgent toutes les heures les jobs terminés (CV et documents
+générés compris) au-delà de la durée de rétention.
+
+Configuration par variables d'environnement :
+    CV_JOBS_DB : chemin de la base SQLite (par défaut jobs.sqlite3 à côté du module)
+    CV_JOBS_WORKERS : nombre de workers lancés par l'application (2 par défaut)
+    CV_JOBS_RETENTION_JOURS : conservation des jobs terminés, en jours (7 par défaut)
+
+Les workers peuvent aussi tourner à part (autre conteneur, même volume) :
+    python cv_jobs.py --workers 4
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import closing
+from typing import List, Optional
+
+REPERTOIRE_MODULE = os.path.dirname(os.path.abspath(__file__))
+
+logger = logging.getLogger(__name__)
+
+STATUT_EN_ATTENTE = "en_attente"
+STATUT_EN_COURS = "en_cours"
+STATUT_TERMINE = "termine"
+STATUT_ERREUR = "erreur"
+
+# Un worker signale qu'il est en vie toutes les INTERVALLE_BATTEMENT secondes pendant
+# un traitement ; un job en cours sans signe de vie depuis DELAI_ABANDON (worker
+# arrêté) est remis en attente, quelle que soit la durée du traitement
+INTERVALLE_BATTEMENT = 30
+DELAI_ABANDON = 120
+MAX_TENTATIVES_JOB = 3
+# Après une erreur de la boucle (base verrouillée, disque plein), le worker attend
+# de plus en plus longtemps avant de reprendre, jusqu'à ATTENTE_MAX_ERREUR secondes
+ATTENTE_MAX_ERREUR = 60
+# Essais d'enregistrement d'un résultat déjà calculé avant de l'abandonner
+ESSAIS_ENREGISTREMENT = 5
+# Intervalle (s) entre deux purges des jobs anciens par un worker
+INTERVALLE_PURGE = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    statut TEXT NOT NULL,
+    nom_fichier TEXT NOT NULL,
+    langue TEXT NOT NULL,
+    contenu BLOB NOT NULL,
+    empreinte TEXT,
+    info TEXT,
+    resultat BLOB,
+    mesure TEXT,
+    erreur TEXT,
+    tentatives INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    cree_le REAL NOT NULL,
+    debut REAL,
+    battement REAL,
+    fin REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_statut ON jobs (statut, cree_le);
+CREATE TABLE IF NOT EXISTS metriques (
+    worker TEXT PRIMARY KEY,
+    prometheus TEXT NOT NULL,
+    maj REAL NOT NULL
+);
+"""
+
+# Colonnes ajoutées après la création du schéma, pour les bases existantes
+COLONNES_AJOUTEES = {"empreinte": "TEXT", "battement": "REAL"}
+
+
+def chemin_base_defaut() -> str:
+    return os.environ.get("CV_JOBS_DB", os.path.join(REPERTOIRE_MODULE, "jobs.sqlite3"))
+
+
+def retention_jours_defaut() -> float:
+    return float(os.environ.get("CV_JOBS_RETENTION_JOURS", "7"))
+
+
+class FileJobs:
+    """
+    File de jobs de conversion stockée dans une base SQLite (mode WAL, partageable
+    entre processus).
+
+    Args:
+        chemin: Chemin de la base (créée au besoin)
+    """
+
+    def __init__(self, chemin: Optional[str] = None):
+        self.chemin = chemin or chemin_base_defaut()
+        with closing(self._connexion()) as conn:
+            conn.executescript(SCHEMA)
+            colonnes = {ligne["name"] for ligne in conn.execute("PRAGMA table_info(jobs)")}
+            for colonne, type_sql in COLONNES_AJOUTEES.items():
+                if colonne not in colonnes:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {colonne} {type_sql}")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_empreinte ON jobs (empreinte, langue, cree_le)")
+
+    def _connexion(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.chemin, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def ajouter(self, nom_fichier: str, contenu: bytes, langue: str = "fr") -> str:
+        """
+        Dépose un CV à convertir.
+
+        Returns:
+            Identifiant du job
+        """
+        job_id = uuid.uuid4().hex
+        with closing(self._connexion()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, statut, nom_fichier, langue, contenu, empreinte, cree_le) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, STATUT_EN_ATTENTE, nom_fichier, langue, contenu, empreinte_contenu(contenu), time.time()),
+            )
+        return job_id
+
+    def trouver(self, empreinte: str, langue: str) -> Optional[str]:
+        """
+        Retrouve le job le plus récent du même fichier dans la même langue, qu'il
+        soit en attente, en cours ou terminé (après un rechargement de page, par exemple).
+
+        Args:
+            empreinte: Empreinte du contenu du fichier (empreinte_contenu)
+            langue: Langue de génération
+
+        Returns:
+            Identifiant du job, ou None si aucun job réutilisable n'existe
+        """
+        with closing(self._connexion()) as conn:
+            ligne = conn.execute(
+                "SELECT id FROM jobs WHERE empreinte = ? AND langue = ? AND statut != ? "
+                "ORDER BY cree_le DESC LIMIT 1", (empreinte, langue, STATUT_ERREUR)
+            ).fetchone()
+        return ligne["id"] if ligne is not None else None
+
+    def reserver(self, worker: str) -> Optional[sqlite3.Row]:
+        """
+        Réserve le plus ancien job en attente (transaction exclusive : un job
+        n'est jamais pris par deux workers). Les jobs abandonnés par un worker
+        arrêté (sans signe de vie depuis DELAI_ABANDON) sont d'abord remis en
+        attente, ou passés en erreur après MAX_TENTATIVES_JOB réservations.
+
+        Returns:
+            Le job réservé, ou None si la file est vide
+        """
+        conn = self._connexion()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            limite = time.time() - DELAI_ABANDON
+            conn.execute(
+                "UPDATE jobs SET statut = ?, worker = NULL "
+                "WHERE statut = ? AND COALESCE(battement, debut) < ? AND tentatives < ?",
+                (STATUT_EN_ATTENTE, STATUT_EN_COURS, limite, MAX_TENTATIVES_JOB),
+            )
+            conn.execute(
+                "UPDATE jobs SET statut = ?, erreur = ?, fin = ? WHERE statut = ? AND COALESCE(battement, debut) < ?",
+                (STATUT_ERREUR, "Job abandonné après plusieurs tentatives", time.time(), STATUT_EN_COURS, limite),
+            )
+            job = conn.execute(
+                "SELECT * FROM jobs WHERE statut = ? ORDER BY cree_le LIMIT 1", (STATUT_EN_ATTENTE,)
+            ).fetchone()
+            if job is not None:
+                conn.execute(
+                    "UPDATE jobs SET statut = ?, worker = ?, debut = ?, battement = ?, tentatives = tentatives + 1 "
+                    "WHERE id = ?",
+                    (STATUT_EN_COURS, worker, time.time(), time.time(), job["id"]),
+                )
+            conn.execute("COMMIT")
+            return job
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def signaler(self, job_id: str, worker: str) -> bool:
+        """
+        Signe de vie du worker qui traite un job.
+
+        Returns:
+            False si le job n'est plus réservé par ce worker
+        """
+        with closing(self._connexion()) as conn:
+            return conn.execute(
+                "UPDATE jobs SET battement = ? WHERE id = ? AND worker = ? AND statut = ?",
+                (time.time(), job_id, worker, STATUT_EN_COURS),
+            ).rowcount == 1
+
+    def publier_metriques(self, worker: str, prometheus: str) -> None:
+        """Enregistre l'instantané des métriques (format Prometheus) d'un worker."""
+        with closing(self._connexion()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO metriques (worker, prometheus, maj) VALUES (?, ?, ?)",
+                (worker, prometheus, time.time()),
+            )
+
+    def metriques(self) -> List[dict]:
+        """Derniers instantanés des métriques publiés par chaque worker."""
+        with closing(self._connexion()) as conn:
+            return [dict(ligne) for ligne in conn.execute("SELECT * FROM metriques ORDER BY worker")]
+
+    def terminer(self, job_id: str, worker: str, info: dict, resultat: bytes, mesure: dict) -> bool:
+        """
+        Enregistre le résultat d'un job, s'il est toujours réservé par ce worker
+        (un job repris après DELAI_ABANDON appartient à un autre worker).
+
+        Returns:
+            False si le job n'est plus réservé par ce worker (rien n'est écrit)
+        """
+        with closing(self._connexion()) as conn:
+            return conn.execute(
+                "UPDATE jobs SET statut = ?, info = ?, resultat = ?, mesure = ?, fin = ? "
+                "WHERE id = ? AND worker = ? AND statut = ?",
+                (STATUT_TERMINE, json.dumps(info, ensure_ascii=False), resultat,
+                 json.dumps(mesure, ensure_ascii=False), time.time(), job_id, worker, STATUT_EN_COURS),
+            ).rowcount == 1
+
+    def echouer(self, job_id: str, worker: str, erreur: str, mesure: Optional[dict] = None) -> bool:
+        """
+        Passe un job en erreur, s'il est toujours réservé par ce worker.
+
+        Returns:
+            False si le job n'est plus réservé par ce worker (rien n'est écrit)
+        """
+        with closing(self._connexion()) as conn:
+            return conn.execute(
+                "UPDATE jobs SET statut = ?, erreur = ?, mesure = ?, fin = ? "
+                "WHERE id = ? AND worker = ? AND statut = ?",
+                (STATUT_ERREUR, erreur, json.dumps(mesure, ensure_ascii=False) if mesure else None,
+                 time.time(), job_id, worker, STATUT_EN_COURS),
+            ).rowcount == 1
+
+    def statut(self, job_id: str) -> Optional[dict]:
+        """
+        Retourne l'état d'un job (sans le fichier source), avec sa position dans
+        la file s'il est en attente.
+        """
+        with closing(self._connexion()) as conn:
+            job = conn.execute(
+                "SELECT id, statut, nom_fichier, langue, empreinte, info, resultat, mesure, erreur, tentatives, "
+                "cree_le, debut, fin FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            etat = dict(job)
+            if etat["statut"] == STATUT_EN_ATTENTE:
+                etat["position"] = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE statut = ? AND cree_le <= ?",
+                    (STATUT_EN_ATTENTE, etat["cree_le"]),
+                ).fetchone()[0]
+        for cle in ("info", "mesure"):
+            if etat[cle] is not None:
+                etat[cle] = json.loads(etat[cle])
+        return etat
+
+    def purger(self, age_max_secondes: Optional[float] = None) -> int:
+        """
+        Supprime les jobs terminés ou en erreur plus anciens que age_max_secondes
+        (par défaut CV_JOBS_RETENTION_JOURS), ainsi que les métriques des workers
+        qui n'en publient plus depuis aussi longtemps.
+
+        Returns:
+            Nombre de jobs supprimés
+        """
+        if age_max_secondes is None:
+            age_max_secondes = retention_jours_defaut() * 24 * 3600
+        limite = time.time() - age_max_secondes
+        with closing(self._connexion()) as conn:
+            conn.execute("DELETE FROM metriques WHERE maj < ?", (limite,))
+            return conn.execute(
+                "DELETE FROM jobs WHERE statut IN (?, ?) AND fin < ?",
+                (STATUT_TERMINE, STATUT_ERREUR, limite),
+            ).rowcount
+
+
+def empreinte_contenu(contenu: bytes) -> str:
+    """Empreinte SHA-256 du contenu d'un fichier déposé."""
+    return hashlib.sha256(contenu).hexdigest()
+
+
+class _Battement:
+    """Signale périodiquement, dans un thread, que le worker traite toujours le job."""
+
+    def __init__(self, file_jobs: FileJobs, job_id: str, worker: str):
+        self._arret = threading.Event()
+        self._thread = threading.Thread(target=self._boucle, args=(file_jobs, job_id, worker), daemon=True)
+
+    def _boucle(self, file_jobs: FileJobs, job_id: str, worker: str) -> None:
+        while not self._arret.wait(INTERVALLE_BATTEMENT):
+            try:
+                file_jobs.signaler(job_id, worker)
+            except sqlite3.Error:
+                # Base momentanément verrouillée : le prochain battement suffira
+                pass
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._arret.set()
+        self._thread.join()
+
+
+def traiter_job(job) -> tuple:
+    """
+    Exécute la chaîne de conversion pour un job.
+
+    Returns:
+        Tuple (informations extraites, document généré en octets)
+    """
+    import io
+
+    from cv_batch import extraire_avec_backoff
+    from cv_process import extract_text_from_file, fill_word_template_with_lists, get_template_path
+
+    cv_content = extract_text_from_file(io.BytesIO(job["contenu"]), filename=job["nom_fichier"])
+    if not cv_content:
+        raise ValueError("Impossible d'extraire le texte du fichier")
+    info, _ = extraire_avec_backoff(cv_content, job["langue"])
+    document = fill_word_template_with_lists(get_template_path(job["langue"]), None, info, language=job["langue"])
+    return info, document
+
+
+def _enregistrer_resultat(file_jobs: FileJobs, job, worker: str, info: Optional[dict],
+                          document: Optional[bytes], mesure) -> None:
+    """
+    Enregistre le résultat d'un job, en réessayant si la base est indisponible :
+    le résultat est déjà calculé, et le battement (toujours actif) empêche qu'un
+    autre worker reprenne le job entre-temps.
+    """
+    for essai in range(1, ESSAIS_ENREGISTREMENT + 1):
+        try:
+            if info is None:
+                enregistre = file_jobs.echouer(job["id"], worker, mesure.erreur, mesure.to_dict())
+            else:
+                enregistre = file_jobs.terminer(job["id"], worker, info, document, mesure.to_dict())
+        except sqlite3.Error as e:
+            logger.warning("Enregistrement du job %s impossible (essai %d/%d) : %s",
+                           job["id"], essai, ESSAIS_ENREGISTREMENT, e)
+            time.sleep(min(ATTENTE_MAX_ERREUR, 2 ** essai))
+            continue
+        if not enregistre:
+            logger.warning("Job %s repris par un autre worker : résultat de %s ignoré", job["id"], worker)
+        return
+    logger.error("Résultat du job %s perdu : il sera retraité après DELAI_ABANDON", job["id"])
+
+
+def boucle_worker(chemin_base: Optional[str] = None, intervalle: float = 0.5, arret=None) -> None:
+    """
+    Boucle d'un worker : réserve et traite les jobs jusqu'à l'arrêt, et purge
+    les jobs anciens toutes les INTERVALLE_PURGE secondes. Une erreur (base
+    verrouillée, disque plein...) est journalisée et suivie d'une attente
+    croissante : elle n'arrête pas le worker.
+
+    Args:
+        chemin_base: Base SQLite de la file
+        intervalle: Attente (s) entre deux interrogations d'une file vide
+        arret: Événement optionnel (multiprocessing.Event) demandant l'arrêt
+    """
+    from cv_metrics import mesurer_conversion, snapshot_prometheus
+
+    file_jobs = FileJobs(chemin_base)
+    worker = f"{os.uname().nodename if hasattr(os, 'uname') else 'local'}:{os.getpid()}"
+    erreurs = 0
+    prochaine_purge = 0.0
+    while arret is None or not arret.is_set():
+        try:
+            if time.time() >= prochaine_purge:
+                file_jobs.purger()
+                prochaine_purge = time.time() + INTERVALLE_PURGE
+            job = file_jobs.reserver(worker)
+            if job is None:
+                time.sleep(intervalle)
+                erreurs = 0
+                continue
+            with _Battement(file_jobs, job["id"], worker):
+                with mesurer_conversion(source=job["nom_fichier"]) as mesure:
+                    try:
+                        info, document = traiter_job(job)
+                    except Exception as e:
+                        mesure.marquer_erreur(e)
+                        info = document = None
+                _enregistrer_resultat(file_jobs, job, worker, info, document, mesure)
+            file_jobs.publier_metriques(worker, snapshot_prometheus())
+            erreurs = 0
+        except Exception:
+            erreurs += 1
+            attente = min(ATTENTE_MAX_ERREUR, intervalle * 2 ** erreurs)
+            logger.exception("Erreur du worker %s, reprise dans %.1f s", worker, attente)
+            time.sleep(attente)
+
+
+def demarrer_workers(nombre: int, chemin_base: Optional[str] = None) -> List:
+    """
+    Lance des processus workers (démarrage "spawn" : aucun état du processus
+    parent, Streamlit compris, n'est hérité).
+
+    Returns:
+        Liste des processus lancés
+    """
+    import multiprocessing
+
+    contexte = multiprocessing.get_context("spawn")
+    chemin_base = chemin_base or chemin_base_defaut()
+    FileJobs(chemin_base)  # création du schéma avant le démarrage des workers
+    processus = []
+    for _ in range(nombre):
+        p = contexte.Process(target=boucle_worker, args=(chemin_base,), daemon=True)
+        p.start()
+        processus.append(p)
+    return processus
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Workers de conversion de CV alimentés par la file SQLite.")
+    parser.add_argument("--base", default=chemin_base_defaut(), help="Chemin de la base SQLite de la file")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("CV_JOBS_WORKERS", "2")))
+    parser.add_argument("--purger-jours", type=float, default=retention_jours_defaut(),
+                        help="Supprimer au démarrage les jobs terminés depuis plus de N jours "
+                             "(CV_JOBS_RETENTION_JOURS, 7 par défaut)")
+    args = parser.parse_args(argv)
+
+    supprimes = FileJobs(args.base).purger(args.purger_jours * 24 * 3600)
+    print(f"🧹 {supprimes} jobs anciens supprimés")
+    processus = demarrer_workers(args.workers, args.base)
+    print(f"🚀 {len(processus)} workers démarrés sur {args.base}")
+    try:
+        for p in processus:
+            p.join()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,414 @@
+"""
+Instrumentation de la chaîne de conversion des CV.
+
+Chaque conversion peut être suivie par une MesureConversion (durée de chaque
+étape, tokens consommés, appels LLM, tentatives, taille du document produit).
+Les fonctions de cv_process alimentent la mesure courante (portée par une
+ContextVar) sans avoir à la recevoir en paramètre. Les mesures terminées sont
+ajoutées à un journal JSONL et agrégées dans un registre exposé au format texte
+Prometheus.
+
+Exemple :
+    with mesurer_conversion(source="CV.pdf") as mesure:
+        texte = extract_text_from_file("CV.pdf")
+        ...
+    print(mesure.to_dict())
+    print(snapshot_prometheus())
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+# Bornes (en secondes) des histogrammes de durée d'étape
+BORNES_HISTOGRAMME = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_lock = threading.Lock()
+
+
+@dataclass
+class MesureConversion:
+    """Mesures d'une conversion de CV."""
+    source: str = ""
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    horodatage: float = field(default_factory=time.time)
+    statut: str = "ok"
+    erreur: str = ""
+    duree_totale: float = 0.0
+    etapes: Dict[str, float] = field(default_factory=dict)
+    appels_llm: int = 0
+    tokens_prompt: int = 0
+    tokens_completion: int = 0
+    tokens_texte_brut: int = 0
+    tokens_texte_compacte: int = 0
+    tentatives_supplementaires: int = 0
+    cache_hit: Optional[bool] = None
+    taille_sortie: int = 0
+    duree_llm_par_modele: Dict[str, float] = field(default_factory=dict)
+    escalade: Optional[str] = None
+    similarite: Optional[str] = None
+    sections_reextraites: int = 0
+    champs_pre_extraits: List[str] = field(default_factory=list)
+    transport: Dict[str, int] = field(default_factory=dict)
+
+    def marquer_erreur(self, erreur: Exception) -> None:
+        """Marque la conversion comme échouée."""
+        self.statut = "erreur"
+        self.erreur = f"{type(erreur).__name__}: {erreur}"
+
+    def to_dict(self) -> dict:
+        with _lock:
+            return asdict(self)
+
+
+class RegistreMetriques:
+    """Agrégats de toutes les mesures du processus, exportables au format Prometheus."""
+
+    def __init__(self):
+        self.conversions = {}
+        self.modeles_nombre = {}
+        self.modeles_somme = {}
+        self.routages = {}
+        self.routage_duree_llm = 0.0
+        self.similarites = {}
+        self.pre_extractions = {}
+        self.transport = {}
+        self.etapes_nombre = {}
+        self.etapes_somme = {}
+        self.etapes_buckets = {}
+        self.compteurs = {
+            "appels_llm": 0,
+            "tokens_prompt": 0,
+            "tokens_completion": 0,
+            "tentatives_supplementaires": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "taille_sortie_octets": 0,
+        }
+
+    def observer_etape(self, nom: str, duree: float) -> None:
+        with _lock:
+            self.etapes_nombre[nom] = self.etapes_nombre.get(nom, 0) + 1
+            self.etapes_somme[nom] = self.etapes_somme.get(nom, 0.0) + duree
+            buckets = self.etapes_buckets.setdefault(nom, [0] * len(BORNES_HISTOGRAMME))
+            for i, borne in enumerate(BORNES_HISTOGRAMME):
+                if duree <= borne:
+                    buckets[i] += 1
+
+    def incrementer(self, compteur: str, valeur: int = 1) -> None:
+        with _lock:
+            self.compteurs[compteur] += valeur
+
+    def observer_appel_modele(self, modele: str, duree: float) -> None:
+        with _lock:
+            self.modeles_nombre[modele] = self.modeles_nombre.get(modele, 0) + 1
+            self.modeles_somme[modele] = self.modeles_somme.get(modele, 0.0) + duree
+
+    def observer_routage(self, escalade: str, duree_llm: float) -> None:
+        with _lock:
+            self.routages[escalade] = self.routages.get(escalade, 0) + 1
+            self.routage_duree_llm += duree_llm
+
+    def taux_escalade(self) -> float:
+        """Part des extractions routées qui ont dû faire appel au grand modèle."""
+        with _lock:
+            total = sum(self.routages.values())
+            return (total - self.routages.get("aucune", 0)) / total if total else 0.0
+
+    def latence_economisee(self, modele_reference: str) -> float:
+        """
+        Estimation de la latence LLM économisée par le routage : durée moyenne d'un
+        appel au modèle de référence multipliée par le nombre d'extractions routées,
+        moins la durée LLM réellement passée dans ces extractions. Approximation
+        (un appel sur un morceau de CV est plus court qu'une extraction complète) ;
+        benchmarks/bench_routage.py donne une mesure exacte sur un corpus.
+        """
+        with _lock:
+            nombre = self.modeles_nombre.get(modele_reference, 0)
+            if not nombre:
+                return 0.0
+            moyenne = self.modeles_somme[modele_reference] / nombre
+            return moyenne * sum(self.routages.values()) - self.routage_duree_llm
+
+    def observer_similarite(self, resultat: str) -> None:
+        with _lock:
+            self.similarites[resultat] = self.similarites.get(resultat, 0) + 1
+
+    def observer_pre_extraction(self, champs: List[str]) -> None:
+        with _lock:
+            for champ in champs:
+                self.pre_extractions[champ] = self.pre_extractions.get(champ, 0) + 1
+
+    def observer_transport(self, evenement: str) -> None:
+        with _lock:
+            self.transport[evenement] = self.transport.get(evenement, 0) + 1
+
+    def observer_conversion(self, mesure: MesureConversion) -> None:
+        with _lock:
+            self.conversions[mesure.statut] = self.conversions.get(mesure.statut, 0) + 1
+
+    def prometheus(self) -> str:
+        """Retourne un instantané des métriques au format d'exposition texte Prometheus."""
+        with _lock:
+            lignes = [
+                "# HELP cv_conversions_total Conversions de CV terminées, par statut.",
+                "# TYPE cv_conversions_total counter",
+            ]
+            for statut, nombre in sorted(self.conversions.items()):
+                lignes.append(f'cv_conversions_total{{statut="{statut}"}} {nombre}')
+
+            lignes += [
+                "# HELP cv_etape_duree_secondes Durée de chaque étape de la conversion.",
+                "# TYPE cv_etape_duree_secondes histogram",
+            ]
+            for nom in sorted(self.etapes_nombre):
+                for borne, nombre in zip(BORNES_HISTOGRAMME, self.etapes_buckets[nom]):
+                    lignes.append(f'cv_etape_duree_secondes_bucket{{etape="{nom}",le="{borne}"}} {nombre}')
+                lignes.append(f'cv_etape_duree_secondes_bucket{{etape="{nom}",le="+Inf"}} {self.etapes_nombre[nom]}')
+                lignes.append(f'cv_etape_duree_secondes_sum{{etape="{nom}"}} {self.etapes_somme[nom]:.6f}')
+                lignes.append(f'cv_etape_duree_secondes_count{{etape="{nom}"}} {self.etapes_nombre[nom]}')
+
+            c = self.compteurs
+            lignes += [
+                "# HELP cv_appels_llm_total Appels à l'API de chat completions.",
+                "# TYPE cv_appels_llm_total counter",
+                f"cv_appels_llm_total {c['appels_llm']}",
+                "# HELP cv_tokens_total Tokens consommés, par type.",
+                "# TYPE cv_tokens_total counter",
+                f'cv_tokens_total{{type="prompt"}} {c["tokens_prompt"]}',
+                f'cv_tokens_total{{type="completion"}} {c["tokens_completion"]}',
+                "# HELP cv_tentatives_supplementaires_total Nouvelles tentatives après une erreur temporaire.",
+                "# TYPE cv_tentatives_supplementaires_total counter",
+                f"cv_tentatives_supplementaires_total {c['tentatives_supplementaires']}",
+                "# HELP cv_cache_extraction_total Consultations du cache d'extraction, par résultat.",
+                "# TYPE cv_cache_extraction_total counter",
+                f'cv_cache_extraction_total{{resultat="hit"}} {c["cache_hits"]}',
+                f'cv_cache_extraction_total{{resultat="miss"}} {c["cache_misses"]}',
+                "# HELP cv_taille_sortie_octets_total Taille cumulée des documents générés.",
+                "# TYPE cv_taille_sortie_octets_total counter",
+                f"cv_taille_sortie_octets_total {c['taille_sortie_octets']}",
+                "# HELP cv_llm_duree_secondes Durée des appels LLM, par modèle.",
+                "# TYPE cv_llm_duree_secondes summary",
+            ]
+            for modele in sorted(self.modeles_nombre):
+                lignes.append(f'cv_llm_duree_secondes_sum{{modele="{modele}"}} {self.modeles_somme[modele]:.6f}')
+                lignes.append(f'cv_llm_duree_secondes_count{{modele="{modele}"}} {self.modeles_nombre[modele]}')
+            lignes += [
+                "# HELP cv_routage_total Extractions routées (modèle rapide d'abord), par section escaladée.",
+                "# TYPE cv_routage_total counter",
+            ]
+            for escalade, nombre in sorted(self.routages.items()):
+                lignes.append(f'cv_routage_total{{escalade="{escalade}"}} {nombre}')
+            lignes += [
+                "# HELP cv_similarite_total Recherches dans l'index de similarité, par résultat.",
+                "# TYPE cv_similarite_total counter",
+            ]
+            for resultat, nombre in sorted(self.similarites.items()):
+                lignes.append(f'cv_similarite_total{{resultat="{resultat}"}} {nombre}')
+            lignes += [
+                "# HELP cv_pre_extraction_champs_total Champs remplis par la pré-extraction locale, sans le LLM.",
+                "# TYPE cv_pre_extraction_champs_total counter",
+            ]
+            for champ, nombre in sorted(self.pre_extractions.items()):
+                lignes.append(f'cv_pre_extraction_champs_total{{champ="{champ}"}} {nombre}')
+            lignes += [
+                "# HELP cv_transport_total Événements de la couche de transport (couvertures, échéances).",
+                "# TYPE cv_transport_total counter",
+            ]
+            for evenement, nombre in sorted(self.transport.items()):
+                lignes.append(f'cv_transport_total{{evenement="{evenement}"}} {nombre}')
+        return "\n".join(lignes) + "\n"
+
+
+registre = RegistreMetriques()
+
+_mesure_courante: ContextVar[Optional[MesureConversion]] = ContextVar("mesure_conversion", default=None)
+
+
+def mesure_courante() -> Optional[MesureConversion]:
+    """Retourne la mesure de la conversion en cours dans ce contexte, s'il y en a une."""
+    return _mesure_courante.get()
+
+
+def _ajouter_au_journal(mesure: MesureConversion, chemin: str) -> None:
+    ligne = json.dumps(mesure.to_dict(), ensure_ascii=False)
+    with _lock:
+        with open(chemin, "a", encoding="utf-8") as f:
+            f.write(ligne + "\n")
+
+
+@contextmanager
+def mesurer_conversion(source: str = "", journal: Optional[str] = None):
+    """
+    Suit une conversion complète. Les étapes exécutées dans le bloc alimentent
+    la mesure retournée.
+
+    Args:
+        source: Nom du fichier converti
+        journal: Fichier JSONL où ajouter la mesure (par défaut la variable
+            d'environnement CV_METRICS_JOURNAL ; aucun journal si elle est absente)
+
+    Yields:
+        MesureConversion
+    """
+    mesure = MesureConversion(source=source)
+    jeton = _mesure_courante.set(mesure)
+    debut = time.perf_counter()
+    try:
+        yield mesure
+    except BaseException as e:
+        mesure.marquer_erreur(e)
+        raise
+    finally:
+        mesure.duree_totale = time.perf_counter() - debut
+        _mesure_courante.reset(jeton)
+        registre.observer_conversion(mesure)
+        journal = journal or os.environ.get("CV_METRICS_JOURNAL")
+        if journal:
+            try:
+                _ajouter_au_journal(mesure, journal)
+            except OSError:
+                pass
+
+
+@contextmanager
+def mesurer_etape(nom: str):
+    """Mesure la durée d'une étape (cumulée si l'étape est exécutée plusieurs fois)."""
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        duree = time.perf_counter() - debut
+        registre.observer_etape(nom, duree)
+        mesure = _mesure_courante.get()
+        if mesure is not None:
+            with _lock:
+                mesure.etapes[nom] = mesure.etapes.get(nom, 0.0) + duree
+
+
+def enregistrer_usage(usage) -> None:
+    """Enregistre un appel LLM et les tokens de completion.usage."""
+    tokens_prompt = getattr(usage, "prompt_tokens", 0) or 0
+    tokens_completion = getattr(usage, "completion_tokens", 0) or 0
+    registre.incrementer("appels_llm")
+    registre.incrementer("tokens_prompt", tokens_prompt)
+    registre.incrementer("tokens_completion", tokens_completion)
+    mesure = _mesure_courante.get()
+    if mesure is not None:
+        with _lock:
+            mesure.appels_llm += 1
+            mesure.tokens_prompt += tokens_prompt
+            mesure.tokens_completion += tokens_completion
+
+
+def enregistrer_tentative() -> None:
+    """Enregistre une nouvelle tentative après une erreur temporaire."""
+    registre.incrementer("tentatives_supplementaires")
+    mesure = _mesure_courante.get()
+    if mesure is not None:
+        with _lock:
+            mesure.tentatives_supplementaires += 1
+
+
+def enregistrer_cache(hit: bool) -> None:
+    """Enregistre le résultat d'une consultation du cache d'extraction."""
+    registre.incrementer("cache_hits" if hit else "cache_misses")
+    mesure = _mesure_courante.get()
+    if mesure is not None:
+        mesure.cache_hit = hit
+
+
+def enregistrer_compaction(tokens_brut: int, tokens_compacte: int) -> None:
+    """Enregistre le nombre de tokens du texte avant et après compaction."""
+    mesure = _mesure_courante.get()
+    if mesure is not None:
+        with _lock:
+            mesure.tokens_texte_brut += tokens_brut
+            mesure.tokens_texte_compacte += tokens_compacte
+
+
+def enregistrer_taille_sortie(taille: int) -> None:
+    """Enregistre la taille (en octets) d'un document généré."""
+    registre.incrementer("taille_sortie_octets", taille)
+    mesure = _mesure_courante.get()
+    if mesure is not None:
+        with _lock:
+            mesure.taille_sortie += taille
+
+
+def enregistrer_appel_modele(modele: str, duree: float) -> None:
+    """Enregistre la durée d'un appel LLM pour un modèle donné."""
+    registre.observer_appel_modele(modele, duree)
+    mesure = _mesure_courante.get()
+    if mesure is not None:
+        with _lock:
+            mesure.duree_llm_par_modele[modele] = mesure.duree_llm_par_modele.get(modele, 0.0) + duree
+
+
+def enregistrer_routage(escalade: str, duree_llm: float) -> None:
+    """
+    Enregistre le résultat d'une extraction routée.
+
+    Args:
+        escalade: Sections réextraites par le grand modèle ("aucune", "profil",
+            "projets" ou "complete")
+        duree_llm: Durée LLM totale de l'extraction (tous modèles confondus)
+    """
+    registre.observer_routage(escalade, duree_llm)
+    mesure = _mesure_courante.get()
+    if mesure is not None:
+        mesure.escalade = escalade
+
+
+def enregistrer_similarite(resultat: str, sections_reextraites: int) -> None:
+    """
+    Enregistre le résultat de la recherche d'une version précédente du CV.
+
+    Args:
+        resultat: "nouveau" (aucune version proche), "identique" (aucune section
+            modifiée) ou "difference" (sections modifiées réextraites)
+        sections_reextraites: Nombre de sections envoyées au LLM
+    """
+    registre.observer_similarite(resultat)
+    mesure = _mesure_courante.get()
+    if mesure is not None:
+        mesure.similarite = resultat
+        mesure.sections_reextraites = sections_reextraites
+
+
+def enregistrer_pre_extraction(champs: List[str]) -> None:
+    """
+    Enregistre les champs remplis par la pré-extraction locale d'un CV.
+
+    Args:
+        champs: Champs de CVInfo retirés du schéma envoyé au LLM
+    """
+    registre.observer_pre_extraction(champs)
+    mesure = _mesure_courante.get()
+    if mesure is not None:
+        mesure.champs_pre_extraits = list(champs)
+
+
+def enregistrer_transport(evenement: str) -> None:
+    """
+    Enregistre un événement de la couche de transport.
+
+    Args:
+        evenement: "couverture" (requête de couverture envoyée), "couverture_gagnante"
+            (la couverture a répondu la première) ou "delai_depasse" (échéance atteinte)
+    """
+    registre.observer_transport(evenement)
+    mesure = _mesure_courante.get()
+    if mesure is not None:
+        with _lock:
+            mesure.transport[evenement] = mesure.transport.get(evenement, 0) + 1
+
+
+def snapshot_prometheus() -> str:
+    """Instantané des métriques agrégées du processus au format texte Prometheus."""
+    return registre.prometheus()
@@ -0,0 +1,407 @@
+"""
+Pré-extraction locale, par règles, des champs d'un CV qui n'ont pas besoin du LLM.
+
+Passe déterministe exécutée avant l'appel au LLM :
+    - coordonnées : email et téléphone, y compris aux formats internationaux
+      (+33 6 12 34 56 78, 0044 20 7946 0958, +1 (555) 123-4567...) ;
+    - âge, uniquement sous une forme explicite (« Âge : 42 », « Né le 12/03/1982 ») ;
+    - sections DIPLÔMES, LANGUES et FORMATIONS COMPLÉMENTAIRES : couples
+      année/intitulé et langue/niveau ;
+    - dates des projets, normalisées au format MM/AAAA (« Janv. 2018 » -> « 01/2018 »).
+
+Un champ n'est rempli que si la détection est sans ambiguïté : une section dont
+une seule ligne n'est pas reconnue, deux âges différents ou un « 42 ans » sans
+« Âge : » (durée d'expérience ?) laissent le champ au LLM. Les champs remplis sont retirés du schéma envoyé au LLM (moins de tokens
+de sortie, donc moins de latence) puis fusionnés avec sa réponse.
+
+Les intitulés (diplômes, langues, niveaux) ne sont pas traduits : une section
+n'est reprise que si son titre est dans la langue d'extraction demandée.
+"""
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+# +33 6 12 34 56 78, 0033 (0)6 12 34 56 78, +1 (555) 123-4567, +44 20 7946 0958
+TELEPHONE_INTERNATIONAL_RE = re.compile(r"(?<![\w+])(?:\+|00)\s?\d{1,3}(?:[\s.\-]?\(?\d{1,5}\)?){2,7}(?!\d)")
+# Mot qui annonce un numéro de téléphone sur la même ligne
+CONTEXTE_TELEPHONE_RE = re.compile(
+    r"\b(?:t[ée]l[ée]?(?:phone)?|phone|mobile|portable|gsm|cell(?:ular)?|mob)\b|[☎📞✆]", re.IGNORECASE
+)
+# Unité ou devise après le nombre : montant, pas un numéro (+150 000 000 €)
+SUITE_MONTANT_RE = re.compile(r"^\s*(?:€|\$|£|%|k€|m€|eur|euros?|usd|m2|m²|m3|h\b|heures|k\b|m\b)", re.IGNORECASE)
+# Indicatifs pays (UIT) et longueur du numéro national correspondant, pour les
+# numéros internationaux sans mot « Tél » sur la ligne
+LONGUEURS_NATIONALES = {
+    "1": (10, 10), "7": (10, 10), "33": (9, 9), "32": (8, 9), "34": (9, 9), "39": (6, 11), "41": (9, 9),
+    "44": (9, 10), "49": (6, 11), "31": (9, 9), "351": (9, 9), "352": (6, 11), "212": (9, 9),
+    "213": (8, 9), "216": (8, 8), "221": (9, 9), "225": (8, 10), "237": (8, 9), "242": (9, 9),
+    "243": (9, 9), "971": (8, 9), "974": (8, 8), "966": (9, 9), "91": (10, 10), "86": (10, 11),
+    "81": (9, 10), "61": (9, 9), "55": (10, 11), "52": (10, 10), "90": (10, 10), "40": (9, 9),
+    "48": (9, 9), "43": (6, 13), "45": (8, 8), "46": (7, 9), "47": (8, 8), "30": (10, 10),
+    "20": (9, 10), "27": (9, 9), "65": (8, 8), "852": (8, 8), "262": (9, 9), "590": (9, 9),
+    "594": (9, 9), "596": (9, 9), "687": (6, 6), "689": (6, 8),
+}
+# Numéro national à 10 chiffres groupés par deux (06 12 34 56 78, 01.23.45.67.89)
+TELEPHONE_NATIONAL_RE = re.compile(r"(\d{2}(?:[\s\.-]?\d{2}){4})")
+
+ANNEE_RE = r"(?:19|20)\d{2}"
+# Seule la forme « Âge : 42 » est retenue : « 20 ans » peut être une durée d'expérience
+AGE_RE = re.compile(r"\b(?:âge|age)\s*:\s*(\d{2})\b", re.IGNORECASE)
+NAISSANCE_RE = re.compile(
+    r"\b(?:né|née|born)\s+(?:le\s+|on\s+)?(\d{1,2})[/.-](\d{1,2})[/.-](" + ANNEE_RE + r")\b",
+    re.IGNORECASE,
+)
+AGE_MIN, AGE_MAX = 16, 75
+
+MOIS = {
+    "janv": 1, "jan": 1, "janvier": 1, "january": 1,
+    "fevr": 2, "fev": 2, "fevrier": 2, "feb": 2, "february": 2,
+    "mars": 3, "mar": 3, "march": 3,
+    "avr": 4, "avril": 4, "apr": 4, "april": 4,
+    "mai": 5, "may": 5,
+    "juin": 6, "jun": 6, "june": 6,
+    "juil": 7, "juillet": 7, "jul": 7, "july": 7,
+    "aout": 8, "aug": 8, "august": 8,
+    "sept": 9, "sep": 9, "septembre": 9, "september": 9,
+    "oct": 10, "octobre": 10, "october": 10,
+    "nov": 11, "novembre": 11, "november": 11,
+    "dec": 12, "decembre": 12, "december": 12,
+}
+# Appliquées aux valeurs normalisées (minuscules sans accents, « . » et « - » remplacés par un espace)
+DATE_NUMERIQUE_RE = re.compile(r"^(\d{1,2})\s*/?\s*(" + ANNEE_RE + r")$")
+DATE_MOIS_RE = re.compile(r"^([a-z]+)\.?\s*(" + ANNEE_RE + r")$")
+
+# Titres de section (normalisés), par champ et par langue
+TITRES_SECTIONS = {
+    "Diplômes": {
+        "fr": {"diplomes", "diplome", "formation", "formation initiale", "formation academique",
+               "etudes", "cursus", "diplomes obtenus"},
+        "en": {"education", "degrees", "academic background", "academic qualifications"},
+    },
+    "Langues": {
+        "fr": {"langues", "langue", "langues etrangeres", "langues parlees", "competences linguistiques"},
+        "en": {"languages", "language skills", "language"},
+    },
+    "Formations_complémentaires": {
+        "fr": {"formations complementaires", "formation complementaire", "formations continues",
+               "formation continue", "formations professionnelles", "stages et formations"},
+        "en": {"additional training", "trainings", "training", "professional training",
+               "continuing education"},
+    },
+}
+# Autres titres qui terminent une section
+AUTRES_TITRES = {
+    "domaines d expertise", "expertise", "competences", "competences techniques", "secteurs", "outils",
+    "habilitations", "certifications", "experiences", "experiences professionnelles",
+    "experience professionnelle", "parcours professionnel", "references", "centres d interet",
+    "loisirs", "divers", "informations complementaires", "skills", "technical skills", "sectors",
+    "tools", "experience", "professional experience", "work experience", "interests", "hobbies",
+    "references projets", "profil", "profile", "summary", "resume",
+}
+TITRES_CONNUS = AUTRES_TITRES.union(*(titres for langues in TITRES_SECTIONS.values() for titres in langues.values()))
+
+LANGUES_CONNUES = {
+    # français
+    "anglais", "francais", "espagnol", "allemand", "italien", "portugais", "arabe", "chinois",
+    "mandarin", "cantonais", "japonais", "russe", "neerlandais", "polonais", "roumain", "turc", "grec",
+    "hindi", "coreen", "suedois", "norvegien", "danois", "finnois", "tcheque", "hongrois", "hebreu",
+    "vietnamien", "thai", "persan", "farsi", "ukrainien", "creole", "wolof", "lingala", "swahili",
+    "bulgare", "croate", "serbe", "slovaque", "indonesien", "malais", "catalan", "ourdou", "bengali",
+    "tamoul", "berbere", "kabyle", "malgache", "albanais", "armenien",
+    # anglais
+    "english", "french", "spanish", "german", "italian", "portuguese", "arabic", "chinese", "cantonese",
+    "japanese", "russian", "dutch", "polish", "romanian", "turkish", "greek", "korean", "swedish",
+    "norwegian", "danish", "finnish", "czech", "hungarian", "hebrew", "vietnamese", "persian",
+    "ukrainian", "creole", "bulgarian", "croatian", "serbian", "slovak", "indonesian", "malay",
+    "catalan", "urdu", "tamil", "berber", "malagasy", "albanian", "armenian",
+}
+MOTS_NIVEAUX = {
+    "courant", "courante", "bilingue", "natif", "native", "langue", "maternelle", "intermediaire",
+    "notions", "notion", "debutant", "debutante", "professionnel", "professionnelle", "operationnel",
+    "operationnelle", "scolaire", "avance", "avancee", "elementaire", "lu", "ecrit", "parle", "bon",
+    "bonne", "tres", "maitrise", "niveau", "de", "et", "base", "bases", "technique", "correct",
+    "fluent", "fluency", "intermediate", "basic", "beginner", "advanced", "professional", "working",
+    "proficiency", "mother", "tongue", "elementary", "good", "full", "limited", "upper", "pre", "level",
+    "read", "written", "spoken", "and", "very", "native", "speaker",
+    "toeic", "toefl", "ielts", "cambridge", "dele", "goethe", "delf", "dalf",
+    "a1", "a2", "b1", "b2", "c1", "c2",
+}
+
+
+@dataclass
+class PreExtraction:
+    """Résultat de la pré-extraction locale d'un CV."""
+    champs: Dict[str, object] = field(default_factory=dict)
+
+    @property
+    def exclus(self) -> frozenset:
+        """Champs de CVInfo que le LLM n'a plus à extraire."""
+        return frozenset(self.champs)
+
+
+def _normaliser(valeur: str) -> str:
+    valeur = unicodedata.normalize("NFKD", valeur or "").encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9/]+", " ", valeur.lower()).strip()
+
+
+def extraire_email(texte: str) -> str:
+    """Premier email du texte, ou chaîne vide."""
+    match = EMAIL_RE.search(texte)
+    return match.group(0) if match else ""
+
+
+def formater_telephone(brut: str) -> str:
+    """
+    Met un numéro de téléphone au format du modèle de CV :
+        - numéro français (national ou +33 / 0033) : XX.XX.XX.XX.XX ;
+        - autre numéro international : +indicatif et groupes séparés par des espaces.
+    """
+    international = brut.lstrip().startswith(("+", "00"))
+    sans_zero = re.sub(r"\(0\)", "", brut)
+    chiffres = re.sub(r"\D", "", sans_zero)
+    if international:
+        chiffres = chiffres[2:] if brut.lstrip().startswith("00") else chiffres
+        if chiffres.startswith("33") and len(chiffres) == 11:
+            chiffres = "0" + chiffres[2:]
+        else:
+            groupes = re.findall(r"\d+", re.sub(r"^\s*(\+|00)\s*", "", sans_zero))
+            return "+" + " ".join(groupes)
+    if len(chiffres) == 10:
+        return ".".join(chiffres[i:i + 2] for i in range(0, 10, 2))
+    return brut.strip()
+
+
+def _est_telephone_international(texte: str, match: re.Match) -> bool:
+    """
+    Un numéro au format international n'est retenu que s'il est annoncé sur sa
+    ligne (« Tél », « Mobile »...) ou si son indicatif pays est connu et que la
+    longueur du numéro national correspond. Jamais s'il est suivi d'une devise
+    ou d'une unité.
+    """
+    if SUITE_MONTANT_RE.match(texte, match.end()):
+        return False
+    chiffres = re.sub(r"\D", "", re.sub(r"\(0\)", "", match.group(0)))
+    if match.group(0).lstrip().startswith("00"):
+        chiffres = chiffres[2:]
+    if not 8 <= len(chiffres) <= 15:
+        return False
+    debut_ligne = texte.rfind("\n", 0, match.start()) + 1
+    fin_ligne = texte.find("\n", match.end())
+    if CONTEXTE_TELEPHONE_RE.search(texte[debut_ligne:fin_ligne if fin_ligne >= 0 else len(texte)]):
+        return True
+    for longueur_indicatif in (1, 2, 3):
+        longueurs = LONGUEURS_NATIONALES.get(chiffres[:longueur_indicatif])
+        if longueurs and longueurs[0] <= len(chiffres) - longueur_indicatif <= longueurs[1]:
+            return True
+    return False
+
+
+def extraire_telephone(texte: str) -> str:
+    """
+    Premier numéro de téléphone du texte, dans l'ordre du texte, formaté (voir
+    formater_telephone). Un numéro au format international doit être annoncé
+    (« Tél ») ou avoir un indicatif connu (voir _est_telephone_international).
+    Chaîne vide si aucun numéro n'est trouvé.
+    """
+    candidats = [
+        (match.start(), match.group(0)) for match in TELEPHONE_INTERNATIONAL_RE.finditer(texte)
+        if _est_telephone_international(texte, match)
+    ]
+    match = TELEPHONE_NATIONAL_RE.search(texte)
+    if match:
+        candidats.append((match.start(), match.group(1)))
+    return formater_telephone(min(candidats)[1]) if candidats else ""
+
+
+def extraire_age(texte: str, aujourd_hui: Optional[date] = None) -> str:
+    """
+    Âge du candidat : mention explicite (« Âge : 42 ») ou date de naissance.
+    Un « 42 ans » seul (« Expérience : 20 ans ») est laissé au LLM.
+
+    Returns:
+        L'âge, ou une chaîne vide s'il est absent ou ambigu
+    """
+    aujourd_hui = aujourd_hui or date.today()
+    candidats = set()
+    for ligne in texte.split("\n"):
+        for match in AGE_RE.finditer(ligne):
+            candidats.add(int(match.group(1)))
+        for match in NAISSANCE_RE.finditer(ligne):
+            jour, mois, annee = (int(g) for g in match.groups())
+            if 1 <= mois <= 12:
+                candidats.add(aujourd_hui.year - annee - ((aujourd_hui.month, aujourd_hui.day) < (mois, jour)))
+    candidats = {age for age in candidats if AGE_MIN <= age <= AGE_MAX}
+    return str(candidats.pop()) if len(candidats) == 1 else ""
+
+
+def normaliser_date(valeur: str) -> Optional[str]:
+    """
+    Met une date de projet au format MM/AAAA (« 3/2019 », « 03-2019 »,
+    « Janv. 2018 », « September 2021 »).
+
+    Returns:
+        La date normalisée, ou None si la valeur n'est pas une date avec mois
+        (année seule, « aujourd'hui »...)
+    """
+    valeur = _normaliser(valeur)
+    match = DATE_NUMERIQUE_RE.match(valeur)
+    if match:
+        mois, annee = int(match.group(1)), match.group(2)
+    else:
+        match = DATE_MOIS_RE.match(valeur)
+        if not match or match.group(1) not in MOIS:
+            return None
+        mois, annee = MOIS[match.group(1)], match.group(2)
+    return f"{mois:02d}/{annee}" if 1 <= mois <= 12 else None
+
+
+def normaliser_dates_projets(projets: List[dict]) -> List[dict]:
+    """Normalise au format MM/AAAA les dates de début et de fin des projets (sur place)."""
+    for projet in projets or []:
+        for cle in ("DATE_DEBUT", "DATE_FIN"):
+            date_normalisee = normaliser_date(projet.get(cle) or "")
+            if date_normalisee:
+                projet[cle] = date_normalisee
+    return projets
+
+
+def _titre(ligne: str) -> Tuple[Optional[str], str]:
+    """
+    Reconnaît un titre de section en début de ligne (« LANGUES », « Langues : Anglais
+    (courant) »).
+
+    Returns:
+        Tuple (titre normalisé ou None, reste de la ligne après le titre)
+    """
+    tete, separateur, reste = ligne.partition(":")
+    titre = _normaliser(tete)
+    if titre in TITRES_CONNUS:
+        return titre, reste.strip() if separateur else ""
+    return None, ""
+
+
+def decouper_sections(texte: str) -> Dict[str, List[List[str]]]:
+    """
+    Regroupe les lignes du texte sous le titre de section qui les précède.
+
+    Returns:
+        Dictionnaire {titre normalisé: [lignes de chaque occurrence de la section]}
+    """
+    sections: Dict[str, List[List[str]]] = {}
+    courante: Optional[List[str]] = None
+    for ligne in texte.split("\n"):
+        ligne = re.sub(r"^[-•*]\s+", "", ligne.strip())
+        titre, reste = _titre(ligne)
+        if titre is not None:
+            courante = []
+            sections.setdefault(titre, []).append(courante)
+            ligne = reste
+        if courante is not None and ligne:
+            courante.append(ligne)
+    return sections
+
+
+def _lignes_section(sections: Dict[str, List[List[str]]], champ: str, language: str) -> Optional[List[str]]:
+    """Lignes de la section d'un champ, si elle apparaît une seule fois avec un titre dans la langue demandée."""
+    occurrences = {
+        langue: [lignes for titre in titres for lignes in sections.get(titre, [])]
+        for langue, titres in TITRES_SECTIONS[champ].items()
+    }
+    dans_la_langue = occurrences.pop(language, [])
+    if len(dans_la_langue) != 1 or any(occurrences.values()):
+        return None
+    return dans_la_langue[0]
+
+
+def _annee_intitule(ligne: str) -> Optional[Tuple[str, str]]:
+    """
+    Sépare l'année et l'intitulé d'une ligne de diplôme ou de formation
+    (« 2004 Diplôme d'ingénieur », « 2002 - 2004 : Master », « DUT Génie civil (2001) »).
+    Pour une période, l'année retenue est celle de fin.
+    """
+    match = re.match(rf"^(?:\d{{1,2}}/)?({ANNEE_RE})(?:\s*[-–—à]\s*(?:\d{{1,2}}/)?({ANNEE_RE}))?\s*[:,\-–—]?\s+(.+)$", ligne)
+    if match:
+        annee, intitule = match.group(2) or match.group(1), match.group(3)
+    else:
+        match = re.match(rf"^(.+?)[\s,:\-–—(]+(?:{ANNEE_RE}\s*[-–—à]\s*)?({ANNEE_RE})\)?\.?$", ligne)
+        if not match:
+            return None
+        intitule, annee = match.group(1), match.group(2)
+    intitule = intitule.strip(" ,:-–—")
+    if not re.search(r"[^\W\d_]", intitule) or re.search(ANNEE_RE, intitule):
+        return None
+    return annee, intitule
+
+
+def _langue_niveau(partie: str) -> Optional[Tuple[str, str]]:
+    """Sépare une langue connue et son niveau (« Anglais Courant », « English: fluent (C1) »)."""
+    match = re.match(r"^([^\W\d_]+)\s*[:\-–—(]?\s*(.+?)\)?$", partie.strip())
+    if not match or _normaliser(match.group(1)) not in LANGUES_CONNUES:
+        return None
+    niveau = match.group(2).strip(" :-–—()")
+    mots = _normaliser(niveau).replace("/", " ").split()
+    if not mots or not all(mot in MOTS_NIVEAUX or mot.isdigit() for mot in mots):
+        return None
+    return match.group(1).capitalize(), niveau[0].upper() + niveau[1:]
+
+
+def _extraire_langues(lignes: List[str]) -> Optional[List[dict]]:
+    langues = []
+    for ligne in lignes:
+        couple = _langue_niveau(ligne)
+        if couple is not None:
+            langues.append([couple])
+            continue
+        # Plusieurs langues sur une ligne : « Anglais (courant), Espagnol (notions) »
+        couples = [_langue_niveau(partie) for partie in re.split(r"[,;|/]\s*(?=[^\W\d_]+\s*[:\-–—(])", ligne)]
+        if len(couples) < 2 or None in couples:
+            return None
+        langues.append(couples)
+    return [{"LANGUE": langue, "NIVEAU": niveau} for couples in langues for langue, niveau in couples]
+
+
+def _extraire_annees_intitules(lignes: List[str], cle_annee: str, cle_intitule: str) -> Optional[List[dict]]:
+    elements = []
+    for ligne in lignes:
+        couple = _annee_intitule(ligne)
+        if couple is None:
+            return None
+        elements.append({cle_annee: couple[0], cle_intitule: couple[1]})
+    return elements
+
+
+def pre_extraire(texte: str, language: str = "fr") -> PreExtraction:
+    """
+    Extrait localement les champs d'un CV détectables sans ambiguïté.
+
+    Args:
+        texte: Texte du CV (brut ou compacté)
+        language: Langue d'extraction ; les sections dont le titre est dans une
+            autre langue sont laissées au LLM (traduction des intitulés)
+
+    Returns:
+        PreExtraction : champs de CVInfo remplis (AGE, Diplômes, Langues,
+        Formations_complémentaires). L'email et le téléphone, hors CVInfo, sont
+        extraits par completer_info (extraire_email, extraire_telephone).
+    """
+    resultat = PreExtraction()
+    age = extraire_age(texte)
+    if age:
+        resultat.champs["AGE"] = age
+
+    sections = decouper_sections(texte)
+    extracteurs = {
+        "Diplômes": lambda lignes: _extraire_annees_intitules(lignes, "ANNEE_DIPLOME", "INTITULE_DIPLOME"),
+        "Langues": _extraire_langues,
+        "Formations_complémentaires": lambda lignes: _extraire_annees_intitules(
+            lignes, "ANNEE_FORMATION", "INTITULE_FORMATION"),
+    }
+    for champ, extracteur in extracteurs.items():
+        lignes = _lignes_section(sections, champ, language)
+        valeur = extracteur(lignes) if lignes else None
+        if valeur:
+            resultat.champs[champ] = valeur
+    return resultat
@@ -1,23 +1,224 @@
-from docx import Document
-import openai
+import copy
+import io
 import json
+import logging
 import os
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT  # Pour aligner les paragraphes
-from docx.shared import Inches  # Pour définir les positions en pouces
-import docx2txt
-import streamlit as st
-import tempfile
 import re
+import sqlite3
+import threading
+import time
+from contextvars import copy_context
 from datetime import datetime
-from pydantic import BaseModel, Field
-from typing import List
-from openai import OpenAI
-import fitz  # PyMuPDF
+from functools import lru_cache
+from itertools import repeat
+from typing import Iterator, List, Optional
 
+from pydantic import BaseModel, Field, ValidationError, create_model, field_validator, model_validator
 
-openai.api_key = st.secrets["OPENAI_API_KEY"]
+from cv_cache import CacheExtraction, empreinte_schema
+from cv_compaction import SEPARATEUR_PAGES, compacter_texte
+from cv_decoupage import PLAGE_DATES_RE, decouper_en_morceaux, decouper_en_sections, fusionner_projets, normaliser
+from cv_docx import iter_texte_docx
+from cv_metrics import (
+    enregistrer_appel_modele,
+    enregistrer_cache,
+    enregistrer_compaction,
+    enregistrer_pre_extraction,
+    enregistrer_routage,
+    enregistrer_similarite,
+    enregistrer_taille_sortie,
+    enregistrer_usage,
+    mesurer_etape,
+)
+from cv_pre_extraction import (
+    PreExtraction,
+    extraire_email,
+    extraire_telephone,
+    normaliser_dates_projets,
+    pre_extraire,
+)
+from cv_similarite import CVSimilaire, IndexSimilarite, empreinte_section, signature_minhash
+from cv_template import compiler_template
+from cv_transport import ConfigTransport, Transport, creer_client_http, echeance
 
-client = OpenAI()
+# Les dépendances lourdes (openai, PyMuPDF, python-docx, streamlit) sont importées
+# à la première utilisation : un script qui n'a besoin que de extract_text_from_file
+# ou de generate_trigramme ne paie pas leur coût d'import, et le module se charge
+# sans fichier de secrets Streamlit.
+
+logger = logging.getLogger(__name__)
+
+
+def _cle_depuis_environnement() -> Optional[str]:
+    return os.environ.get("OPENAI_API_KEY")
+
+
+def _cle_depuis_fichier() -> Optional[str]:
+    chemin = os.environ.get("OPENAI_API_KEY_FILE")
+    if not chemin:
+        return None
+    try:
+        with open(chemin, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _cle_depuis_secrets_streamlit() -> Optional[str]:
+    try:
+        import streamlit as st
+        return st.secrets.get("OPENAI_API_KEY")
+    except Exception:
+        # Pas de fichier secrets.toml (script, worker, tests...)
+        return None
+
+
+SOURCES_CLE_API = {
+    "env": _cle_depuis_environnement,
+    "fichier": _cle_depuis_fichier,
+    "streamlit": _cle_depuis_secrets_streamlit,
+}
+
+
+def resoudre_cle_api() -> str:
+    """
+    Cherche la clé API OpenAI dans les sources configurées, dans l'ordre.
+
+    L'ordre est défini par la variable d'environnement CV_SOURCES_CLE_API
+    (par défaut "env,fichier,streamlit") :
+        env : variable OPENAI_API_KEY
+        fichier : fichier dont le chemin est donné par OPENAI_API_KEY_FILE
+        streamlit : st.secrets["OPENAI_API_KEY"]
+
+    Returns:
+        La première clé trouvée
+    """
+    noms_sources = os.environ.get("CV_SOURCES_CLE_API", "env,fichier,streamlit")
+    for nom in noms_sources.split(","):
+        source = SOURCES_CLE_API.get(nom.strip())
+        if source is None:
+            raise ValueError(f"Source de clé API inconnue : {nom!r} (sources possibles : {', '.join(SOURCES_CLE_API)})")
+        cle = source()
+        if cle:
+            return cle
+    raise RuntimeError(f"Clé API OpenAI introuvable (sources consultées : {noms_sources})")
+
+
+_client = None
+_client_lock = threading.Lock()
+_transport = None
+
+
+def get_transport() -> Transport:
+    """
+    Retourne la couche de transport partagée (échéances, nouvelles tentatives,
+    requêtes couvertes), configurée par les variables d'environnement au premier
+    appel (voir ConfigTransport.depuis_environnement).
+    """
+    global _transport
+    if _transport is None:
+        with _client_lock:
+            if _transport is None:
+                _transport = Transport(ConfigTransport.depuis_environnement())
+    return _transport
+
+
+def configurer_transport(config: Optional[ConfigTransport] = None, **options) -> Transport:
+    """
+    Remplace la couche de transport partagée.
+
+    Args:
+        config: Configuration complète
+        **options: À défaut de config, champs de ConfigTransport (couverture=True...)
+
+    Returns:
+        La nouvelle couche de transport
+    """
+    global _transport
+    transport = Transport(config or ConfigTransport(**options))
+    with _client_lock:
+        _transport = transport
+    return transport
+
+
+def _options_client(options: dict, config: ConfigTransport) -> dict:
+    """
+    Options par défaut du client OpenAI : connexion HTTP partagée (pool keep-alive)
+    et pas de nouvelles tentatives internes au SDK, gérées par la couche de transport.
+    """
+    if "http_client" not in options:
+        options["http_client"] = creer_client_http(config)
+    options.setdefault("max_retries", 0)
+    return options
+
+
+def get_client():
+    """
+    Retourne le client OpenAI partagé, créé au premier appel.
+
+    Returns:
+        Instance openai.OpenAI
+    """
+    global _client
+    if _client is None:
+        config = get_transport().config
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=resoudre_cle_api(), **_options_client({}, config))
+    return _client
+
+
+def configurer_client(client=None, **options):
+    """
+    Remplace le client OpenAI partagé.
+
+    Args:
+        client: Client déjà construit (ex: client pointant vers un serveur local)
+        **options: À défaut de client, options passées à openai.OpenAI
+            (base_url, timeout...). La clé API est résolue si elle n'est pas fournie.
+
+    Returns:
+        Le nouveau client
+    """
+    global _client
+    if client is None:
+        from openai import OpenAI
+        if "api_key" not in options:
+            options["api_key"] = resoudre_cle_api()
+        client = OpenAI(**_options_client(options, get_transport().config))
+    with _client_lock:
+        _client = client
+    return client
+
+
+def __getattr__(name):
+    # Compatibilité : cv_process.client reste accessible, mais n'est créé qu'à la demande
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+REPERTOIRE_MODULE = os.path.dirname(os.path.abspath(__file__))
+
+TEMPLATES_PAR_LANGUE = {
+    "fr": "template_cv_p.docx",
+    "en": "template_cv_p_en.docx",
+}
+
+
+def get_template_path(language: str = "fr") -> str:
+    """
+    Retourne le chemin absolu du modèle Word associé à une langue.
+
+    Args:
+        language: Code langue ("fr" ou "en")
+
+    Returns:
+        Chemin vers le modèle Word (le modèle français par défaut)
+    """
+    nom_template = TEMPLATES_PAR_LANGUE.get(language, TEMPLATES_PAR_LANGUE["fr"])
+    return os.path.join(REPERTOIRE_MODULE, nom_template)
 
 
 def preprocess_text(text: str) -> str:
@@ -42,42 +243,161 @@ def preprocess_text(text: str) -> str:
     return text.strip()
 
 
-def extract_text_from_pdf(file_path: str) -> str:
+_pool_pages = None
+_pool_pages_lock = threading.Lock()
+
+
+def _get_pool_pages():
+    """
+    Pool de processus partagé du mode parallèle (créé au premier appel). Les
+    processus sont lancés en « spawn » : un fork depuis un processus multithreadé
+    (lots concurrents, threads du transport) peut se bloquer sur un verrou hérité.
+    """
+    global _pool_pages
+    if _pool_pages is None:
+        with _pool_pages_lock:
+            if _pool_pages is None:
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                _pool_pages = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                                  mp_context=multiprocessing.get_context("spawn"))
+    return _pool_pages
+
+
+def _reinitialiser_pool_pages(pool) -> None:
+    """Abandonne un pool cassé (processus tué) : le suivant est créé au prochain appel."""
+    global _pool_pages
+    with _pool_pages_lock:
+        if _pool_pages is pool:
+            _pool_pages = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _ouvrir_pdf(source):
+    """Ouvre un PDF avec PyMuPDF depuis un chemin ou directement depuis des octets."""
+    import fitz  # PyMuPDF
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=bytes(source), filetype="pdf")
+    return fitz.open(source)
+
+
+def iter_pdf_pages(source, debut: int = 0, fin: Optional[int] = None) -> Iterator[str]:
+    """
+    Générateur du texte brut de chaque page d'un PDF.
+
+    Args:
+        source: Chemin du fichier ou contenu du PDF (bytes)
+        debut: Index de la première page (incluse)
+        fin: Index de la dernière page (exclue), None pour aller jusqu'à la fin
+
+    Yields:
+        Texte de chaque page, dans l'ordre
+    """
+    doc = _ouvrir_pdf(source)
+    try:
+        fin = doc.page_count if fin is None else min(fin, doc.page_count)
+        for numero in range(debut, fin):
+            yield doc[numero].get_text()
+    finally:
+        doc.close()
+
+
+def _extraire_plage_pages(data: bytes, debut: int, fin: int) -> str:
+    """Extrait le texte d'une plage de pages (exécuté dans un processus du pool)."""
+    return SEPARATEUR_PAGES.join(iter_pdf_pages(data, debut, fin))
+
+
+def extract_text_from_pdf_bytes(data, parallel: bool = False,
+                                max_workers: Optional[int] = None) -> str:
+    """
+    Extrait le texte d'un PDF en mémoire, sans passer par un fichier temporaire.
+
+    Les pages sont lues une à une et le texte n'est concaténé qu'une seule fois,
+    avec SEPARATEUR_PAGES entre deux pages (utilisé par la compaction).
+    Pour les très gros documents, les plages de pages peuvent être extraites en
+    parallèle dans un pool de processus partagé ; le résultat est identique au
+    mode série. Le gain reste faible sur un CV (quelques ms) : le mode est désactivé
+    par défaut.
+
+    Args:
+        data: Contenu du PDF (bytes ou flux binaire ouvert)
+        parallel: Activer le mode parallèle
+        max_workers: Nombre maximal de plages extraites en parallèle (par défaut le nombre de CPU)
+
+    Returns:
+        Texte extrait et nettoyé du PDF
+    """
+    import fitz  # PyMuPDF
+
+    try:
+        if hasattr(data, "read"):
+            data = data.read()
+        data = bytes(data)
+
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            nb_pages = doc.page_count
+
+        nb_workers = min(max_workers or os.cpu_count() or 1, nb_pages)
+
+        if parallel and nb_workers > 1:
+            taille_plage = -(-nb_pages // nb_workers)
+            debuts = list(range(0, nb_pages, taille_plage))
+            fins = [min(debut + taille_plage, nb_pages) for debut in debuts]
+            from concurrent.futures.process import BrokenProcessPool
+
+            pool = _get_pool_pages()
+            try:
+                text = SEPARATEUR_PAGES.join(pool.map(_extraire_plage_pages, repeat(data), debuts, fins))
+            except BrokenProcessPool:
+                # Un processus du pool est mort (mémoire, signal) : extraction en série
+                _reinitialiser_pool_pages(pool)
+                text = SEPARATEUR_PAGES.join(iter_pdf_pages(data))
+        else:
+            text = SEPARATEUR_PAGES.join(iter_pdf_pages(data))
+
+        return preprocess_text(text)
+
+    except Exception as e:
+        raise Exception(f"Erreur lors de l'extraction PDF: {str(e)}")
+
+
+def extract_text_from_pdf(file_path: str, parallel: bool = False) -> str:
     """
     Extrait le texte d'un fichier PDF avec preprocessing.
     
     Args:
         file_path: Chemin vers le fichier PDF
+        parallel: Mode d'extraction parallèle (voir extract_text_from_pdf_bytes)
         
     Returns:
         Texte extrait et nettoyé du PDF
     """
     try:
-        doc = fitz.open(file_path)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        doc.close()
-        
-        return preprocess_text(text)
-        
-    except Exception as e:
+        with open(file_path, "rb") as f:
+            data = f.read()
+    except OSError as e:
         raise Exception(f"Erreur lors de l'extraction PDF: {str(e)}")
 
+    return extract_text_from_pdf_bytes(data, parallel=parallel)
 
-def extract_text_from_word(file_path: str) -> str:
+
+def extract_text_from_word(file_path) -> str:
     """
     Extrait le texte d'un fichier Word avec preprocessing.
+
+    Le fichier est lu en flux (voir cv_docx) : en-têtes, pieds de page, tableaux
+    et zones de texte sont inclus, dans l'ordre de lecture.
     
     Args:
-        file_path: Chemin vers le fichier Word
+        file_path: Chemin vers le fichier Word, contenu (bytes) ou flux binaire
         
     Returns:
         Texte extrait et nettoyé du fichier Word
     """
     try:
-        document = Document(file_path)
-        text = "\n".join([paragraph.text for paragraph in document.paragraphs])
+        text = "\n".join(iter_texte_docx(file_path))
         
         return preprocess_text(text)
         
@@ -85,22 +405,46 @@ def extract_text_from_word(file_path: str) -> str:
         raise Exception(f"Erreur lors de l'extraction Word: {str(e)}")
 
 
-def extract_text_from_file(file_path: str) -> str:
+def _lire_octets(source) -> bytes:
+    """Lit le contenu d'un flux binaire (UploadedFile Streamlit, BytesIO, fichier ouvert) ou de bytes."""
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    if hasattr(source, "read"):
+        return source.read()
+    return bytes(source)
+
+
+def extract_text_from_file(file_path, filename: Optional[str] = None) -> str:
     """
     Extrait le texte d'un fichier, qu'il soit PDF ou Word.
 
+    Le fichier peut être fourni par son chemin ou directement en mémoire
+    (bytes, BytesIO, UploadedFile Streamlit) : aucun fichier temporaire n'est écrit.
+
     Args:
-        file_path: Chemin vers le fichier
+        file_path: Chemin vers le fichier, ou contenu du fichier en mémoire
+        filename: Nom du fichier, utilisé pour détecter le format d'un contenu
+            en mémoire (par défaut l'attribut .name du flux)
 
     Returns:
         Texte extrait du fichier
     """
-    if file_path.lower().endswith('.pdf'):
-        return extract_text_from_pdf(file_path)
-    elif file_path.lower().endswith('.docx'):
-        return extract_text_from_word(file_path)
+    if isinstance(file_path, (str, os.PathLike)):
+        nom = os.fspath(file_path)
+        source = nom
     else:
-        raise ValueError("Format de fichier non supporté. Seuls les fichiers PDF et Word sont acceptés.")
+        nom = filename or getattr(file_path, "name", "") or ""
+        source = _lire_octets(file_path)
+
+    with mesurer_etape("extraction_texte"):
+        if nom.lower().endswith('.pdf'):
+            if isinstance(source, str):
+                return extract_text_from_pdf(source)
+            return extract_text_from_pdf_bytes(source)
+        elif nom.lower().endswith('.docx'):
+            return extract_text_from_word(source)
+        else:
+            raise ValueError("Format de fichier non supporté. Seuls les fichiers PDF et Word sont acceptés.")
 
     
 def generate_trigramme(prenom, nom):
@@ -118,6 +462,99 @@ def generate_trigramme(prenom, nom):
     return trigramme
     
 
+MODELE_LLM = "gpt-5"
+
+# Routage par niveaux (CV_ROUTAGE_MODELES=1) : le modèle rapide extrait d'abord,
+# seules les sections qui échouent aux contrôles sont réextraites par MODELE_LLM
+MODELE_RAPIDE = os.environ.get("CV_MODELE_RAPIDE", "gpt-5-mini")
+
+SYSTEM_PROMPTS = {
+    "fr": "Tu es un assistant qui aide à extraire les informations des CV.",
+    "en": "You are an assistant that helps extract information from resumes. Extract the required fields in english."
+}
+
+# Consigne ajoutée pour l'extraction des projets d'un morceau de CV long
+CONSIGNES_MORCEAU = {
+    "fr": "Le texte fourni est un extrait d'un CV plus long. Extrais uniquement les projets "
+          "dont l'en-tête (client, dates) figure dans cet extrait.",
+    "en": "The text is an excerpt of a longer resume. Only extract the projects whose header "
+          "(client, dates) appears in this excerpt.",
+}
+
+# Au-delà de SEUIL_DECOUPAGE caractères, les projets sont extraits par morceaux
+# d'environ TAILLE_MORCEAU caractères, avec au plus MAX_APPELS_PARALLELES appels simultanés
+SEUIL_DECOUPAGE = 15000
+TAILLE_MORCEAU = 6000
+MAX_APPELS_PARALLELES = 8
+
+_cache_extraction = None
+_cache_lock = threading.Lock()
+
+
+def get_cache_extraction() -> Optional[CacheExtraction]:
+    """
+    Retourne le cache disque des extractions (créé au premier appel).
+
+    Configuration par variables d'environnement :
+        CV_CACHE_DIR : dossier du cache (par défaut .cache_extraction à côté du module)
+        CV_CACHE_TAILLE_MAX_MO : taille maximale en Mo (200 par défaut)
+        CV_CACHE_AGE_MAX_JOURS : âge maximal d'une entrée en jours (30 par défaut)
+        CV_CACHE_DESACTIVE=1 : désactive le cache
+
+    Returns:
+        Le cache, ou None s'il est désactivé ou si son dossier ne peut pas être créé
+    """
+    global _cache_extraction
+    if os.environ.get("CV_CACHE_DESACTIVE") == "1":
+        return None
+    if _cache_extraction is None:
+        with _cache_lock:
+            if _cache_extraction is None:
+                try:
+                    _cache_extraction = CacheExtraction(
+                        os.environ.get("CV_CACHE_DIR", os.path.join(REPERTOIRE_MODULE, ".cache_extraction")),
+                        taille_max_octets=int(float(os.environ.get("CV_CACHE_TAILLE_MAX_MO", "200")) * 1024 * 1024),
+                        age_max_secondes=float(os.environ.get("CV_CACHE_AGE_MAX_JOURS", "30")) * 24 * 3600,
+                    )
+                except OSError:
+                    # Un cache indisponible ne doit pas faire échouer la conversion
+                    return None
+    return _cache_extraction
+
+
+_index_similarite = None
+
+
+def get_index_similarite() -> Optional[IndexSimilarite]:
+    """
+    Retourne l'index de similarité des CV extraits (créé au premier appel), stocké
+    dans le dossier du cache des extractions et soumis aux mêmes limites d'âge et
+    de taille (CV_CACHE_AGE_MAX_JOURS, CV_CACHE_TAILLE_MAX_MO).
+
+    Désactivé avec le cache, ou par la variable d'environnement CV_SIMILARITE_DESACTIVEE=1.
+
+    Returns:
+        L'index, ou None s'il est désactivé ou si sa base ne peut pas être ouverte
+    """
+    global _index_similarite
+    cache = get_cache_extraction()
+    if cache is None or os.environ.get("CV_SIMILARITE_DESACTIVEE") == "1":
+        return None
+    if _index_similarite is None:
+        with _cache_lock:
+            if _index_similarite is None:
+                try:
+                    os.makedirs(cache.repertoire, exist_ok=True)
+                    _index_similarite = IndexSimilarite(os.path.join(cache.repertoire, "similarite.sqlite3"),
+                                                        taille_max_octets=cache.taille_max_octets,
+                                                        age_max_secondes=cache.age_max_secondes)
+                except (sqlite3.Error, OSError) as e:
+                    # Un index indisponible ne doit pas faire échouer la conversion
+                    logger.warning("Index de similarité indisponible : %s", e)
+                    return None
+    return _index_similarite
+
+
 class Projet(BaseModel):
     CLIENT_NOM: str = Field(..., description="Nom du client.")
     DATE_DEBUT: str = Field(..., description="Date de début du projet au format MM/AAAA.")
@@ -158,35 +595,528 @@ class CVInfo(BaseModel):
     Formations_complémentaires: List[FormationComplementaire] = Field(..., description="Formations complémentaires suivies.")
 
 
-def extract_info_from_cv(cv_text: str, language: str = "fr") -> CVInfo:
+def schema_reduit(nom: str, exclus) -> type:
+    """
+    Construit un modèle Pydantic reprenant les champs de CVInfo, sauf ceux exclus
+    (mêmes types et descriptions, même ordre).
+    """
+    champs = {
+        cle: (champ.annotation, champ)
+        for cle, champ in CVInfo.model_fields.items()
+        if cle not in exclus
+    }
+    return create_model(nom, **champs)
+
+
+# Profil du candidat sans les projets (extraction par morceaux)
+CVProfil = schema_reduit("CVProfil", {"Projets_effectués"})
+
+
+@lru_cache(maxsize=None)
+def schema_llm(exclus: frozenset = frozenset(), profil: bool = False) -> type:
+    """
+    Schéma envoyé au LLM : CVInfo (ou CVProfil si profil) sans les champs déjà
+    remplis par la pré-extraction locale.
+    """
+    if not exclus:
+        return CVProfil if profil else CVInfo
+    if profil:
+        return schema_reduit("CVProfilReduit", exclus | {"Projets_effectués"})
+    return schema_reduit("CVInfoReduit", exclus)
+
+
+def fusionner_pre_extraction(info: dict, pre: Optional[PreExtraction]) -> dict:
+    """
+    Complète une sortie du LLM avec les champs pré-extraits localement et
+    normalise les dates des projets au format MM/AAAA.
+
+    Returns:
+        Dictionnaire dans l'ordre de CVInfo (inchangé si pre est None)
+    """
+    if pre is None:
+        return info
+    info.update(copy.deepcopy(pre.champs))
+    normaliser_dates_projets(info.get("Projets_effectués"))
+    return {cle: info[cle] for cle in CVInfo.model_fields if cle in info}
+
+
+class ProjetsExtraits(BaseModel):
+    Projets_effectués: List[Projet] = Field(..., description="Liste des projets effectués décrits dans ce texte.")
+
+
+DATE_MM_AAAA_RE = re.compile(r"^(0[1-9]|1[0-2])/(19|20)\d{2}$")
+DATES_EN_COURS = {"aujourd'hui", "à ce jour", "ce jour", "en cours", "présent", "actuel",
+                  "present", "current", "today", "now", "ongoing"}
+
+
+def _non_vide(valeur: str) -> str:
+    if not valeur or not valeur.strip():
+        raise ValueError("valeur vide")
+    return valeur
+
+
+def _cle_date(date: str) -> tuple:
+    mois, annee = date.split("/")
+    return int(annee), int(mois)
+
+
+class ProjetControle(Projet):
+    """Projet avec les contrôles appliqués à la sortie du modèle rapide."""
+    DETAILS_PROJET: Optional[str] = None
+
+    _client_poste_non_vides = field_validator("CLIENT_NOM", "INTITULE_POSTE")(_non_vide)
+
+    @field_validator("DATE_DEBUT")
+    @classmethod
+    def _date_debut(cls, valeur: str) -> str:
+        if not DATE_MM_AAAA_RE.match(valeur.strip()):
+            raise ValueError("date attendue au format MM/AAAA")
+        return valeur.strip()
+
+    @field_validator("DATE_FIN")
+    @classmethod
+    def _date_fin(cls, valeur: str) -> str:
+        if valeur.strip().lower() not in DATES_EN_COURS and not DATE_MM_AAAA_RE.match(valeur.strip()):
+            raise ValueError("date attendue au format MM/AAAA")
+        return valeur.strip()
+
+    @field_validator("REALISATION")
+    @classmethod
+    def _realisations(cls, valeur: List[str]) -> List[str]:
+        if not [r for r in valeur if r and r.strip()]:
+            raise ValueError("aucune réalisation")
+        return valeur
+
+    @model_validator(mode="after")
+    def _chronologie(self):
+        if DATE_MM_AAAA_RE.match(self.DATE_FIN) and _cle_date(self.DATE_DEBUT) > _cle_date(self.DATE_FIN):
+            raise ValueError("date de début postérieure à la date de fin")
+        return self
+
+
+class ProjetsControles(BaseModel):
+    Projets_effectués: List[ProjetControle]
+
+
+class ProfilControle(BaseModel):
+    """Champs du profil contrôlés à la sortie du modèle rapide (les autres sont ignorés)."""
+    PRENOM: str
+    NOM: str
+    INTITULE_DU_POSTE: str
+
+    _non_vides = field_validator("PRENOM", "NOM", "INTITULE_DU_POSTE")(_non_vide)
+
+
+def controler_extraction(info: dict, cv_text: str) -> List[str]:
+    """
+    Contrôle une extraction avec les modèles stricts (ProfilControle, ProjetControle).
+
+    Args:
+        info: Dictionnaire au format CVInfo.model_dump()
+        cv_text: Texte envoyé au LLM (un CV contenant des plages de dates doit
+            donner au moins un projet)
+
+    Returns:
+        Sections en échec, parmi "profil" et "projets"
+    """
+    sections = []
+    try:
+        ProfilControle.model_validate(info)
+    except ValidationError:
+        sections.append("profil")
+    try:
+        ProjetsControles.model_validate(info)
+        if not info["Projets_effectués"] and PLAGE_DATES_RE.search(cv_text):
+            sections.append("projets")
+    except ValidationError:
+        sections.append("projets")
+    return sections
+
+
+def _appeler_llm(system_prompt: str, contenu: str, response_format, modele: str = MODELE_LLM):
+    """
+    Envoie une requête d'extraction structurée à l'API OpenAI.
+
+    Returns:
+        Instance de response_format renvoyée par le modèle
+    """
+    debut = time.perf_counter()
+    # Échéance, nouvelles tentatives et requête couverte : voir cv_transport
+    completion = get_transport().appeler(
+        lambda timeout: get_client().chat.completions.parse(
+            model=modele,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": contenu},
+            ],
+            response_format=response_format,
+            timeout=timeout,
+        ),
+        cle=modele,
+        valide=lambda reponse: reponse.choices[0].message.parsed is not None,
+    )
+    enregistrer_usage(completion.usage)
+    enregistrer_appel_modele(modele, time.perf_counter() - debut)
+    return completion.choices[0].message.parsed
+
+
+def _extraire_avec_llm(cv_text: str, language: str = "fr", modele: str = MODELE_LLM,
+                       pre: Optional[PreExtraction] = None) -> dict:
+    """
+    Appelle l'API OpenAI pour extraire le CVInfo brut d'un texte de CV.
+
+    Args:
+        pre: Pré-extraction locale ; ses champs sont retirés du schéma demandé au LLM
+
+    Returns:
+        Dictionnaire au format CVInfo.model_dump()
+    """
+    system_prompt = SYSTEM_PROMPTS.get(language, SYSTEM_PROMPTS["fr"])
+    parsed = _appeler_llm(system_prompt, cv_text, schema_llm(pre.exclus if pre else frozenset()), modele)
+    return fusionner_pre_extraction(parsed.model_dump(), pre)
+
+
+def _extraire_par_morceaux(cv_text: str, language: str = "fr", modele: str = MODELE_LLM,
+                           sections=("profil", "projets"), decoupage: bool = True,
+                           pre: Optional[PreExtraction] = None) -> dict:
+    """
+    Extraction pour les CV longs : le profil (identité, compétences, diplômes,
+    langues, formations) est extrait une fois sur le texte complet, pendant que
+    les projets sont extraits en parallèle morceau par morceau, puis fusionnés.
+    La durée totale est bornée par l'appel le plus lent, pas par la taille du CV.
+
+    Args:
+        sections: Sections à extraire ("profil", "projets"), utilisé pour
+            réextraire seulement une section lors du routage
+        decoupage: Découper le texte pour les projets (sinon un seul appel)
+        pre: Pré-extraction locale ; ses champs sont retirés du schéma du profil
+
+    Returns:
+        Dictionnaire avec les champs CVInfo des sections demandées, dans l'ordre de CVInfo
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    system_prompt = SYSTEM_PROMPTS.get(language, SYSTEM_PROMPTS["fr"])
+    consigne = CONSIGNES_MORCEAU.get(language, CONSIGNES_MORCEAU["fr"])
+    morceaux = decouper_en_morceaux(cv_text, TAILLE_MORCEAU) if decoupage else [cv_text]
+    prompt_projets = f"{system_prompt} {consigne}" if len(morceaux) > 1 else system_prompt
+
+    with ThreadPoolExecutor(max_workers=min(MAX_APPELS_PARALLELES, len(morceaux) + 1)) as executor:
+        # copy_context : les appels des threads alimentent la mesure de la conversion en cours
+        future_profil = None
+        if "profil" in sections:
+            future_profil = executor.submit(copy_context().run, _appeler_llm, system_prompt, cv_text,
+                                            schema_llm(pre.exclus if pre else frozenset(), True), modele)
+        futures_projets = []
+        if "projets" in sections:
+            futures_projets = [
+                executor.submit(copy_context().run, _appeler_llm, prompt_projets, morceau, ProjetsExtraits, modele)
+                for morceau in morceaux
+            ]
+        resultat = future_profil.result().model_dump() if future_profil is not None else {}
+        if futures_projets:
+            resultat["Projets_effectués"] = fusionner_projets([
+                [projet.model_dump() for projet in future.result().Projets_effectués]
+                for future in futures_projets
+            ])
+
+    if pre is not None:
+        return fusionner_pre_extraction(resultat, pre)
+    # Remettre les champs dans l'ordre de CVInfo
+    return {cle: resultat[cle] for cle in CVInfo.model_fields if cle in resultat}
+
+
+def _extraire_avec_routage(cv_text: str, language: str = "fr", decoupage: bool = False,
+                           pre: Optional[PreExtraction] = None) -> dict:
+    """
+    Extraction par niveaux : MODELE_RAPIDE extrait le CV, la sortie est contrôlée
+    (controler_extraction) et seules les sections en échec sont réextraites par
+    MODELE_LLM (le CV complet si les deux sections échouent).
+
+    Returns:
+        Dictionnaire au format CVInfo.model_dump()
+    """
+    debut = time.perf_counter()
+    if decoupage:
+        info = _extraire_par_morceaux(cv_text, language, MODELE_RAPIDE, pre=pre)
+    else:
+        info = _extraire_avec_llm(cv_text, language, MODELE_RAPIDE, pre)
+
+    sections = controler_extraction(info, cv_text)
+    if len(sections) == 2:
+        escalade = "complete"
+        if decoupage:
+            info = _extraire_par_morceaux(cv_text, language, MODELE_LLM, pre=pre)
+        else:
+            info = _extraire_avec_llm(cv_text, language, MODELE_LLM, pre)
+    elif sections:
+        escalade = sections[0]
+        info.update(_extraire_par_morceaux(cv_text, language, MODELE_LLM, sections=sections,
+                                           decoupage=decoupage, pre=pre))
+    else:
+        escalade = "aucune"
+
+    enregistrer_routage(escalade, time.perf_counter() - debut)
+    return info
+
+
+def _section_du_projet(projet: dict, sections_normalisees: List[str]) -> Optional[int]:
+    """
+    Indice de la section contenant l'en-tête d'un projet : client, années de
+    début et de fin. Si plusieurs sections conviennent (deux missions chez le
+    même client la même année), seule celle qui contient les dates complètes
+    est retenue.
+
+    Returns:
+        Indice de la section, ou None si aucune section ou plusieurs conviennent
+    """
+    client = normaliser(projet.get("CLIENT_NOM"))
+    if not client:
+        return None
+    dates = [normaliser(projet.get(cle)) for cle in ("DATE_DEBUT", "DATE_FIN")]
+    annees = [annee for date in dates for annee in re.findall(r"\d{4}", date)]
+    candidates = [
+        i for i, section in enumerate(sections_normalisees)
+        if client in section and all(annee in section for annee in annees)
+    ]
+    if len(candidates) > 1:
+        candidates = [i for i in candidates if all(date in sections_normalisees[i] for date in dates if date)]
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def _extraire_par_difference(sections: List[str], language: str, precedent: CVSimilaire,
+                             pre: Optional[PreExtraction] = None) -> Optional[tuple]:
+    """
+    Met à jour l'extraction d'une version précédente du CV : seules les sections
+    absentes de la version précédente sont envoyées au LLM. Le profil n'est
+    réextrait que si la première section (identité, compétences) ou la dernière
+    (diplômes, langues, formations) a changé. Les projets des sections
+    inchangées sont repris tels quels ; ceux des sections modifiées ou
+    supprimées sont retirés.
+
+    Args:
+        sections: Sections du texte (decouper_en_sections)
+        language: Langue d'extraction
+        precedent: Version précédente trouvée dans l'index de similarité
+        pre: Pré-extraction locale du nouveau texte
+
+    Returns:
+        Tuple (dictionnaire au format CVInfo.model_dump(), nombre de sections
+        réextraites, nombre de sections supprimées), ou None si un projet de la
+        version précédente ne peut pas être rattaché à une seule section : le CV
+        doit alors être extrait en entier
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    empreintes = [empreinte_section(section) for section in sections]
+    empreintes_precedentes = [empreinte_section(section) for section in precedent.sections]
+    # Position dans le nouveau texte de chaque section inchangée
+    positions = {empreinte: i for i, empreinte in enumerate(empreintes)}
+
+    # Chaque projet repris est rattaché à sa section dans la version précédente :
+    # il est gardé si cette section est inchangée, retiré si elle a été modifiée
+    # (le projet est réextrait) ou supprimée
+    sections_precedentes = [normaliser(section) for section in precedent.sections]
+    repris = []
+    for projet in precedent.info.get("Projets_effectués") or []:
+        section = _section_du_projet(projet, sections_precedentes)
+        if section is None:
+            return None
+        if empreintes_precedentes[section] in positions:
+            repris.append((positions[empreintes_precedentes[section]], projet))
+
+    anciennes = set(empreintes_precedentes)
+    modifiees = [i for i, empreinte in enumerate(empreintes) if empreinte not in anciennes]
+    supprimees = len(anciennes - set(empreintes))
+    info = copy.deepcopy(precedent.info)
+    info["Projets_effectués"] = [projet for _, projet in repris]
+    if not modifiees and not supprimees:
+        return fusionner_pre_extraction(info, pre), 0, 0
+
+    system_prompt = SYSTEM_PROMPTS.get(language, SYSTEM_PROMPTS["fr"])
+    consigne = CONSIGNES_MORCEAU.get(language, CONSIGNES_MORCEAU["fr"])
+    texte_complet = "\n".join(sections)
+    sections_projets = [sections[i] for i in modifiees if i > 0]
+    profil_modifie = empreintes[0] != empreintes_precedentes[0] or empreintes[-1] != empreintes_precedentes[-1]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        future_profil = None
+        if profil_modifie:
+            future_profil = executor.submit(copy_context().run, _appeler_llm, system_prompt, texte_complet,
+                                            schema_llm(pre.exclus if pre else frozenset(), True))
+        future_projets = None
+        if sections_projets:
+            future_projets = executor.submit(copy_context().run, _appeler_llm, f"{system_prompt} {consigne}",
+                                             "\n".join(sections_projets), ProjetsExtraits)
+        if future_profil is not None:
+            info.update(future_profil.result().model_dump())
+        nouveaux = [p.model_dump() for p in future_projets.result().Projets_effectués] if future_projets else []
+
+    # Projets repris des sections inchangées et projets réextraits, dans l'ordre du texte
+    sections_normalisees = [normaliser(section) for section in sections]
+    projets = [(position, 0, projet) for position, projet in repris]
+    for projet in nouveaux:
+        section = _section_du_projet(projet, sections_normalisees)
+        projets.append((section if section is not None else modifiees[0], 1, projet))
+    projets.sort(key=lambda element: element[:2])
+    info["Projets_effectués"] = fusionner_projets([[projet for _, _, projet in projets]])
+    return fusionner_pre_extraction(info, pre), len(modifiees), supprimees
+
+
+def _extraire_avec_similarite(texte_llm: str, language: str, modeles: str, index: IndexSimilarite,
+                              extraire, pre: Optional[PreExtraction] = None) -> dict:
+    """
+    Cherche une version précédente du CV dans l'index de similarité : si elle
+    existe, seules les sections modifiées sont réextraites. Sinon extraire(texte)
+    est appelé. Le résultat remplace la version précédente dans l'index.
+    """
+    contexte = f"{language}|{modeles}|{empreinte_schema(CVInfo)}"
+    sections = decouper_en_sections(texte_llm)
+    signature = signature_minhash(texte_llm)
+    try:
+        precedent = index.chercher(texte_llm, contexte, signature)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Recherche dans l'index de similarité impossible : %s", e)
+        precedent = None
+
+    difference = None
+    if precedent is not None and len(sections) > 1:
+        difference = _extraire_par_difference(sections, language, precedent, pre)
+    if difference is not None:
+        info, nb_sections, nb_supprimees = difference
+        enregistrer_similarite("identique" if nb_sections == nb_supprimees == 0 else "difference", nb_sections)
+    else:
+        # Aucune version proche, ou version dont un projet n'a pas pu être situé
+        info = extraire(texte_llm)
+        enregistrer_similarite("nouveau", len(sections))
+
+    try:
+        index.ajouter(texte_llm, sections, contexte, info, signature,
+                      remplace=precedent.id if precedent is not None else None)
+    except (sqlite3.Error, OSError) as e:
+        # Un index indisponible ne doit pas faire échouer la conversion
+        logger.warning("Enregistrement dans l'index de similarité impossible : %s", e)
+    return info
+
+
+def routage_active() -> bool:
+    """Routage par niveaux activé par la variable d'environnement CV_ROUTAGE_MODELES=1."""
+    return os.environ.get("CV_ROUTAGE_MODELES") == "1"
+
+
+def preparer_texte_llm(cv_text: str) -> str:
+    """
+    Compacte le texte d'un CV avant son envoi au LLM et enregistre la réduction
+    de tokens obtenue. Le texte compacté sert aussi de clé au cache des extractions.
+    """
+    compaction = compacter_texte(cv_text)
+    enregistrer_compaction(compaction.tokens_avant, compaction.tokens_apres)
+    return compaction.texte
+
+
+def extract_info_from_cv(cv_text: str, language: str = "fr", use_cache: bool = True,
+                         compacter: bool = True, decoupage: Optional[bool] = None,
+                         routage: Optional[bool] = None, reutiliser_similaires: bool = True,
+                         pre_extraction: bool = True, delai: Optional[float] = None) -> dict:
     """
     Extrait des informations structurées à partir d'un texte de CV en utilisant l'API OpenAI.
+
+    Le texte est d'abord compacté (en-têtes/pieds de page répétés, numéros de page,
+    puces, contacts dupliqués) pour réduire le nombre de tokens envoyés.
+    Le résultat brut du LLM est mis en cache sur disque : un CV déjà traité
+    (même texte, même langue, même modèle, même schéma) ne refait pas d'appel réseau.
+    Les CV longs sont extraits par morceaux en parallèle (voir _extraire_par_morceaux).
+    Avec le routage, un modèle rapide extrait d'abord le CV et seules les sections
+    qui échouent aux contrôles sont réextraites par le grand modèle.
+    Les champs détectables par règles (âge, diplômes, langues, formations) sont
+    pré-extraits localement et retirés du schéma demandé au LLM (voir cv_pre_extraction).
     
     Arguments :
         cv_text (str) : Contenu textuel du CV.
+        language (str) : Langue d'extraction ("fr" ou "en").
+        use_cache (bool) : Utiliser le cache disque des extractions.
+        compacter (bool) : Compacter le texte avant l'envoi au LLM.
+        decoupage (bool | None) : Forcer ou désactiver l'extraction par morceaux.
+            Par défaut, utilisée au-delà de SEUIL_DECOUPAGE caractères.
+        routage (bool | None) : Forcer ou désactiver le routage par niveaux.
+            Par défaut, suit la variable d'environnement CV_ROUTAGE_MODELES.
+        reutiliser_similaires (bool) : Réutiliser l'extraction d'une version
+            précédente du même CV (index de similarité) pour ne réextraire que
+            les sections modifiées.
+        pre_extraction (bool) : Pré-extraire localement les champs détectables
+            par règles et réduire d'autant le schéma demandé au LLM.
+        delai (float | None) : Échéance de l'extraction complète, en secondes
+            (DelaiDepasse au-delà). Par défaut, CV_DELAI_EXTRACTION ; chaque
+            appel au LLM reste borné par CV_DELAI_APPEL (voir cv_transport).
 
     Retourne :
-        CVInfo : Un objet Pydantic contenant les informations extraites.
+        dict : Les informations extraites (champs de CVInfo + TRI, EMAIL, ANNEE, TELEPHONE).
     """
-    system_prompt = {
-        "fr": "Tu es un assistant qui aide à extraire les informations des CV.",
-        "en": "You are an assistant that helps extract information from resumes. Extract the required fields in english."
-    }
+    if delai is None:
+        delai = get_transport().config.delai_extraction
+    with mesurer_etape("extraction_llm"), echeance(delai):
+        texte_llm = preparer_texte_llm(cv_text) if compacter else cv_text
+
+        pre = None
+        if pre_extraction:
+            with mesurer_etape("pre_extraction"):
+                pre = pre_extraire(texte_llm, language)
+            enregistrer_pre_extraction(sorted(pre.champs))
+
+        if routage is None:
+            routage = routage_active()
+        # Les résultats routés ont leur propre entrée de cache
+        modeles = f"{MODELE_RAPIDE}>{MODELE_LLM}" if routage else MODELE_LLM
+
+        cache = get_cache_extraction() if use_cache else None
+        info = None
+        if cache is not None:
+            cle = cache.cle(texte_llm, language, modeles, CVInfo)
+            info = cache.get(cle)
+            enregistrer_cache(info is not None)
+
+        if info is None:
+            if decoupage is None:
+                decoupage = len(texte_llm) > SEUIL_DECOUPAGE
+
+            def extraire(texte: str) -> dict:
+                if routage:
+                    return _extraire_avec_routage(texte, language, decoupage, pre)
+                if decoupage:
+                    return _extraire_par_morceaux(texte, language, pre=pre)
+                return _extraire_avec_llm(texte, language, pre=pre)
+
+            # Une nouvelle version d'un CV déjà traité ne réextrait que ses sections modifiées
+            index = get_index_similarite() if cache is not None and reutiliser_similaires else None
+            if index is not None:
+                info = _extraire_avec_similarite(texte_llm, language, modeles, index, extraire, pre)
+            else:
+                info = extraire(texte_llm)
+            if cache is not None:
+                try:
+                    cache.set(cle, info)
+                except OSError:
+                    # Un cache indisponible ne doit pas faire échouer la conversion
+                    pass
+        else:
+            # Entrée issue d'une extraction sans pré-extraction (mode bulk, version précédente)
+            info = fusionner_pre_extraction(info, pre)
+
+        return completer_info(info, cv_text)
 
-    system_prompt = system_prompt.get(language, system_prompt["fr"])
-    
-    completion = client.chat.completions.parse(
-        model="gpt-5",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": cv_text},
-        ],
-        response_format=CVInfo,  
-    )
 
-    parsed: CVInfo = completion.choices[0].message.parsed
-    info = parsed.model_dump()
+def completer_info(info: dict, cv_text: str) -> dict:
+    """
+    Complète les informations extraites par le LLM avec les champs calculés
+    localement (trigramme, email, année de naissance, téléphone).
+
+    Args:
+        info: Dictionnaire issu de CVInfo.model_dump()
+        cv_text: Texte du CV (pour les extractions par regex)
 
+    Returns:
+        Le dictionnaire complété
+    """
     # Générer le trigramme localement
     prenom = info.get("PRENOM", "")
     nom = info.get("NOM", "")
@@ -194,11 +1124,7 @@ def extract_info_from_cv(cv_text: str, language: str = "fr") -> CVInfo:
     info["TRI"] = generate_trigramme(prenom, nom)
 
     # Extraire l'email via regex sur le texte du CV
-    email_match = re.search(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", cv_text)
-    if email_match:
-        info["EMAIL"] = email_match.group(0)
-    else:
-        info["EMAIL"] = ""
+    info["EMAIL"] = extraire_email(cv_text)
 
     # Utiliser la valeur AGE extraite par l'API pour calculer l'année de naissance
     age_str = info.get("AGE", "")
@@ -209,144 +1135,178 @@ def extract_info_from_cv(cv_text: str, language: str = "fr") -> CVInfo:
     except (ValueError, TypeError):
         info["ANNEE"] = ""
 
-    # Extraire le téléphone via regex sur le texte du CV
-    tel_match = re.search(r'(\d{2}(?:[\s\.-]?\d{2}){4})', cv_text)
-    if tel_match:
-        # Nettoyer le numéro pour enlever espaces, tirets, points
-        raw_tel = tel_match.group(1)
-        digits = re.sub(r'[^0-9]', '', raw_tel)
-        # Reformater en XX.XX.XX.XX.XX
-        if len(digits) == 10:
-            info["TELEPHONE"] = '.'.join([digits[i:i+2] for i in range(0, 10, 2)])
-        else:
-            info["TELEPHONE"] = raw_tel
-    else:
-        info["TELEPHONE"] = ""
+    # Extraire le téléphone via regex sur le texte du CV : XX.XX.XX.XX.XX pour un
+    # numéro français (y compris +33), +indicatif pour un numéro international
+    info["TELEPHONE"] = extraire_telephone(cv_text)
 
     return info
 
 
+# Champs en texte libre traduits pour la version bilingue (les listes de sous-champs
+# concernent les éléments des listes d'objets). Noms, dates et clients restent inchangés.
+CHAMPS_A_TRADUIRE = {
+    "INTITULE_DU_POSTE": None,
+    "EXPERTISE": None,
+    "SECTEUR": None,
+    "METHODOLOGIE": None,
+    "HABILITATION": None,
+    "Projets_effectués": ("INTITULE_POSTE", "INTITULE_PROJET", "DETAILS_PROJET", "REALISATION"),
+    "Diplômes": ("INTITULE_DIPLOME",),
+    "Langues": ("LANGUE", "NIVEAU"),
+    "Formations_complémentaires": ("INTITULE_FORMATION",),
+}
+
+PROMPTS_TRADUCTION = {
+    "en": "Translate each text of the JSON object from French into English for a professional resume. "
+          "Return one item per input key, with the key as INDICE. Keep company names, acronyms, "
+          "software and product names unchanged.",
+    "fr": "Traduis chaque texte de l'objet JSON de l'anglais vers le français pour un CV professionnel. "
+          "Renvoie un élément par clé d'entrée, avec la clé comme INDICE. Conserve les noms d'entreprises, "
+          "les sigles et les noms de logiciels ou de produits.",
+}
+
+
+class TexteTraduit(BaseModel):
+    INDICE: int = Field(..., description="Clé du texte dans l'objet JSON fourni.")
+    TEXTE: str = Field(..., description="Texte traduit.")
+
+
+class Traductions(BaseModel):
+    TEXTES: List[TexteTraduit] = Field(..., description="Un texte traduit par clé de l'objet fourni.")
+
+
+def _transformer_textes(info: dict, fonction) -> dict:
+    """
+    Applique fonction à chaque texte libre (CHAMPS_A_TRADUIRE) d'une copie de info.
+    """
+    resultat = copy.deepcopy(info)
+
+    def convertir(valeur):
+        if isinstance(valeur, list):
+            return [fonction(v) if v else v for v in valeur]
+        return fonction(valeur) if valeur else valeur
+
+    for cle, sous_champs in CHAMPS_A_TRADUIRE.items():
+        if cle not in resultat:
+            continue
+        if sous_champs is None:
+            resultat[cle] = convertir(resultat[cle])
+            continue
+        for element in resultat[cle] or []:
+            for sous_champ in sous_champs:
+                if sous_champ in element:
+                    element[sous_champ] = convertir(element[sous_champ])
+    return resultat
+
+
+def traduire_info(info: dict, vers: str = "en", use_cache: bool = True) -> dict:
+    """
+    Traduit les champs en texte libre d'informations extraites, en un seul appel
+    LLM pour tous les textes (dédoublonnés). Les autres champs sont recopiés tels quels.
+
+    Args:
+        info: Informations extraites (format de extract_info_from_cv)
+        vers: Langue cible ("fr" ou "en")
+        use_cache: Utiliser le cache disque des extractions
+
+    Returns:
+        Copie de info dont les textes libres sont traduits
+    """
+    textes = []
+    _transformer_textes(info, lambda texte: textes.append(texte) or texte)
+    uniques = list(dict.fromkeys(t for t in textes if t.strip()))
+    if not uniques:
+        return copy.deepcopy(info)
+
+    with mesurer_etape("traduction_llm"):
+        contenu = json.dumps(dict(enumerate(uniques)), ensure_ascii=False)
+        cache = get_cache_extraction() if use_cache else None
+        traductions = None
+        if cache is not None:
+            cle = cache.cle(contenu, f"traduction_{vers}", MODELE_LLM, Traductions)
+            traductions = cache.get(cle)
+            enregistrer_cache(traductions is not None)
+        if traductions is None:
+            prompt = PROMPTS_TRADUCTION.get(vers, PROMPTS_TRADUCTION["en"])
+            traductions = _appeler_llm(prompt, contenu, Traductions).model_dump()
+            if cache is not None:
+                try:
+                    cache.set(cle, traductions)
+                except OSError:
+                    pass
+
+    # Un texte absent de la réponse reste dans la langue d'origine
+    table = {
+        uniques[t["INDICE"]]: t["TEXTE"]
+        for t in traductions["TEXTES"]
+        if 0 <= t["INDICE"] < len(uniques) and t["TEXTE"]
+    }
+    return _transformer_textes(info, lambda texte: table.get(texte, texte))
+
+
+def extract_info_bilingue(cv_text: str, langue_source: str = "fr", use_cache: bool = True) -> dict:
+    """
+    Extrait les informations une seule fois, puis traduit uniquement les textes
+    libres vers l'autre langue (au lieu de deux extractions complètes).
+
+    Returns:
+        Dictionnaire {langue: informations} pour "fr" et "en"
+    """
+    info = extract_info_from_cv(cv_text, language=langue_source, use_cache=use_cache)
+    langue_cible = "en" if langue_source == "fr" else "fr"
+    return {langue_source: info, langue_cible: traduire_info(info, vers=langue_cible, use_cache=use_cache)}
+
+
+def generer_documents(infos: dict, sorties: Optional[dict] = None) -> dict:
+    """
+    Rend en parallèle un document par langue, chacun avec le modèle de sa langue.
+
+    Args:
+        infos: Dictionnaire {langue: informations}
+        sorties: Dictionnaire {langue: chemin ou flux de sortie} ; par défaut en mémoire
+
+    Returns:
+        Dictionnaire {langue: résultat de fill_word_template_with_lists}
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    sorties = sorties or {}
+    with ThreadPoolExecutor(max_workers=len(infos) or 1) as executor:
+        futures = {
+            langue: executor.submit(copy_context().run, fill_word_template_with_lists,
+                                    get_template_path(langue), sorties.get(langue), info, langue)
+            for langue, info in infos.items()
+        }
+        return {langue: future.result() for langue, future in futures.items()}
+
+
 def fill_word_template_with_lists(template_path, output_path, data, language="fr"):
     """
     Remplit un modèle Word avec des données (y compris dans l'en-tête),
     en remplaçant les placeholders et en appliquant les styles nécessaires.
 
+    Le modèle est compilé une seule fois par processus (voir cv_template) ;
+    chaque appel travaille sur une copie du modèle compilé.
+
     Arguments :
         template_path (str) : Chemin vers le modèle Word.
-        output_path (str) : Chemin vers le fichier Word généré.
+        output_path (str | flux | None) : Chemin du fichier Word généré, flux binaire
+            où l'écrire, ou None pour obtenir le document en mémoire.
         data (dict) : Données à insérer dans le fichier Word.
+
+    Retourne :
+        bytes : Le contenu du document généré lorsque output_path vaut None.
     """
-    doc = Document(template_path)
-
-    # --- 🔹 1. Gestion des en-têtes et pieds de page ---
-    for section in doc.sections:
-        header = section.header
-        footer = section.footer
-
-        # En-tête
-        for paragraph in header.paragraphs:
-            for key, value in data.items():
-                placeholder = f"{{{{{key}}}}}"
-                if placeholder in paragraph.text:
-                    paragraph.text = paragraph.text.replace(placeholder, str(value))
-
-        # Pied de page (optionnel, même logique)
-        for paragraph in footer.paragraphs:
-            for key, value in data.items():
-                placeholder = f"{{{{{key}}}}}"
-                if placeholder in paragraph.text:
-                    paragraph.text = paragraph.text.replace(placeholder, str(value))
-
-
-    for paragraph in doc.paragraphs:
-        for key, value in data.items():
-            placeholder = f"{{{{{key}}}}}"  # Placeholder au format {{KEY}}
-
-            # --- Projets effectués ---
-            if key == "Projets_effectués" and isinstance(value, list):
-                if placeholder in paragraph.text:
-                    paragraph.text = ""
-                    for projet in value:
-                        client_nom = projet.get('CLIENT_NOM') or 'Non spécifié'
-                        dates = f"{(projet.get('DATE_DEBUT') or 'N/A')} - {(projet.get('DATE_FIN') or 'N/A')}"
-                        client_date_line = f"{client_nom}\t{dates}"
-
-                        client_date_paragraph = paragraph.insert_paragraph_before(client_date_line)
-                        client_date_paragraph.style = "italique gras"
-
-                        tab_stops = client_date_paragraph.paragraph_format.tab_stops
-                        tab_stop = tab_stops.add_tab_stop(Inches(6.5))
-                        tab_stop.alignment = WD_PARAGRAPH_ALIGNMENT.RIGHT
-
-                        post_paragraph = paragraph.insert_paragraph_before(projet.get('INTITULE_POSTE') or 'Non spécifié')
-                        post_paragraph.style = paragraph.style
-
-                        paragraph.insert_paragraph_before("")
-
-                        project_paragraph = paragraph.insert_paragraph_before(projet.get('INTITULE_PROJET') or 'Non spécifié')
-                        project_paragraph.style = paragraph.style
-                        project_paragraph.runs[0].bold = True
-
-                        details_projet = (projet.get('DETAILS_PROJET') or '').strip()
-                        if details_projet:
-                            project_paragraph = paragraph.insert_paragraph_before(details_projet)
-                            project_paragraph.style = paragraph.style
-
-                        paragraph.insert_paragraph_before("")
-
-                        realizations = projet.get('REALISATION') or []
-                        if realizations:
-                            title_realizations = "Réalisations :" if language == "fr" else "Achievements :"
-                            realizations_paragraph = paragraph.insert_paragraph_before(title_realizations)
-                            realizations_paragraph.style = paragraph.style
-                            realizations_paragraph.runs[0].bold = True
-
-                            for realization in realizations:
-                                realization = (realization or '').strip()
-                                if realization:
-                                    realization_paragraph = paragraph.insert_paragraph_before(realization)
-                                    realization_paragraph.style = "Liste à puces1"
-
-                            paragraph.insert_paragraph_before("")
-
-            # --- Diplômes ---
-            elif key == "Diplômes" and isinstance(value, list):
-                if placeholder in paragraph.text:
-                    paragraph.text = ""
-                    for diplome in value:
-                        diploma_line = f"{(diplome.get('ANNEE_DIPLOME') or 'N/A')}    {(diplome.get('INTITULE_DIPLOME') or 'Non spécifié')}"
-                        diploma_paragraph = paragraph.insert_paragraph_before(diploma_line)
-                        diploma_paragraph.style = paragraph.style
-
-            # --- Langues ---
-            elif key == "Langues" and isinstance(value, list):
-                if placeholder in paragraph.text:
-                    paragraph.text = ""
-                    for langue in value:
-                        language_line = f"{(langue.get('LANGUE') or 'Non spécifié')}    {(langue.get('NIVEAU') or 'Non spécifié')}"
-                        language_paragraph = paragraph.insert_paragraph_before(language_line)
-                        language_paragraph.style = paragraph.style
-
-            # --- Formations complémentaires ---
-            elif key == "Formations_complémentaires" and isinstance(value, list):
-                if placeholder in paragraph.text:
-                    paragraph.text = ""
-                    for formation in value:
-                        formation_line = f"{(formation.get('ANNEE_FORMATION') or 'N/A')}    {(formation.get('INTITULE_FORMATION') or 'Non spécifié')}"
-                        formation_paragraph = paragraph.insert_paragraph_before(formation_line)
-                        formation_paragraph.style = paragraph.style
-
-            # --- Listes génériques ---
-            elif isinstance(value, list):
-                if placeholder in paragraph.text:
-                    paragraph.text = ""
-                    for item in value:
-                        list_paragraph = paragraph.insert_paragraph_before(str(item))
-                        list_paragraph.style = paragraph.style
-
-            # --- Valeurs simples ---
-            elif placeholder in paragraph.text:
-                paragraph.text = paragraph.text.replace(placeholder, str(value))
-
-    # --- 🔹 3. Sauvegarde du fichier final ---
-    doc.save(output_path)
+    with mesurer_etape("rendu_docx"):
+        doc = compiler_template(template_path).rendre(data, language=language)
+        if output_path is None:
+            buffer = io.BytesIO()
+            doc.save(buffer)
+            contenu = buffer.getvalue()
+            enregistrer_taille_sortie(len(contenu))
+            return contenu
+        doc.save(output_path)
+        if isinstance(output_path, (str, os.PathLike)):
+            enregistrer_taille_sortie(os.path.getsize(output_path))
+        elif hasattr(output_path, "tell"):
+            enregistrer_taille_sortie(output_path.tell())
@@ -0,0 +1,261 @@
+"""
+Index de similarité des CV déjà traités (MinHash + LSH), pour retrouver la
+version précédente d'un CV mis à jour.
+
+Le texte (normalisé) est découpé en shingles de TAILLE_SHINGLE mots, résumé par
+une signature MinHash de NB_PERMUTATIONS valeurs, puis indexé par bandes (LSH) :
+la recherche ne compare la signature qu'aux CV partageant au moins une bande,
+quelle que soit la taille de l'index. Chaque entrée conserve les sections du
+texte (voir cv_decoupage.decouper_en_sections) et les informations extraites,
+pour que seules les sections modifiées soient réextraites.
+
+L'index est stocké dans une base SQLite, à côté du cache des extractions, et
+soumis aux mêmes limites d'âge et de taille que celui-ci (voir evincer).
+"""
+import hashlib
+import json
+import random
+import sqlite3
+import time
+from array import array
+from contextlib import closing
+from dataclasses import dataclass
+from typing import List, Optional
+
+from cv_decoupage import normaliser
+
+TAILLE_SHINGLE = 5
+NB_PERMUTATIONS = 128
+# 16 bandes de 8 lignes : deux CV de similarité 0,8 partagent une bande avec une
+# probabilité de 92 %, deux CV de similarité 0,5 avec une probabilité de 6 %
+NB_BANDES = 16
+SEUIL_SIMILARITE = 0.8
+NB_ENTREES_MAX = 20000
+
+_PREMIER = (1 << 61) - 1
+_MASQUE = (1 << 32) - 1
+# Coefficients fixes : les signatures doivent rester comparables d'un processus à l'autre
+_aleatoire = random.Random(20240601)
+_COEFFICIENTS = [(_aleatoire.randrange(1, _PREMIER), _aleatoire.randrange(0, _PREMIER))
+                 for _ in range(NB_PERMUTATIONS)]
+
+SCHEMA = """
+PRAGMA auto_vacuum = INCREMENTAL;
+CREATE TABLE IF NOT EXISTS cv (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    contexte TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    sections TEXT NOT NULL,
+    info TEXT NOT NULL,
+    cree_le REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bandes (
+    contexte TEXT NOT NULL,
+    bande INTEGER NOT NULL,
+    valeur TEXT NOT NULL,
+    cv_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bandes_recherche ON bandes (contexte, bande, valeur);
+CREATE INDEX IF NOT EXISTS bandes_cv ON bandes (cv_id);
+"""
+
+
+def _hash(texte: str) -> int:
+    return int.from_bytes(hashlib.blake2b(texte.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shingles(texte: str) -> set:
+    """Ensemble des empreintes des suites de TAILLE_SHINGLE mots du texte normalisé."""
+    mots = normaliser(texte).split()
+    if len(mots) < TAILLE_SHINGLE:
+        return {_hash(" ".join(mots))} if mots else set()
+    return {_hash(" ".join(mots[i:i + TAILLE_SHINGLE])) for i in range(len(mots) - TAILLE_SHINGLE + 1)}
+
+
+def signature_minhash(texte: str) -> List[int]:
+    """Signature MinHash (NB_PERMUTATIONS valeurs de 32 bits) d'un texte."""
+    empreintes = shingles(texte)
+    if not empreintes:
+        return [_MASQUE] * NB_PERMUTATIONS
+    return [min((a * x + b) % _PREMIER for x in empreintes) & _MASQUE for a, b in _COEFFICIENTS]
+
+
+def similarite(signature_a: List[int], signature_b: List[int]) -> float:
+    """Estimation de la similarité de Jaccard de deux textes à partir de leurs signatures."""
+    return sum(a == b for a, b in zip(signature_a, signature_b)) / NB_PERMUTATIONS
+
+
+def _bandes(signature: List[int]) -> List[str]:
+    lignes = NB_PERMUTATIONS // NB_BANDES
+    return [
+        hashlib.blake2b(array("I", signature[i * lignes:(i + 1) * lignes]).tobytes(), digest_size=8).hexdigest()
+        for i in range(NB_BANDES)
+    ]
+
+
+def empreinte_section(section: str) -> str:
+    """Empreinte d'une section, insensible à la casse, aux accents et à la ponctuation."""
+    return hashlib.sha256(normaliser(section).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CVSimilaire:
+    """CV de l'index proche du CV recherché."""
+    id: int
+    similarite: float
+    sections: List[str]
+    info: dict
+
+
+class IndexSimilarite:
+    """
+    Index MinHash/LSH persistant des CV extraits.
+
+    Args:
+        chemin: Chemin de la base SQLite (créée au besoin)
+        seuil: Similarité minimale pour considérer deux CV comme des versions du même CV
+        nb_entrees_max: Au-delà, les entrées les plus anciennes sont supprimées
+        taille_max_octets: Taille maximale des données stockées (sections, informations
+            et signatures) ; au-delà, les entrées les plus anciennes sont supprimées
+        age_max_secondes: Âge maximal d'une entrée (None : pas de limite)
+    """
+
+    def __init__(self, chemin: str, seuil: float = SEUIL_SIMILARITE, nb_entrees_max: int = NB_ENTREES_MAX,
+                 taille_max_octets: Optional[int] = None, age_max_secondes: Optional[float] = None):
+        self.chemin = chemin
+        self.seuil = seuil
+        self.nb_entrees_max = nb_entrees_max
+        self.taille_max_octets = taille_max_octets
+        self.age_max_secondes = age_max_secondes
+        with closing(self._connexion()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connexion(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.chemin, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def chercher(self, texte: str, contexte: str, signature: Optional[List[int]] = None) -> Optional[CVSimilaire]:
+        """
+        Cherche la version la plus proche d'un CV.
+
+        Args:
+            texte: Texte du CV
+            contexte: Langue, modèle et schéma de l'extraction ; seuls les CV extraits
+                dans le même contexte sont comparés
+            signature: Signature déjà calculée du texte
+
+        Returns:
+            Le CV le plus similaire au-dessus du seuil, ou None
+        """
+        signature = signature or signature_minhash(texte)
+        bandes = _bandes(signature)
+        with closing(self._connexion()) as conn:
+            candidats = {
+                cv_id for (cv_id,) in conn.execute(
+                    "SELECT DISTINCT cv_id FROM bandes WHERE contexte = ? AND ("
+                    + " OR ".join("(bande = ? AND valeur = ?)" for _ in bandes) + ")",
+                    [contexte] + [v for i, valeur in enumerate(bandes) for v in (i, valeur)],
+                )
+            }
+            meilleur = None
+            for cv_id in candidats:
+                ligne = conn.execute("SELECT signature, sections, info FROM cv WHERE id = ?", (cv_id,)).fetchone()
+                if ligne is None:
+                    continue
+                score = similarite(signature, array("I", ligne[0]).tolist())
+                if score >= self.seuil and (meilleur is None or score > meilleur.similarite):
+                    meilleur = CVSimilaire(cv_id, score, json.loads(ligne[1]), json.loads(ligne[2]))
+        return meilleur
+
+    def ajouter(self, texte: str, sections: List[str], contexte: str, info: dict,
+                signature: Optional[List[int]] = None, remplace: Optional[int] = None) -> int:
+        """
+        Ajoute un CV extrait à l'index.
+
+        Args:
+            remplace: Identifiant de la version précédente du CV, supprimée de l'index
+
+        Returns:
+            Identifiant de l'entrée
+        """
+        signature = signature or signature_minhash(texte)
+        with closing(self._connexion()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if remplace is not None:
+                    self._supprimer(conn, [remplace])
+                cv_id = conn.execute(
+                    "INSERT INTO cv (contexte, signature, sections, info, cree_le) VALUES (?, ?, ?, ?, ?)",
+                    (contexte, array("I", signature).tobytes(), json.dumps(sections, ensure_ascii=False),
+                     json.dumps(info, ensure_ascii=False), time.time()),
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO bandes (contexte, bande, valeur, cv_id) VALUES (?, ?, ?, ?)",
+                    [(contexte, i, valeur, cv_id) for i, valeur in enumerate(_bandes(signature))],
+                )
+                self._evincer(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("PRAGMA incremental_vacuum")
+        return cv_id
+
+    def _evincer(self, conn: sqlite3.Connection) -> int:
+        """Supprime les entrées expirées, puis les plus anciennes au-delà du nombre ou de la taille maximale."""
+        anciens = []
+        if self.age_max_secondes is not None:
+            anciens += [cv for (cv,) in conn.execute(
+                "SELECT id FROM cv WHERE cree_le < ?", (time.time() - self.age_max_secondes,)
+            )]
+        anciens += [cv for (cv,) in conn.execute(
+            "SELECT id FROM cv ORDER BY id DESC LIMIT -1 OFFSET ?", (self.nb_entrees_max,)
+        )]
+        if self.taille_max_octets is not None:
+            taille = 0
+            # Les plus récentes sont gardées tant que la taille cumulée reste sous la limite
+            for cv_id, taille_entree in conn.execute(
+                "SELECT id, length(sections) + length(info) + length(signature) FROM cv ORDER BY id DESC"
+            ):
+                taille += taille_entree
+                if taille > self.taille_max_octets:
+                    anciens.append(cv_id)
+        anciens = sorted(set(anciens))
+        if anciens:
+            self._supprimer(conn, anciens)
+        return len(anciens)
+
+    def evincer(self) -> int:
+        """
+        Applique les limites d'âge, de nombre d'entrées et de taille.
+
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        with closing(self._connexion()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                supprimees = self._evincer(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("PRAGMA incremental_vacuum")
+        return supprimees
+
+    def vider(self) -> None:
+        """Supprime toutes les entrées de l'index."""
+        with closing(self._connexion()) as conn:
+            conn.execute("DELETE FROM bandes")
+            conn.execute("DELETE FROM cv")
+            conn.execute("PRAGMA incremental_vacuum")
+
+    @staticmethod
+    def _supprimer(conn: sqlite3.Connection, ids: List[int]) -> None:
+        # Par lots : nombre de paramètres d'une requête SQLite limité
+        for debut in range(0, len(ids), 500):
+            lot = ids[debut:debut + 500]
+            marques = ", ".join("?" * len(lot))
+            conn.execute(f"DELETE FROM bandes WHERE cv_id IN ({marques})", lot)
+            conn.execute(f"DELETE FROM cv WHERE id IN ({marques})", lot)
@@ -0,0 +1,227 @@
+"""
+Compilation et rendu des modèles Word (template_cv_p.docx / template_cv_p_en.docx).
+
+Un modèle est analysé une seule fois : les emplacements des placeholders {{CLE}}
+(corps, en-têtes, pieds de page) sont indexés à la compilation. Chaque rendu
+travaille ensuite sur une copie du document compilé et ne visite que les
+paragraphes qui contiennent effectivement un placeholder.
+"""
+import copy
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+PLACEHOLDER_RE = re.compile(r"\{\{([^{}]+)\}\}")
+
+STYLE_CLIENT_DATE = "italique gras"
+STYLE_REALISATION = "Liste à puces1"
+
+# Une ligne à insérer : (texte, style, gras, tabulation à droite)
+Ligne = Tuple[str, object, bool, bool]
+
+
+def _lignes_projets(projets, style, language) -> List[Ligne]:
+    """Construit les lignes de la section Projets effectués."""
+    lignes: List[Ligne] = []
+    title_realizations = "Réalisations :" if language == "fr" else "Achievements :"
+    for projet in projets:
+        client_nom = projet.get('CLIENT_NOM') or 'Non spécifié'
+        dates = f"{(projet.get('DATE_DEBUT') or 'N/A')} - {(projet.get('DATE_FIN') or 'N/A')}"
+        lignes.append((f"{client_nom}\t{dates}", STYLE_CLIENT_DATE, False, True))
+        lignes.append((projet.get('INTITULE_POSTE') or 'Non spécifié', style, False, False))
+        lignes.append(("", None, False, False))
+        lignes.append((projet.get('INTITULE_PROJET') or 'Non spécifié', style, True, False))
+
+        details_projet = (projet.get('DETAILS_PROJET') or '').strip()
+        if details_projet:
+            lignes.append((details_projet, style, False, False))
+
+        lignes.append(("", None, False, False))
+
+        realizations = projet.get('REALISATION') or []
+        if realizations:
+            lignes.append((title_realizations, style, True, False))
+            for realization in realizations:
+                realization = (realization or '').strip()
+                if realization:
+                    lignes.append((realization, STYLE_REALISATION, False, False))
+            lignes.append(("", None, False, False))
+    return lignes
+
+
+def _lignes_diplomes(diplomes, style, language) -> List[Ligne]:
+    return [
+        (f"{(d.get('ANNEE_DIPLOME') or 'N/A')}    {(d.get('INTITULE_DIPLOME') or 'Non spécifié')}", style, False, False)
+        for d in diplomes
+    ]
+
+
+def _lignes_langues(langues, style, language) -> List[Ligne]:
+    return [
+        (f"{(l.get('LANGUE') or 'Non spécifié')}    {(l.get('NIVEAU') or 'Non spécifié')}", style, False, False)
+        for l in langues
+    ]
+
+
+def _lignes_formations(formations, style, language) -> List[Ligne]:
+    return [
+        (f"{(f.get('ANNEE_FORMATION') or 'N/A')}    {(f.get('INTITULE_FORMATION') or 'Non spécifié')}", style, False, False)
+        for f in formations
+    ]
+
+
+def _lignes_liste(elements, style, language) -> List[Ligne]:
+    return [(str(item), style, False, False) for item in elements]
+
+
+# Sections de type liste avec une mise en forme dédiée ; les autres listes
+# sont rendues avec _lignes_liste (un paragraphe par élément).
+CONSTRUCTEURS_LISTES = {
+    "Projets_effectués": _lignes_projets,
+    "Diplômes": _lignes_diplomes,
+    "Langues": _lignes_langues,
+    "Formations_complémentaires": _lignes_formations,
+}
+
+
+class TemplateCompile:
+    """
+    Modèle Word analysé et indexé.
+
+    Attributs :
+        document : Document python-docx servant de source aux copies. Il n'est
+            jamais parcouru : python-docx met en cache des vues (ex: le corps du
+            document) qui ne survivraient pas à copy.deepcopy.
+        emplacements : liste de (zone, index_section, index_paragraphe, clés)
+            où zone vaut "body", "header" ou "footer"
+    """
+
+    def __init__(self, template_path: str):
+        from docx import Document
+
+        self.template_path = template_path
+        self.document = Document(template_path)
+        self.emplacements = self._indexer(Document(template_path))
+
+    @staticmethod
+    def _paragraphes_par_zone(doc):
+        """Retourne {(zone, index_section): paragraphes} pour le corps, les en-têtes et pieds de page."""
+        zones = {("body", 0): doc.paragraphs}
+        for i, section in enumerate(doc.sections):
+            zones[("header", i)] = section.header.paragraphs
+            zones[("footer", i)] = section.footer.paragraphs
+        return zones
+
+    def _indexer(self, doc) -> List[Tuple[str, int, int, Tuple[str, ...]]]:
+        emplacements = []
+        for (zone, index_section), paragraphes in self._paragraphes_par_zone(doc).items():
+            for index_paragraphe, paragraph in enumerate(paragraphes):
+                cles = tuple(dict.fromkeys(PLACEHOLDER_RE.findall(paragraph.text)))
+                if cles:
+                    emplacements.append((zone, index_section, index_paragraphe, cles))
+        return emplacements
+
+    def rendre(self, data: dict, language: str = "fr"):
+        """
+        Produit un nouveau document rempli avec les données.
+
+        Args:
+            data: Données à insérer (clés = noms des placeholders)
+            language: Langue du document ("fr" ou "en")
+
+        Returns:
+            Document python-docx prêt à être sauvegardé
+        """
+        doc = copy.deepcopy(self.document)
+        zones = self._paragraphes_par_zone(doc)
+        # Les clés sont traitées dans l'ordre des données, comme un parcours de data.items()
+        ordre = {cle: i for i, cle in enumerate(data)}
+        styles = {}
+
+        for zone, index_section, index_paragraphe, cles in self.emplacements:
+            paragraph = zones[(zone, index_section)][index_paragraphe]
+            cles_presentes = sorted((cle for cle in cles if cle in ordre), key=ordre.get)
+            if not cles_presentes:
+                continue
+
+            if zone != "body":
+                # En-têtes et pieds de page : remplacement textuel simple
+                texte = paragraph.text
+                for cle in cles_presentes:
+                    texte = texte.replace(f"{{{{{cle}}}}}", str(data[cle]))
+                paragraph.text = texte
+                continue
+
+            self._remplir_paragraphe(doc, paragraph, cles_presentes, data, language, styles)
+
+        return doc
+
+    def _remplir_paragraphe(self, doc, paragraph, cles, data, language, styles):
+        texte = paragraph.text
+        texte_modifie = False
+        for cle in cles:
+            placeholder = f"{{{{{cle}}}}}"
+            if placeholder not in texte:
+                continue
+            value = data[cle]
+            if isinstance(value, list):
+                paragraph.text = texte = ""
+                texte_modifie = False
+                constructeur = CONSTRUCTEURS_LISTES.get(cle, _lignes_liste)
+                lignes = constructeur(value, paragraph.style, language)
+                self._inserer_avant(doc, paragraph, lignes, styles)
+            else:
+                texte = texte.replace(placeholder, str(value))
+                texte_modifie = True
+        if texte_modifie:
+            paragraph.text = texte
+
+    @staticmethod
+    def _inserer_avant(doc, ancre, lignes: List[Ligne], styles: Dict[tuple, Optional[str]]):
+        """
+        Insère en une passe une série de paragraphes avant le paragraphe ancre.
+        Les identifiants de style sont résolus une seule fois par rendu : la
+        résolution par python-docx (paragraph.style = ...) parcourt la table des
+        styles à chaque affectation.
+        """
+        from docx.enum.style import WD_STYLE_TYPE
+        from docx.enum.text import WD_PARAGRAPH_ALIGNMENT  # Pour aligner les paragraphes
+        from docx.shared import Inches  # Pour définir les positions en pouces
+
+        for texte, style, gras, tabulation in lignes:
+            nouveau = ancre.insert_paragraph_before(texte)
+            if style is not None:
+                cle = ("nom", style) if isinstance(style, str) else ("id", style.style_id)
+                if cle not in styles:
+                    styles[cle] = doc.part.get_style_id(style, WD_STYLE_TYPE.PARAGRAPH)
+                nouveau._p.style = styles[cle]
+            if gras:
+                nouveau.runs[0].bold = True
+            if tabulation:
+                tab_stop = nouveau.paragraph_format.tab_stops.add_tab_stop(Inches(6.5))
+                tab_stop.alignment = WD_PARAGRAPH_ALIGNMENT.RIGHT
+
+
+_templates_compiles: Dict[Tuple[str, int], TemplateCompile] = {}
+_templates_lock = threading.Lock()
+
+
+def compiler_template(template_path: str) -> TemplateCompile:
+    """
+    Retourne le modèle compilé correspondant au chemin, en le compilant au
+    premier appel (ou si le fichier a été modifié depuis).
+    """
+    chemin = os.path.abspath(template_path)
+    cle = (chemin, os.stat(chemin).st_mtime_ns)
+    template: Optional[TemplateCompile] = _templates_compiles.get(cle)
+    if template is None:
+        with _templates_lock:
+            template = _templates_compiles.get(cle)
+            if template is None:
+                # Oublier les anciennes versions du même fichier
+                for ancienne in [c for c in _templates_compiles if c[0] == chemin]:
+                    del _templates_compiles[ancienne]
+                template = _templates_compiles[cle] = TemplateCompile(chemin)
+    return template
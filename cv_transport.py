@@ -0,0 +1,327 @@
+"""
+Couche de transport des appels à l'API OpenAI.
+
+    - connexion partagée : un seul httpx.Client (pool de connexions keep-alive)
+      pour tous les threads du processus, au lieu d'une connexion par appel ;
+    - échéances : chaque appel a une durée maximale, toutes tentatives
+      comprises, réduite au besoin par l'échéance de l'extraction en cours
+      (voir echeance) ; au-delà, DelaiDepasse est levée ;
+    - nouvelles tentatives sur erreur temporaire (429, 5xx, réseau, délai d'une
+      tentative), après Retry-After ou un backoff exponentiel à gigue complète ;
+    - requêtes couvertes (optionnelles) : si la réponse tarde au-delà du p95 des
+      latences observées, une seconde requête identique est envoyée et la
+      première réponse valide est retenue. Les appels bloqués n'allongent plus
+      la queue de distribution des latences, au prix de quelques requêtes en plus.
+
+Exemple :
+    transport = Transport(ConfigTransport(couverture=True))
+    reponse = transport.appeler(lambda timeout: client.chat.completions.parse(..., timeout=timeout),
+                                cle="gpt-5")
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, TypeVar
+
+from cv_metrics import enregistrer_tentative, enregistrer_transport
+
+T = TypeVar("T")
+
+
+@dataclass
+class ConfigTransport:
+    """
+    Paramètres de la couche de transport.
+
+    Args:
+        delai_appel: Durée maximale d'un appel, toutes tentatives comprises (s)
+        delai_tentative: Durée maximale d'une tentative (s) : une réponse bloquée
+            est abandonnée et réessayée tant que l'échéance de l'appel le permet
+        delai_connexion: Délai d'établissement d'une connexion (s)
+        max_tentatives: Nombre maximal de tentatives d'un appel
+        delai_base: Délai de backoff de la première nouvelle tentative (s)
+        delai_max: Délai de backoff maximal (s)
+        couverture: Activer les requêtes couvertes
+        delai_couverture: Délai avant la requête de couverture (s) ; par défaut,
+            le p95 des latences observées pour le même modèle
+        delai_couverture_min: Délai minimal avant une requête de couverture (s)
+        delai_extraction: Échéance par défaut d'une extraction complète (s)
+        connexions_max: Taille du pool de connexions HTTP
+    """
+    delai_appel: float = 180.0
+    delai_tentative: float = 90.0
+    delai_connexion: float = 10.0
+    max_tentatives: int = 3
+    delai_base: float = 0.5
+    delai_max: float = 10.0
+    couverture: bool = False
+    delai_couverture: Optional[float] = None
+    delai_couverture_min: float = 1.0
+    delai_extraction: Optional[float] = None
+    connexions_max: int = 32
+
+    @classmethod
+    def depuis_environnement(cls) -> "ConfigTransport":
+        """
+        Configuration lue dans les variables d'environnement :
+            CV_DELAI_APPEL : durée maximale d'un appel LLM en secondes (180 par défaut)
+            CV_DELAI_TENTATIVE : durée maximale d'une tentative en secondes (90 par défaut)
+            CV_DELAI_EXTRACTION : échéance d'une extraction complète en secondes
+            CV_TENTATIVES_MAX : nombre maximal de tentatives (3 par défaut)
+            CV_REQUETES_COUVERTES=1 : active les requêtes couvertes
+            CV_DELAI_COUVERTURE : délai fixe avant la requête de couverture
+            CV_CONNEXIONS_MAX : taille du pool de connexions (32 par défaut)
+        """
+        env = os.environ
+        return cls(
+            delai_appel=float(env.get("CV_DELAI_APPEL", cls.delai_appel)),
+            delai_tentative=float(env.get("CV_DELAI_TENTATIVE", cls.delai_tentative)),
+            max_tentatives=int(env.get("CV_TENTATIVES_MAX", cls.max_tentatives)),
+            couverture=env.get("CV_REQUETES_COUVERTES") == "1",
+            delai_couverture=float(env["CV_DELAI_COUVERTURE"]) if env.get("CV_DELAI_COUVERTURE") else None,
+            delai_extraction=float(env["CV_DELAI_EXTRACTION"]) if env.get("CV_DELAI_EXTRACTION") else None,
+            connexions_max=int(env.get("CV_CONNEXIONS_MAX", cls.connexions_max)),
+        )
+
+
+class DelaiDepasse(TimeoutError):
+    """L'échéance d'un appel ou de l'extraction en cours est atteinte."""
+
+
+_echeance: ContextVar[Optional[float]] = ContextVar("echeance_transport", default=None)
+_tentatives_max: ContextVar[Optional[int]] = ContextVar("tentatives_max_transport", default=None)
+
+
+@contextmanager
+def echeance(secondes: Optional[float]):
+    """
+    Borne la durée de tous les appels faits dans le bloc, y compris dans les
+    threads lancés avec copy_context (extraction par morceaux). Une échéance
+    déjà en place plus proche reste en vigueur.
+
+    Args:
+        secondes: Durée maximale du bloc, ou None (pas d'échéance supplémentaire)
+    """
+    if secondes is None:
+        yield
+        return
+    limite = time.monotonic() + secondes
+    courante = _echeance.get()
+    jeton = _echeance.set(limite if courante is None else min(limite, courante))
+    try:
+        yield
+    finally:
+        _echeance.reset(jeton)
+
+
+@contextmanager
+def tentatives_max(nombre: Optional[int]):
+    """
+    Fixe le nombre maximal de tentatives de chaque appel fait dans le bloc (y
+    compris dans les threads lancés avec copy_context), à la place de
+    ConfigTransport.max_tentatives.
+
+    Args:
+        nombre: Nombre maximal de tentatives par appel, ou None (configuration)
+    """
+    jeton = _tentatives_max.set(nombre)
+    try:
+        yield
+    finally:
+        _tentatives_max.reset(jeton)
+
+
+def est_erreur_temporaire(erreur: Exception) -> bool:
+    """Indique si l'erreur OpenAI justifie une nouvelle tentative (429, 5xx, réseau, délai)."""
+    import openai
+
+    if isinstance(erreur, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    if isinstance(erreur, openai.APIStatusError):
+        return erreur.status_code == 429 or erreur.status_code >= 500
+    return False
+
+
+def delai_retry_after(erreur: Exception) -> Optional[float]:
+    """Lit l'en-tête Retry-After d'une réponse d'erreur, s'il est présent."""
+    reponse = getattr(erreur, "response", None)
+    if reponse is None:
+        return None
+    valeur = reponse.headers.get("retry-after")
+    try:
+        return float(valeur) if valeur is not None else None
+    except ValueError:
+        return None
+
+
+def creer_client_http(config: ConfigTransport):
+    """
+    Client httpx partagé par tous les appels : connexions keep-alive réutilisées.
+    Le délai de lecture par défaut reste large (envoi et téléchargement des
+    fichiers du mode bulk) ; les appels d'extraction passent leur propre délai.
+    """
+    import httpx
+
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=config.connexions_max,
+                            max_keepalive_connections=config.connexions_max),
+        timeout=httpx.Timeout(600.0, connect=config.delai_connexion),
+    )
+
+
+class FenetreLatences:
+    """Dernières latences observées, par clé (modèle), pour estimer leur p95."""
+
+    def __init__(self, taille: int = 200, minimum: int = 20):
+        self.taille = taille
+        self.minimum = minimum
+        self._latences: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def ajouter(self, cle: str, duree: float) -> None:
+        with self._lock:
+            self._latences.setdefault(cle, deque(maxlen=self.taille)).append(duree)
+
+    def percentile(self, cle: str, p: float = 95) -> Optional[float]:
+        """Percentile p des latences de la clé, ou None avant `minimum` observations."""
+        with self._lock:
+            latences = sorted(self._latences.get(cle, ()))
+        if len(latences) < self.minimum:
+            return None
+        return latences[min(len(latences) - 1, int(len(latences) * p / 100))]
+
+
+def _lancer(requete: Callable[[float], T], timeout: float) -> "Future[T]":
+    """Exécute requete(timeout) dans un thread dédié, avec le contexte courant (mesures)."""
+    future: Future = Future()
+    contexte = copy_context()
+
+    def executer():
+        try:
+            future.set_result(contexte.run(requete, timeout))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=executer, name="cv-transport", daemon=True).start()
+    return future
+
+
+class Transport:
+    """
+    Exécute les appels à l'API avec échéance, nouvelles tentatives et, si
+    activées, requêtes couvertes.
+
+    Args:
+        config: Paramètres (ConfigTransport() par défaut)
+    """
+
+    def __init__(self, config: Optional[ConfigTransport] = None):
+        self.config = config or ConfigTransport()
+        self.latences = FenetreLatences()
+
+    def _limite(self) -> float:
+        limite = time.monotonic() + self.config.delai_appel
+        courante = _echeance.get()
+        return limite if courante is None else min(limite, courante)
+
+    def _delai_couverture(self, cle: str) -> Optional[float]:
+        if not self.config.couverture:
+            return None
+        if self.config.delai_couverture is not None:
+            return self.config.delai_couverture
+        p95 = self.latences.percentile(cle)
+        return None if p95 is None else max(p95, self.config.delai_couverture_min)
+
+    def appeler(self, requete: Callable[[float], T], cle: str = "",
+                valide: Optional[Callable[[T], bool]] = None) -> T:
+        """
+        Exécute un appel à l'API.
+
+        Args:
+            requete: Fonction qui envoie la requête ; reçoit le délai restant de la
+                tentative en secondes (à passer en timeout au client OpenAI)
+            cle: Clé des latences observées (le modèle), pour le délai de couverture
+            valide: Prédicat sur la réponse ; une réponse invalide n'est pas retenue
+                tant que l'autre requête couverte est en cours
+
+        Returns:
+            La réponse de requete
+
+        Raises:
+            DelaiDepasse: L'échéance est atteinte avant une réponse
+            Exception: Erreur non temporaire, ou dernière erreur après max_tentatives
+                (ou le nombre fixé par tentatives_max)
+        """
+        limite = self._limite()
+        max_tentatives = _tentatives_max.get() or self.config.max_tentatives
+        tentative = 0
+        while True:
+            tentative += 1
+            restant = limite - time.monotonic()
+            if restant <= 0:
+                enregistrer_transport("delai_depasse")
+                raise DelaiDepasse(f"Échéance atteinte après {tentative - 1} tentative(s)")
+            try:
+                return self._tenter(requete, cle, min(restant, self.config.delai_tentative), valide)
+            except Exception as e:
+                if not est_erreur_temporaire(e) or tentative >= max_tentatives:
+                    if time.monotonic() >= limite:
+                        enregistrer_transport("delai_depasse")
+                        raise DelaiDepasse(f"Échéance atteinte après {tentative} tentative(s)") from e
+                    raise
+                delai = delai_retry_after(e)
+                if delai is None:
+                    # Gigue complète : des appels en échec simultané ne réessaient pas ensemble
+                    delai = random.uniform(0, min(self.config.delai_max,
+                                                  self.config.delai_base * 2 ** (tentative - 1)))
+                if time.monotonic() + delai >= limite:
+                    enregistrer_transport("delai_depasse")
+                    raise DelaiDepasse(f"Échéance atteinte après {tentative} tentative(s)") from e
+                enregistrer_tentative()
+                time.sleep(delai)
+
+    def _tenter(self, requete: Callable[[float], T], cle: str, restant: float,
+                valide: Optional[Callable[[T], bool]]) -> T:
+        """Une tentative : requête simple, ou couverte si le délai de couverture laisse le temps."""
+        delai_couverture = self._delai_couverture(cle)
+        debut = time.monotonic()
+        if delai_couverture is None or delai_couverture >= restant:
+            reponse = requete(restant)
+            self.latences.ajouter(cle, time.monotonic() - debut)
+            return reponse
+
+        futures = [_lancer(requete, restant)]
+        termines, _ = wait(futures, timeout=delai_couverture)
+        if not termines:
+            enregistrer_transport("couverture")
+            futures.append(_lancer(requete, restant - delai_couverture))
+
+        # La première réponse valide est retenue ; la requête perdante n'est pas
+        # interrompue, elle se termine à son propre délai
+        erreur = None
+        invalide = None
+        en_cours = set(futures)
+        while en_cours:
+            termines, en_cours = wait(en_cours, return_when=FIRST_COMPLETED)
+            for future in termines:
+                try:
+                    reponse = future.result()
+                except Exception as e:
+                    erreur = erreur or e
+                    continue
+                if valide is not None and not valide(reponse):
+                    invalide = invalide or reponse
+                    continue
+                if future is not futures[0]:
+                    enregistrer_transport("couverture_gagnante")
+                self.latences.ajouter(cle, time.monotonic() - debut)
+                return reponse
+        if invalide is not None:
+            return invalide
+        raise erreur
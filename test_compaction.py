@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests de la compaction du texte des CV (cv_compaction)
+"""
+from cv_compaction import SEPARATEUR_PAGES, compacter_texte
+
+
+def _page(haut, corps, bas):
+    remplissage = [f"- Tâche {i} de la mission" for i in range(6)]
+    return "\n".join(haut + corps + remplissage + bas)
+
+
+def test_dates_de_missions_en_marge_conservees():
+    """Des plages de dates différentes en marge de page ne sont pas des en-têtes répétés."""
+    pages = [
+        _page(["Jean DUPONT - Dossier de compétences", "01/2018 - 12/2019"],
+              ["Client : Total", "Chef de projet", "Réalisations :", "- Pilotage des travaux"],
+              ["Page 1/3"]),
+        _page(["Jean DUPONT - Dossier de compétences", "03/2015 - 12/2017"],
+              ["Client : Engie", "Ingénieur travaux", "Réalisations :", "- Suivi de chantier"],
+              ["Page 2/3"]),
+        _page(["Jean DUPONT - Dossier de compétences", "06/2012 - 02/2015"],
+              ["Client : Vinci", "Conducteur de travaux", "Réalisations :", "- Planification"],
+              ["Page 3/3"]),
+    ]
+    texte = compacter_texte(SEPARATEUR_PAGES.join(pages)).texte
+
+    for plage in ("01/2018 - 12/2019", "03/2015 - 12/2017", "06/2012 - 02/2015"):
+        assert plage in texte
+    # Les en-têtes et pieds de page répétés restent supprimés
+    assert texte.count("Jean DUPONT - Dossier de compétences") == 1
+    assert "Page 2/3" not in texte and "Page 3/3" not in texte
+    assert texte.count("Réalisations :") == 3
+
+
+def test_lignes_chiffrees_du_corps_conservees():
+    """Un montant ou une référence répété d'une mission à l'autre n'est pas une coordonnée."""
+    corps = ["Client : Total", "Chef de projet", "Budget : 1 200 000 000 €", "Référence marché : 2019-000123456"]
+    pages = [
+        _page(["Jean DUPONT - Dossier de compétences", "Tél : 06 12 34 56 78"], corps, ["Page 1/2"]),
+        _page(["Jean DUPONT - Dossier de compétences", "Expérience"], corps, ["06 12 34 56 78", "Page 2/2"]),
+    ]
+    texte = compacter_texte(SEPARATEUR_PAGES.join(pages)).texte
+
+    assert texte.count("Budget : 1 200 000 000 €") == 2
+    assert texte.count("Référence marché : 2019-000123456") == 2
+    assert texte.count("Tél : 06 12 34 56 78") == 1
+
+
+def test_coordonnees_repetees_en_pied_de_page_supprimees():
+    """Sur une seule page, un bloc de contact répété en pied de page est retiré."""
+    texte = compacter_texte(_page(["Jean DUPONT", "jean.dupont@exemple.fr", "+33 6 12 34 56 78"],
+                                  ["Client : Total", "Chef de projet"],
+                                  ["jean.dupont@exemple.fr", "+33 6 12 34 56 78"])).texte
+
+    assert texte.count("jean.dupont@exemple.fr") == 1
+    assert texte.count("+33 6 12 34 56 78") == 1
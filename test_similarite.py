@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests de la réextraction par différence des CV déjà vus (cv_process, cv_similarite)
+"""
+import cv_process
+from cv_decoupage import decouper_en_sections
+from cv_similarite import CVSimilaire
+
+
+def _projet(intitule, debut, fin):
+    return {"CLIENT_NOM": "Total", "DATE_DEBUT": debut, "DATE_FIN": fin, "INTITULE_POSTE": "Chef de projet",
+            "INTITULE_PROJET": intitule, "DETAILS_PROJET": "", "REALISATION": [f"Pilotage {intitule}"]}
+
+
+def _cv(mission_a):
+    return "\n".join([
+        "Jean DUPONT", "Ingénieur travaux",
+        "01/2018 - 06/2018", "Client : Total", mission_a, "- Pilotage des travaux",
+        "07/2018 - 12/2018", "Client : Total", "Mission B", "- Suivi de chantier",
+        "03/2015 - 12/2017", "Client : Engie", "Mission C", "- Planification",
+        "Diplômes : Ingénieur ENPC",
+    ])
+
+
+def test_mission_meme_client_meme_annee_conservee(monkeypatch):
+    """Modifier une mission ne retire pas celle du même client la même année."""
+    precedent = CVSimilaire(id=1, similarite=0.9, sections=decouper_en_sections(_cv("Mission A")), info={
+        "Projets_effectués": [_projet("Mission A", "01/2018", "06/2018"), _projet("Mission B", "07/2018", "12/2018"),
+                              {**_projet("Mission C", "03/2015", "12/2017"), "CLIENT_NOM": "Engie"}],
+    })
+    contenus = []
+
+    def appeler_llm(system_prompt, contenu, response_format, modele=cv_process.MODELE_LLM):
+        contenus.append(contenu)
+        return cv_process.ProjetsExtraits(Projets_effectués=[_projet("Mission A bis", "01/2018", "06/2018")])
+
+    monkeypatch.setattr(cv_process, "_appeler_llm", appeler_llm)
+    info, nb_sections, nb_supprimees = cv_process._extraire_par_difference(
+        decouper_en_sections(_cv("Mission A bis")), "fr", precedent)
+
+    assert (nb_sections, nb_supprimees) == (1, 1)
+    assert len(contenus) == 1 and "Mission B" not in contenus[0]
+    assert [p["INTITULE_PROJET"] for p in info["Projets_effectués"]] == ["Mission A bis", "Mission B", "Mission C"]
+
+
+def test_rattachement_ambigu_extraction_complete():
+    """Un projet rattachable à plusieurs sections impose une extraction complète."""
+    sections = decouper_en_sections(_cv("Mission A").replace("07/2018 - 12/2018", "01/2018 - 06/2018"))
+    precedent = CVSimilaire(id=1, similarite=0.9, sections=sections,
+                            info={"Projets_effectués": [_projet("Mission A", "01/2018", "06/2018")]})
+
+    assert cv_process._extraire_par_difference(sections, "fr", precedent) is None
@@ -1,12 +1,30 @@
-import streamlit as st
-from cv_process import extract_info_from_cv, fill_word_template_with_lists, extract_text_from_file
 import os
+
+import streamlit as st
+from cv_process import fill_word_template_with_lists, get_template_path
+from cv_jobs import (
+    FileJobs, demarrer_workers, empreinte_contenu, STATUT_EN_ATTENTE, STATUT_EN_COURS, STATUT_ERREUR, STATUT_TERMINE,
+)
 from PIL import Image
-import tempfile
-from pathlib import Path
 
 st.set_page_config(page_title="Automatisation CV", page_icon="📄")
 
+
+@st.cache_resource
+def get_file_jobs() -> FileJobs:
+    """
+    File de traitements partagée par toutes les sessions. Les workers sont lancés
+    une seule fois par serveur (CV_JOBS_WORKERS=0 s'ils tournent à part).
+    """
+    file_jobs = FileJobs()
+    nombre_workers = int(os.environ.get("CV_JOBS_WORKERS", "2"))
+    if nombre_workers > 0:
+        demarrer_workers(nombre_workers, file_jobs.chemin)
+    return file_jobs
+
+
+file_jobs = get_file_jobs()
+
 logo = Image.open("parlym_logo.png")
 
 st.image(logo, width=300)
@@ -17,76 +35,201 @@ st.title("Traitement Automatique des CV")
 langue = st.selectbox("Choisissez la langue de génération", ["fr", "en"], format_func=lambda x: "Français" if x == "fr" else "Anglais")
 
 # Choix du template selon la langue
-if langue == "en":
-    template_path = "template_cv_p_en.docx"
-else:
-    template_path = "template_cv_p.docx"
+template_path = get_template_path(langue)
 
 # Sélection du fichier CV
 uploaded_cv = st.file_uploader("Téléchargez le fichier CV (PDF ou Word)", type=["docx", "pdf"])
 
-def save_uploaded_file(uploaded_file) -> str:
-    """
-    Sauvegarde le fichier uploadé temporairement.
-    
-    Args:
-        uploaded_file: Fichier uploadé par l'utilisateur
-    
-    Returns:
-        Chemin vers le fichier sauvegardé
-    """
-    with tempfile.NamedTemporaryFile(delete=False, suffix=Path(uploaded_file.name).suffix) as tmp_file:
-        tmp_file.write(uploaded_file.getvalue())
-        return tmp_file.name
+CHAMPS_SIMPLES = {
+    "PRENOM": "Prénom",
+    "NOM": "Nom",
+    "TRI": "Trigramme",
+    "ANNEE": "Année de naissance",
+    "EMAIL": "Email",
+    "TELEPHONE": "Téléphone",
+    "INTITULE_DU_POSTE": "Intitulé du poste",
+}
+CHAMPS_LISTES = {
+    "EXPERTISE": "Expertises",
+    "SECTEUR": "Secteurs",
+    "METHODOLOGIE": "Méthodologies et outils",
+    "HABILITATION": "Habilitations",
+}
+CHAMPS_TABLEAUX = {
+    "Diplômes": ("Diplômes", ["ANNEE_DIPLOME", "INTITULE_DIPLOME"]),
+    "Langues": ("Langues", ["LANGUE", "NIVEAU"]),
+    "Formations_complémentaires": ("Formations complémentaires", ["ANNEE_FORMATION", "INTITULE_FORMATION"]),
+}
+CHAMPS_PROJET = {
+    "CLIENT_NOM": "Client",
+    "DATE_DEBUT": "Date de début",
+    "DATE_FIN": "Date de fin",
+    "INTITULE_POSTE": "Poste",
+    "INTITULE_PROJET": "Projet",
+    "DETAILS_PROJET": "Détails",
+}
+
+MIME_DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Informations extraites, documents générés et jobs, par fichier (empreinte + langue) :
+# une correction ne relance que le rendu du document, jamais l'extraction
+extractions = st.session_state.setdefault("extractions", {})
+documents = st.session_state.setdefault("documents", {})
+mesures = st.session_state.setdefault("mesures", {})
+jobs = st.session_state.setdefault("jobs", {})
+
+
+def _lignes(texte: str) -> list:
+    return [ligne.strip() for ligne in texte.splitlines() if ligne.strip()]
+
+
+def formulaire_corrections(cle: str, info: dict) -> dict:
+    """Affiche les informations extraites dans un formulaire et retourne les valeurs saisies."""
+    corrige = dict(info)
+    colonnes = st.columns(2)
+    for i, (champ, libelle) in enumerate(CHAMPS_SIMPLES.items()):
+        corrige[champ] = colonnes[i % 2].text_input(libelle, value=info.get(champ) or "", key=f"{cle}_{champ}")
+
+    for champ, libelle in CHAMPS_LISTES.items():
+        corrige[champ] = _lignes(st.text_area(f"{libelle} (une par ligne)", value="\n".join(info.get(champ) or []),
+                                              key=f"{cle}_{champ}"))
+
+    st.markdown("**Projets effectués**")
+    projets = []
+    for i, projet in enumerate(info.get("Projets_effectués") or []):
+        titre = f"{projet.get('CLIENT_NOM', '')} ({projet.get('DATE_DEBUT', '')} - {projet.get('DATE_FIN', '')})"
+        with st.expander(titre):
+            projet_corrige = {
+                champ: st.text_input(libelle, value=projet.get(champ) or "", key=f"{cle}_projet{i}_{champ}")
+                for champ, libelle in CHAMPS_PROJET.items()
+            }
+            projet_corrige["REALISATION"] = _lignes(st.text_area(
+                "Réalisations (une par ligne)", value="\n".join(projet.get("REALISATION") or []),
+                key=f"{cle}_projet{i}_REALISATION",
+            ))
+        projets.append(projet_corrige)
+    corrige["Projets_effectués"] = projets
+
+    for champ, (libelle, colonnes_tableau) in CHAMPS_TABLEAUX.items():
+        st.markdown(f"**{libelle}**")
+        lignes = st.data_editor(
+            [{colonne: ligne.get(colonne, "") for colonne in colonnes_tableau} for ligne in info.get(champ) or []]
+            or [dict.fromkeys(colonnes_tableau, "")],
+            num_rows="dynamic", use_container_width=True, key=f"{cle}_{champ}",
+        )
+        corrige[champ] = [ligne for ligne in lignes if any((ligne.get(c) or "").strip() for c in colonnes_tableau)]
+    return corrige
+
+
+def afficher_resultat(cle: str, output_name: str, langue: str):
+    """Formulaire de corrections et téléchargement du document généré."""
+    st.success(f"Fichier généré avec succès : {output_name}")
+
+    with st.form(f"corrections_{cle}"):
+        st.markdown("#### Corriger les informations extraites")
+        corrige = formulaire_corrections(cle, extractions[cle])
+        if st.form_submit_button("Régénérer le document"):
+            # Rendu seul, sans nouvel appel au modèle
+            extractions[cle] = corrige
+            documents[cle] = fill_word_template_with_lists(get_template_path(langue), None, corrige, language=langue)
+
+    # bouton pour télécharger le fichier généré
+    st.download_button(
+        label="Télécharger le fichier généré",
+        data=documents[cle],
+        file_name=output_name,
+        mime=MIME_DOCX,
+    )
+
+    # Détail des temps par étape et des tokens consommés
+    if mesures.get(cle):
+        with st.expander("Détails de performance"):
+            st.json(mesures[cle])
+
+
+def afficher_job(cle: str):
+    """Affiche l'état d'un job ; rafraîchi périodiquement tant qu'il n'est pas terminé."""
+    job = file_jobs.statut(jobs[cle])
+    if job is None:
+        st.error("Traitement introuvable")
+        return
+
+    if job["statut"] == STATUT_EN_ATTENTE:
+        st.info(f"⏳ {job['nom_fichier']} : en attente (position {job['position']} dans la file)")
+        return
+    if job["statut"] == STATUT_EN_COURS:
+        st.info(f"⚙️ {job['nom_fichier']} : traitement en cours...")
+        return
+
+    mesures[cle] = job["mesure"]
+    if job["statut"] == STATUT_TERMINE:
+        extractions[cle] = job["info"]
+        documents[cle] = job["resultat"]
+        # Relance complète : affichage du formulaire et arrêt du rafraîchissement périodique
+        st.rerun()
+    elif job["erreur"] and job["erreur"].startswith("ValueError"):
+        st.error(f"Erreur de format : {job['erreur']}")
+    else:
+        st.error(f"Une erreur s'est produite : {job['erreur']}")
+
+
+def afficher_traitement(cle: str, output_name: str, langue: str):
+    """Résultat du fichier s'il est déjà extrait, sinon état de son job."""
+    if cle in extractions:
+        afficher_resultat(cle, output_name, langue)
+    elif cle in jobs:
+        job = file_jobs.statut(jobs[cle])
+        if job is not None and job["statut"] in (STATUT_EN_ATTENTE, STATUT_EN_COURS):
+            st.fragment(afficher_job, run_every=2)(cle)
+        else:
+            afficher_job(cle)
+
+
+def nom_sortie(nom_fichier: str) -> str:
+    return f"{nom_fichier.split('.')[0]}_parlym.docx"
+
 
 # Bouton pour lancer le traitement
 if uploaded_cv is not None and template_path:
     st.write(f"**Fichier sélectionné :** {uploaded_cv.name}")
 
-    # Bouton pour générer le fichier
-    if st.button("Lancer le traitement"):
-        output_path = None  # Initialiser output_path avant le bloc try
-        cv_temp_path = None  # Pour stocker le chemin temporaire
-        
-        with st.spinner("Traitement en cours..."):
-            try:
-                # Sauvegarder le fichier uploadé temporairement
-                cv_temp_path = save_uploaded_file(uploaded_cv)
-                
-                # Extraire le texte du CV en utilisant extract_text_from_file
-                cv_content = extract_text_from_file(cv_temp_path)
-                
-                if cv_content:
-                    extracted_info = extract_info_from_cv(cv_content, language=langue)
-
-                    output_path = f"{uploaded_cv.name.split('.')[0]}_parlym.docx"
-
-                    fill_word_template_with_lists(template_path, output_path, extracted_info, language=langue)
-
-                    st.success(f"Fichier généré avec succès : {output_path}")
-
-                    # bouton pour télécharger le fichier généré
-                    with open(output_path, "rb") as result_file:
-                        st.download_button(
-                            label="Télécharger le fichier généré",
-                            data=result_file,
-                            file_name=output_path,
-                        )
-                else:
-                    st.error("Erreur : Impossible d'extraire le texte du fichier")
-                    
-            except ValueError as ve:
-                st.error(f"Erreur de format : {str(ve)}")
-            except Exception as e:
-                st.error(f"Une erreur s'est produite : {str(e)}")
-            finally:
-                # Nettoyer le fichier temporaire uploadé
-                if cv_temp_path and os.path.exists(cv_temp_path):
-                    try:
-                        os.unlink(cv_temp_path)
-                    except OSError:
-                        pass
-                
-                # Nettoyer le fichier de sortie si il existe
-                if output_path and os.path.exists(output_path):
-                    os.remove(output_path)
\ No newline at end of file
+    contenu = uploaded_cv.getvalue()
+    empreinte = empreinte_contenu(contenu)
+    cle = f"{empreinte}_{langue}"
+
+    # Après un rechargement de page, le job déjà déposé pour ce fichier est retrouvé
+    if cle not in jobs:
+        job_existant = file_jobs.trouver(empreinte, langue)
+        if job_existant is not None:
+            jobs[cle] = job_existant
+
+    # Bouton pour générer le fichier : le traitement est confié aux workers,
+    # sauf si ce fichier a déjà été extrait ou déposé dans cette langue (un job
+    # en erreur peut être relancé)
+    if st.button("Lancer le traitement") and cle not in extractions and (
+        cle not in jobs or (file_jobs.statut(jobs[cle]) or {}).get("statut", STATUT_ERREUR) == STATUT_ERREUR
+    ):
+        jobs[cle] = file_jobs.ajouter(uploaded_cv.name, contenu, langue)
+    if cle in jobs:
+        # Identifiant dans l'URL : le suivi reprend après un rechargement, sans nouveau dépôt du fichier
+        st.query_params["job"] = jobs[cle]
+
+    afficher_traitement(cle, nom_sortie(uploaded_cv.name), langue)
+
+elif "job" in st.query_params:
+    job = file_jobs.statut(st.query_params["job"])
+    if job is None:
+        st.error("Traitement introuvable")
+    else:
+        st.write(f"**Fichier :** {job['nom_fichier']} ({job['langue']})")
+        cle = f"{job['empreinte']}_{job['langue']}"
+        jobs[cle] = job["id"]
+        afficher_traitement(cle, nom_sortie(job["nom_fichier"]), job["langue"])
+
+# Métriques agrégées des workers (chaque worker publie les siennes après chaque job)
+metriques_workers = file_jobs.metriques()
+if metriques_workers:
+    with st.expander("Métriques des workers"):
+        for metriques in metriques_workers:
+            st.markdown(f"**{metriques['worker']}**")
+            st.code(metriques["prometheus"], language="text")